@@ -0,0 +1,157 @@
+"""
+Micro-benchmark for SpecimenPortal.generate_bican_object.
+
+Compares the previous approach (walk the pydantic fields of the class for every record, dig the NIMP name out of
+json_schema_extra, resolve the field type recursively and scan enums linearly) with the cached mapping plans of
+compile_mapping_plan, and with SpecimenPortal.generate_bican_objects, which also validates the records of each class
+in one TypeAdapter batch, on synthetic records of every category that fill every supported field.
+
+Usage:
+    ```
+    python benchmarks/bench_specimen_objects.py -n 10000
+    ```
+"""
+
+import time
+import timeit
+from enum import Enum
+import click
+from bkbit.data_translators.library_generation_translator import (
+    CATEGORY_TO_CLASS,
+    SpecimenPortal,
+    compile_mapping_plan,
+)
+
+
+def check_valueset_membership(enum_type, nimp_value):
+    # Previous implementation of SpecimenPortal.__check_valueset_membership
+    for member in enum_type:
+        if member.value == nimp_value:
+            return member
+    return None
+
+
+def generate_before(data, was_derived_from=None):
+    # Previous implementation of SpecimenPortal.generate_bican_object
+    bican_class = CATEGORY_TO_CLASS.get(data.get("category"))
+    assigned_attributes = {}
+    for schema_field_name, schema_field_metadata in bican_class.model_fields.items():
+        nimp_field_name = (
+            schema_field_metadata.json_schema_extra.get("linkml_meta", {})
+            .get("local_names", {})
+            .get("NIMP", {})
+            .get("local_name_value", schema_field_name)
+        )
+        multivalued, field_type = SpecimenPortal.get_field_type(schema_field_metadata.annotation)
+        required = schema_field_metadata.is_required()
+        if nimp_field_name == "id":
+            assigned_attributes[schema_field_name] = "NIMP:" + str(data.get("id"))
+            continue
+        if nimp_field_name == "was_derived_from" and was_derived_from is not None:
+            if multivalued:
+                assigned_attributes[schema_field_name] = was_derived_from
+            else:
+                assigned_attributes[schema_field_name] = was_derived_from[0]
+            continue
+        data_value = data.get("record", {}).get(nimp_field_name)
+        if data_value is None:
+            assigned_attributes[schema_field_name] = schema_field_metadata.default
+        elif field_type is str:
+            if multivalued:
+                assigned_attributes[schema_field_name] = [str(item) for item in data_value]
+            else:
+                assigned_attributes[schema_field_name] = str(data_value)
+        elif field_type is int:
+            assigned_attributes[schema_field_name] = int(float(data_value))
+        elif field_type is float:
+            assigned_attributes[schema_field_name] = float(data_value)
+        elif field_type is bool:
+            assigned_attributes[schema_field_name] = bool(data_value)
+        elif type(field_type) is type(Enum):
+            assigned_attributes[schema_field_name] = check_valueset_membership(field_type, data_value)
+        if assigned_attributes[schema_field_name] is None and required:
+            raise ValueError(f"Missing required field: {schema_field_name}")
+    return bican_class(**assigned_attributes)
+
+
+def generate_each(records, parents, generate):
+    # The per-record loop of SpecimenPortal before batch validation
+    objects = {}
+    for data in records:
+        try:
+            objects[data["id"]] = generate(data, parents)
+        except Exception as e:
+            print(f"Unexpected error generating object for '{data['id']}': {e}")
+    return objects
+
+
+def record_templates():
+    """
+    Returns a record per category that fills every field of a supported type, with the last member of every enum so
+    that a linear scan has to look at all members.
+    """
+    templates = {}
+    for category, bican_class in CATEGORY_TO_CLASS.items():
+        record = {}
+        for field in compile_mapping_plan(bican_class):
+            if field.convert is None or field.nimp_field in ("id", "was_derived_from"):
+                continue
+            multivalued, field_type = SpecimenPortal.get_field_type(
+                bican_class.model_fields[field.schema_field].annotation
+            )
+            if field_type is str:
+                record[field.nimp_field] = ["a", "b"] if multivalued else field.nimp_field
+            elif field_type in (int, float):
+                record[field.nimp_field] = "3"
+            elif field_type is bool:
+                record[field.nimp_field] = True
+            else:
+                record[field.nimp_field] = list(field_type)[-1].value
+        templates[category] = record
+    return templates
+
+
+def synthetic_records(number):
+    """
+    Returns number records that cycle through the categories of record_templates.
+    """
+    templates = list(record_templates().items())
+    return [
+        {"id": f"NH-{i}", "category": templates[i % len(templates)][0], "record": templates[i % len(templates)][1]}
+        for i in range(number)
+    ]
+
+
+@click.command()
+@click.option("--number", "-n", default=10000, help="Number of records converted per measurement.")
+@click.option("--repeat", "-r", default=9, help="Number of measurements; the best one is reported.")
+def bench_specimen_objects(number, repeat):
+    """
+    Reports the number of records converted to BICAN objects per second before and after the mapping plans, and
+    with batch validation.
+    """
+    records = synthetic_records(number)
+    parents = ["NH-parent"]
+    nodes = [(data["id"], data, parents) for data in records]
+    batch, errors = SpecimenPortal.generate_bican_objects(nodes)
+    assert not errors
+    for data in records[: len(CATEGORY_TO_CLASS)]:
+        before = generate_before(data, parents)
+        after = SpecimenPortal.generate_bican_object(data, parents)
+        assert before.model_dump() == after.model_dump() == batch[data["id"]].model_dump()
+    results = {}
+    for label, generate in (
+        ("before", lambda: generate_each(records, parents, generate_before)),
+        ("after", lambda: generate_each(records, parents, SpecimenPortal.generate_bican_object)),
+        ("batch", lambda: SpecimenPortal.generate_bican_objects(nodes)),
+    ):
+        # CPU time of the process, which is less noisy than wall time on shared machines
+        seconds = min(timeit.repeat(generate, number=1, repeat=repeat, timer=time.process_time))
+        results[label] = number / seconds
+        click.echo(f"{label:7} {results[label]:>12,.0f} records/s")
+    click.echo(f"speedup {results['after'] / results['before']:>12.2f}x (after)")
+    click.echo(f"speedup {results['batch'] / results['before']:>12.2f}x (batch)")
+
+
+if __name__ == "__main__":
+    bench_specimen_objects()
@@ -0,0 +1,116 @@
+"""
+Throughput benchmark for the specimen traversals against a local mock NIMP portal.
+
+Serves a synthetic specimen graph with bkbit.utils.mock_nimp_portal, with a fixed latency per response and
+optionally a share of failing requests, and parses it with every traversal strategy of SpecimenPortal:
+
+    top_down       the descendants of every donor, one donor after the other
+    bottom_up      the ancestors of every library pool, one pool after the other
+    bottom_up_threads  the same, with the pools parsed on a pool of threads that share one client
+    shared_graph   the ancestors of all library pools as one graph, fetching every record once
+
+For each strategy it reports the requests issued (including failed ones), requests per second, and the records
+written to the output per second end to end. The records fill every supported field, as in
+bench_specimen_objects.py.
+
+Usage:
+    ```
+    python benchmarks/bench_specimen_portal.py --donors 4 --fanout 3 --latency 0.02 --error_rate 0.01
+    ```
+"""
+
+import os
+
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+from bench_specimen_objects import record_templates
+from bkbit.data_translators.library_generation_translator import DEFAULT_CONCURRENCY, SpecimenPortal
+from bkbit.utils.mock_nimp_portal import MockNimpPortal, build_specimen_graph
+from bkbit.utils.nimp_api_endpoints import NimpClient
+
+STRATEGIES = ("top_down", "bottom_up", "bottom_up_threads", "shared_graph")
+
+
+def parse_each(client, nhash_ids, descendants, concurrency):
+    portals = []
+    for nhash_id in nhash_ids:
+        portal = SpecimenPortal("token", client=client, concurrency=concurrency)
+        if descendants:
+            portal.parse_nhash_id_top_down(nhash_id)
+        else:
+            portal.parse_nhash_id_bottom_up(nhash_id)
+        portals.append(portal)
+    return portals
+
+
+def run_strategy(strategy, client, donors, pools, concurrency, jobs):
+    """
+    Parses the graph with a strategy and returns the number of records written and of records that failed.
+    """
+    if strategy == "top_down":
+        portals = parse_each(client, donors, True, concurrency)
+    elif strategy == "bottom_up":
+        portals = parse_each(client, pools, False, concurrency)
+    elif strategy == "bottom_up_threads":
+        with ThreadPoolExecutor(jobs) as executor:
+            chunks = executor.map(lambda nhash_id: parse_each(client, [nhash_id], False, concurrency), pools)
+            portals = [portal for chunk in chunks for portal in chunk]
+    else:
+        portal = SpecimenPortal("token", client=client, concurrency=concurrency)
+        closures = portal.parse_nhash_ids(pools)
+        return sum(len(nodes) for nodes in closures.values()), len(portal.errors) + len(portal.retrieval_errors)
+    return (
+        sum(len(portal.generated_objects) for portal in portals),
+        sum(len(portal.errors) for portal in portals),
+    )
+
+
+@click.command()
+@click.option("--donors", default=4, help="Number of donors of the synthetic specimen graph.")
+@click.option("--fanout", default=3, help="Number of slabs per donor and of tissues per slab.")
+@click.option("--pool_size", default=2, help="Number of library aliquots per library pool.")
+@click.option("--latency", default=0.02, help="Delay of every response in seconds.")
+@click.option("--error_rate", default=0.0, help="Share of requests that fail with 503 and are retried.")
+@click.option("--concurrency", "-c", default=DEFAULT_CONCURRENCY, help="Records fetched at the same time per root.")
+@click.option("--jobs", "-j", default=8, help="Number of threads of the bottom_up_threads strategy.")
+@click.option("--backoff", default=0.01, help="Backoff factor of the retries in seconds.")
+@click.option(
+    "--strategy", "-s", "strategies", multiple=True, type=click.Choice(STRATEGIES), default=STRATEGIES,
+    help="Strategies to run; all of them by default.",
+)
+def bench_specimen_portal(donors, fanout, pool_size, latency, error_rate, concurrency, jobs, backoff, strategies):
+    """
+    Reports requests issued, requests per second and records per second of every traversal strategy.
+    """
+    templates = record_templates()
+    graph = build_specimen_graph(donors, fanout, pool_size, lambda category, nhash_id: templates[category])
+    donor_ids = [nhash_id for nhash_id, node in graph.items() if node["category"] == "Donor"]
+    pool_ids = [nhash_id for nhash_id, node in graph.items() if node["category"] == "Library Pool"]
+    click.echo(
+        f"{len(graph)} specimens, {len(donor_ids)} donors, {len(pool_ids)} library pools, "
+        f"latency {latency * 1000:g} ms, error rate {error_rate:g}"
+    )
+    click.echo(f"{'strategy':18} {'requests':>9} {'failed':>7} {'seconds':>8} {'requests/s':>11} {'records':>8} {'records/s':>10}")
+    with MockNimpPortal(graph, latency, error_rate, seed=0) as mock_portal:
+        for strategy in strategies:
+            client = NimpClient(
+                "token", base_url=mock_portal.base_url, backoff_factor=backoff, pool_size=max(16, jobs * concurrency)
+            )
+            mock_portal.reset_stats()
+            start = time.perf_counter()
+            records, errors = run_strategy(strategy, client, donor_ids, pool_ids, concurrency, jobs)
+            seconds = time.perf_counter() - start
+            client.close()
+            requests = sum(mock_portal.requests.values())
+            click.echo(
+                f"{strategy:18} {requests:>9} {mock_portal.failures:>7} {seconds:>8.2f} {requests / seconds:>11.1f} "
+                f"{records:>8} {records / seconds:>10.1f}"
+                + (f"  ({errors} records failed)" if errors else "")
+            )
+
+
+if __name__ == "__main__":
+    bench_specimen_portal()
@@ -4,7 +4,7 @@ from bkbit.model_converters.yaml2sheet_converter import yaml2cvs
 from bkbit.data_translators.library_generation_translator import specimen2jsonld
 from bkbit.data_translators.file_manifest_translator import filemanifest2jsonld
 from bkbit.data_translators.specimen_metadata_translator import list_library_aliquot
-from bkbit.data_translators.genome_annotation_translator import gff2jsonld
+from bkbit.data_translators.genome_annotation_translator import gff2jsonld, gff2jsonld_batch
 from bkbit.utils.get_ncbi_taxonomy import download_ncbi_taxonomy
 from bkbit.model_editors.linkml_trimmer import linkml_trimmer
 
@@ -20,6 +20,7 @@ cli.add_command(specimen2jsonld)
 cli.add_command(filemanifest2jsonld)
 cli.add_command(list_library_aliquot)
 cli.add_command(gff2jsonld)
+cli.add_command(gff2jsonld_batch)
 cli.add_command(download_ncbi_taxonomy)
 cli.add_command(linkml_trimmer)
 
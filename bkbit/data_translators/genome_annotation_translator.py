@@ -7,10 +7,28 @@ Module for downloading, parsing, and processing GFF3 files from NCBI and Ensembl
 4. Serialize the extracted information into JSON-LD format for further use.
 
 Classes:
+    GeneRecord: A lightweight record of the gene annotation fields of a GFF3 row, used to resolve duplicates before GeneAnnotation objects are created.
     Gff3: The Gff3 class is designed to handle the complete lifecycle of downloading, parsing, and processing GFF3 files from NCBI or Ensembl repositories. It extracts gene annotations and serializes the data into JSON-LD format.
 
 Functions:
+    parse_gff3_attributes: The parse_gff3_attributes function extracts the attributes needed for gene annotations from column 9 of a GFF3 feature row.
+    local_gff_path: The local_gff_path function returns the file path of a local path or file:// URL, or None for remote URLs.
+    hash_file: The hash_file function calculates several checksums of a local file in parallel.
+    map_blocks: The map_blocks function yields blocks of a memory-mapped local file without copying them.
+    decompress_blocks: The decompress_blocks function decompresses blocks of gzip data on the fly.
+    read_blocks: The read_blocks function reads a binary file object in blocks and decompresses gzip data on the fly.
+    split_lines: The split_lines function splits blocks of bytes into lines of text.
+    iter_gff_blocks: The iter_gff_blocks function yields the decompressed data of a local GFF3 file, updating a byte-based progress bar once per block.
+    iter_gff_lines: The iter_gff_lines function yields the lines of a local GFF3 file.
+    stream_gff_blocks: The stream_gff_blocks function downloads a GFF3 file and yields its decompressed data while the download is still running, updating the given hash objects with the raw bytes.
+    stream_gff_lines: The stream_gff_lines function yields the lines of a GFF3 file while it is being downloaded.
+    chunk_blocks: The chunk_blocks function regroups blocks of bytes into chunks that end at a line boundary.
+    init_parse_worker, parse_chunk: Worker process functions used by Gff3.parse to parse chunks of a GFF3 file in parallel.
+    load_ncbi_taxonomy: The load_ncbi_taxonomy function loads the NCBI taxonomy dictionaries used by Gff3. Gff3 objects get them from TAXONOMY_PROVIDER, which loads them once per process.
+    read_manifest: The read_manifest function reads the annotations listed in a gff2jsonld-batch manifest file.
+    translate_gff3: The translate_gff3 function translates a single GFF3 file to a JSON-LD file and returns the time spent on each step.
     gff2jsonld: The gff2jsonld function is responsible for creating GeneAnnotation objects from a provided GFF3 file and serializing the extracted information into the JSON-LD format.
+    gff2jsonld_batch: The gff2jsonld_batch function translates all GFF3 files listed in a manifest file concurrently, writing one JSON-LD file per annotation.
 
 Usage:
     The module can be run as a standalone script by executing it with appropriate arguments and options:
@@ -20,6 +38,8 @@ Usage:
     ```
     
     The script will download the GFF3 file from the specified URL, parse it, and serialize the extracted information into JSON-LD format.
+    The content URL may also be a local path or file:// URL of a mirror laid out like the NCBI or Ensembl FTP tree, in which case
+    the file is read in place.
 
 Example:
     ```
@@ -35,17 +55,31 @@ Dependencies:
     - urllib.request
     - urllib.parse
     - os
+    - mmap
+    - functools
+    - concurrent.futures.ThreadPoolExecutor
+    - concurrent.futures.as_completed
+    - time
     - json
     - datetime
-    - collections.defaultdict
-    - subprocess
-    - gzip
+    - zlib
+    - queue
+    - threading
+    - collections.deque
+    - multiprocessing
     - tqdm
     - click
     - pkg_resources
+    - pydantic.TypeAdapter
+    - pydantic.ValidationError
     - bkbit.models.genome_annotation as ga
     - bkbit.utils.setup_logger as setup_logger
-    - bkbit.utils.load_json as load_json    
+    - bkbit.utils.load_json as load_json
+    - bkbit.utils.jsonld_writer as jsonld_writer
+    - bkbit.utils.download_cache as download_cache
+    - bkbit.utils.taxonomy_store as taxonomy_store
+    - bkbit.utils.taxonomy_lineage as taxonomy_lineage
+    - bkbit.utils.scientific_name_index as scientific_name_index
 """
 
 import re
@@ -56,18 +90,31 @@ import urllib
 import urllib.request
 from urllib.parse import urlparse
 import os
+import mmap
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
 import json
 from datetime import datetime
-from collections import defaultdict
-import subprocess
-import gzip
+import zlib
+import queue
+import threading
 import sys
+from collections import deque
+import multiprocessing
 from tqdm import tqdm
 import click
 import pkg_resources
+from pydantic import TypeAdapter, ValidationError
 from bkbit.models import genome_annotation as ga
 from bkbit.utils.setup_logger import setup_logger
 from bkbit.utils.load_json import load_json
+from bkbit.utils.jsonld_writer import write_jsonld
+from bkbit.utils.download_cache import DownloadCache, DEFAULT_CACHE_DIR
+from bkbit.utils.taxonomy_store import TaxonomyStore
+from bkbit.utils.taxonomy_lineage import TaxonomyLineage
+from bkbit.utils.taxonomy_provider import TaxonomyProvider
+from bkbit.utils.scientific_name_index import ScientificNameIndex, SortedNameTable
 
 
 
@@ -84,6 +131,7 @@ ENSEMBL_GENE_ID_PREFIX = "ENSEMBL"
 TAXON_PREFIX = "NCBITaxon"
 ASSEMBLY_PREFIX = "NCBIAssembly"
 BICAN_ANNOTATION_PREFIX = "bican:annotation-"
+CONTEXT = "https://raw.githubusercontent.com/brain-bican/models/main/jsonld-context-autogen/genome_annotation.context.jsonld"
 GENOME_ANNOTATION_DESCRIPTION_FORMAT = (
     "{authority} {taxon_scientific_name} Annotation Release {genome_version}"
 )
@@ -92,32 +140,120 @@ DEFAULT_HASH = ("MD5",)
 LOG_FILE_NAME = (
     "gff3_translator_" + datetime.now().strftime("%Y-%m-%d_%H:%M:%S") + ".log"
 )
+PIPELINE_BLOCK_SIZE = 1024 * 1024  # 1 Megabyte
+PIPELINE_QUEUE_SIZE = 8  # number of decompressed blocks buffered between the download thread and the parser
+GZIP_WBITS = 16 + zlib.MAX_WBITS  # window bits that make zlib expect a gzip header and trailer
+PARSE_CHUNK_SIZE = 8 * 1024 * 1024  # 8 Megabytes of decompressed data per chunk in parallel parsing
+PARSE_WORKER_STATE = None  # (Gff3, feature_filter) of a worker process, set by init_parse_worker
+GENE_ANNOTATION_LIST_ADAPTER = TypeAdapter(list[ga.GeneAnnotation])
+# Column 9 keys read by generate_ncbi_gene_annotation and generate_ensembl_gene_annotation; all other attributes are skipped
+GFF3_ATTRIBUTE_KEYS = frozenset(
+    (
+        "Dbxref",
+        "Name",
+        "description",
+        "gene_biotype",
+        "biotype",
+        "gene_id",
+        "gene_synonym",
+    )
+)
+DESCRIPTION_SOURCE_PATTERN = re.compile(r"\s*\[Source.*?\]")
 TAXON_DIR_PATH = "../utils/ncbi_taxonomy/"
 SCIENTIFIC_NAME_TO_TAXONID_PATH = pkg_resources.resource_filename(__name__, TAXON_DIR_PATH + "scientific_name_to_taxid.json")
 TAXON_SCIENTIFIC_NAME_PATH = pkg_resources.resource_filename(__name__, TAXON_DIR_PATH + "taxid_to_scientific_name.json")
 TAXON_COMMON_NAME_PATH = pkg_resources.resource_filename(__name__, TAXON_DIR_PATH + "taxid_to_common_name.json")
+TAXONOMY_STORE_PATH = pkg_resources.resource_filename(__name__, TAXON_DIR_PATH + "taxonomy.sqlite")
+TAXONOMY_LINEAGE_PATH = pkg_resources.resource_filename(__name__, TAXON_DIR_PATH + "taxonomy_lineage.npz")
+
+class GeneRecord:
+    """
+    A lightweight record of the gene annotation fields extracted from a GFF3 feature row.
+
+    Duplicates are resolved on records, and only the surviving records are turned into validated
+    ga.GeneAnnotation objects. Records compare and hash like the GeneAnnotation objects they produce
+    within a single Gff3 object.
+
+    Attributes:
+        id (str): The CURIE of the gene, e.g. "NCBIGene:1".
+        source_id (str): The authority specific identifier of the gene.
+        name (str or None): The name (and symbol) of the gene.
+        description (str or None): The description of the gene.
+        molecular_type (str or None): The biotype of the gene.
+        synonym (tuple[str] or None): The sorted synonyms of the gene, or None if the authority does not provide them.
+    """
+
+    __slots__ = ("id", "source_id", "name", "description", "molecular_type", "synonym")
+
+    def __init__(self, id, source_id, name, description, molecular_type, synonym=None):
+        self.id = id
+        self.source_id = source_id
+        self.name = name
+        self.description = description
+        self.molecular_type = molecular_type
+        self.synonym = synonym
+
+    def __fields(self):
+        return (
+            self.id,
+            self.source_id,
+            self.name,
+            self.description,
+            self.molecular_type,
+            self.synonym,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, GeneRecord):
+            return NotImplemented
+        return self.__fields() == other.__fields()
+
+    def __hash__(self):
+        # Same fields as GeneAnnotation.__hash__
+        return hash(tuple([self.id, self.name, self.molecular_type, self.description]))
+
+    def __reduce__(self):
+        return (GeneRecord, self.__fields())
+
+    def __repr__(self):
+        return "GeneRecord(" + ", ".join(
+            f"{name}={value!r}" for name, value in zip(self.__slots__, self.__fields())
+        ) + ")"
+
 
 class Gff3:
     """
     The Gff3 class is responsible for downloading, parsing, and processing of GFF3 files from NCBI and Ensembl repositories.
 
     Attributes:
-        content_url (str): The URL of the GFF file.
+        content_url (str): The URL of the GFF file, or a local path or file:// URL laid out like the NCBI or Ensembl FTP tree.
         assembly_accession (str): The ID of the genome assembly.
         assembly_strain (str, optional): The strain of the genome assembly. Defaults to None.
         log_level (str): The logging level. Defaults to 'WARNING'.
         log_to_file (bool): Flag to log messages to a file. Defaults to False.
+        pipelined (bool): Flag to download and parse the GFF file in a single pass. Defaults to False.
+        taxonomy (dict, optional): The NCBI taxonomy mappings returned by load_ncbi_taxonomy. Defaults to None, which uses the process-wide TAXONOMY_PROVIDER.
+        taxon_id (str, optional): The NCBI taxon ID of the organism of an Ensembl GFF3 file. Defaults to None, which looks it up by the species name in the URL.
+        show_progress (bool): Flag to display progress bars. Defaults to True.
+        cache_dir (str, optional): The directory of the download cache. Defaults to None, which disables the cache.
+        offline (bool): Flag to only use the download cache and never access the network. Defaults to False.
 
     Methods:
-        __init__(content_url, assembly_accession=None, assembly_strain=None, log_level="WARNING", log_to_file=False):
+        __init__(content_url, assembly_accession=None, assembly_strain=None, log_level="WARNING", log_to_file=False, pipelined=False, show_progress=True, cache_dir=None, offline=False, taxonomy=None, taxon_id=None):
             Initializes the Gff3 class with the provided parameters.
 
+        resolve_scientific_name(scientific_name):
+            Returns the taxon ID of a scientific name, ignoring case and separators, or reports candidate names.
+
         parse_url():
             Parses the content URL and extracts information about the genome annotation.
 
         __download_gff_file():
             Downloads a GFF file from a given URL and calculates the MD5, SHA256, and SHA1 hashes.
 
+        __fetch_cached_gff_file(cache):
+            Returns the GFF file and its MD5, SHA256, and SHA1 hashes from the download cache, downloading it on a miss.
+
         generate_organism_taxon(taxon_id):
             Generates an organism taxon object based on the provided taxon ID.
 
@@ -133,28 +269,49 @@ class Gff3:
         generate_digest(hash_values, hash_functions=DEFAULT_HASH):
             Generates checksum digests for the GFF file using the specified hash functions.
 
-        __get_line_count(file_path):
-            Returns the line count of a file.
+        __new_progress_bar(desc):
+            Creates a byte-based progress bar, or None if progress reporting is disabled.
 
-        parse(feature_filter=DEFAULT_FEATURE_FILTER):
+        parse(feature_filter=DEFAULT_FEATURE_FILTER, workers=1, batch_validate=False):
             Parses the GFF file and extracts gene annotations based on the provided feature filter.
 
+        __parse_chunks(chunks, feature_filter, workers):
+            Parses chunks of the GFF file in a pool of worker processes and merges the results in file order.
+
+        __materialize_gene_annotations(batch_validate=False):
+            Turns the deduplicated gene records into validated GeneAnnotation objects, skipping invalid ones.
+
+        __log_invalid_gene_annotation(gene_id, errors):
+            Logs the validation errors of a gene record that is skipped.
+
+        __gene_annotation_fields(gene_record):
+            Returns the keyword arguments of the GeneAnnotation object for a gene record.
+
+        generate_gene_records(lines, feature_filter, first_line_num=1):
+            Generates gene records for the feature rows of the given GFF3 lines.
+
         generate_ensembl_gene_annotation(attributes, curr_line_num):
             Generates a GeneAnnotation object for Ensembl based on the provided attributes.
 
+        generate_ensembl_gene_record(attributes, curr_line_num):
+            Generates a GeneRecord object for Ensembl based on the provided attributes.
+
         generate_ncbi_gene_annotation(attributes, curr_line_num):
             Generates a GeneAnnotation object for NCBI based on the provided attributes.
 
+        generate_ncbi_gene_record(attributes, curr_line_num):
+            Generates a GeneRecord object for NCBI based on the provided attributes.
+
         __get_attribute(attributes, attribute_name, curr_line_num):
             Retrieves the value of a specific attribute from the given attributes dictionary.
 
+        __add_gene_record(gene_record, curr_line_num):
+            Adds a generated gene record, resolving duplicates against earlier rows.
+
         __resolve_ncbi_gene_annotation(new_gene_annotation, curr_line_num):
             Resolves conflicts between existing and new gene annotations based on certain conditions.
 
-        __merge_values(t):
-            Merges values from a list of lists into a dictionary of sets.
-
-        serialize_to_jsonld(exclude_none=True, exclude_unset=False):
+        serialize_to_jsonld(exclude_none=True, exclude_unset=False, output=None, compact=False, compress=False):
             Serializes the object and either writes it to the specified output file or prints it to the CLI.
     """
 
@@ -165,25 +322,44 @@ class Gff3:
         assembly_strain=None,
         log_level="WARNING",
         log_to_file=False,
+        pipelined=False,
+        show_progress=True,
+        cache_dir=None,
+        offline=False,
+        taxonomy=None,
+        taxon_id=None,
     ):
         """
         Initializes an instance of the GFFTranslator class.
 
         Parameters:
-        - content_url (str): The URL of the GFF file.
+        - content_url (str): The URL of the GFF file, or a local path or file:// URL laid out like the NCBI or Ensembl FTP tree. Local files are read in place; pipelined and cache_dir are ignored for them.
         - assembly_id (str): The ID of the genome assembly.
         - assembly_strain (str, optional): The strain of the genome assembly. Defaults to None.
         - hash_functions (tuple[str]): A tuple of hash functions to use for generating checksums. Defaults to ('MD5').
+        - pipelined (bool, optional): If True, the GFF file is not downloaded up front; parse() downloads, hashes and parses it in a single pass. Defaults to False.
+        - show_progress (bool, optional): If False, no progress bars are displayed or updated. Defaults to True.
+        - cache_dir (str, optional): The directory of the download cache. If given, the GFF file is only downloaded when it is not cached or has changed, and the cached checksums are reused. Cached files are parsed in place, so pipelined is ignored. Defaults to None.
+        - offline (bool, optional): If True, the GFF file must already be in the download cache and no network request is made. Implies the default cache directory if cache_dir is None. Defaults to False.
+        - taxonomy (dict, optional): The NCBI taxonomy mappings returned by load_ncbi_taxonomy. Defaults to None, which uses the mappings of TAXONOMY_PROVIDER that are loaded once per process and shared by all instances.
+        - taxon_id (str, optional): The NCBI taxon ID of the organism of an Ensembl GFF3 file, e.g. for strains that are not NCBI taxa. Defaults to None, which resolves the species name in the URL.
         """
         self.logger = setup_logger(LOG_FILE_NAME, log_level, log_to_file)
+        self.log_level = log_level
+        self.log_to_file = log_to_file
+        self.show_progress = show_progress
         try:
-            self.scientific_name_to_taxonid = load_json(SCIENTIFIC_NAME_TO_TAXONID_PATH)
-            self.taxon_scientific_name = load_json(TAXON_SCIENTIFIC_NAME_PATH)
-            self.taxon_common_name = load_json(TAXON_COMMON_NAME_PATH)
+            if taxonomy is None:
+                taxonomy = TAXONOMY_PROVIDER.get()
         except FileNotFoundError as e:
             self.logger.critical("NCBI Taxonomy not downloaded. Run 'bkbit download-ncbi-taxonomy' command first." )
             print(e)
             sys.exit(2)
+        self.scientific_name_to_taxonid = taxonomy["scientific_name_to_taxonid"]
+        self.taxon_scientific_name = taxonomy["taxon_scientific_name"]
+        self.taxon_common_name = taxonomy["taxon_common_name"]
+        self.taxon_lineage = taxonomy.get("lineage")
+        self.scientific_name_index = taxonomy.get("name_index")
 
         self.content_url = content_url
 
@@ -200,13 +376,12 @@ class Gff3:
 
         # Define variables to store metadata
         (
-            taxon_id,
             assembly_id,
             assembly_version,
             assembly_label,
             genome_label,
             genome_version,
-        ) = (None, None, None, None, None, None)
+        ) = (None, None, None, None, None)
 
         # Assign the authority type
         self.authority = url_metadata.get("authority")
@@ -216,9 +391,13 @@ class Gff3:
             taxon_id = url_metadata.get("taxonid")
             assembly_id = url_metadata.get("assembly_accession")
         elif self.authority.value == ga.AuthorityType.ENSEMBL.value:
-            taxon_id = self.scientific_name_to_taxonid.get(
-                url_metadata.get("scientific_name").replace("_", " ")
-            )
+            if taxon_id is None:
+                taxon_id = self.resolve_scientific_name(
+                    url_metadata.get("scientific_name").replace("_", " ")
+                )
+            elif taxon_id not in self.taxon_scientific_name:
+                self.logger.critical("Taxon ID %s is not in the NCBI taxonomy.", taxon_id)
+                raise ValueError(f"Taxon ID {taxon_id} is not in the NCBI taxonomy.")
             if assembly_accession is None:
                 self.logger.critical(
                     "The assembly ID is required for Ensembl URLs. Please provide the assembly ID."
@@ -237,8 +416,27 @@ class Gff3:
         genome_label = self.authority.value + "-" + taxon_id + "-" + genome_version
 
         ## STEP 2: Download the GFF file
-        # Download the GFF file
-        self.gff_file, hash_values = self.__download_gff_file()
+        if offline and cache_dir is None:
+            cache_dir = DEFAULT_CACHE_DIR
+        local_file = local_gff_path(content_url)
+        if local_file is not None:
+            # Local files are parsed in place, there is nothing to download or cache
+            if not os.path.isfile(local_file):
+                self.logger.critical("File %s does not exist.", local_file)
+                raise FileNotFoundError(f"File {local_file} does not exist.")
+            pipelined = False
+            self.gff_file, hash_values = local_file, hash_file(local_file)
+        elif cache_dir is not None:
+            # Cached files are parsed in place and come with their checksums, so there is nothing to pipeline
+            pipelined = False
+            self.gff_file, hash_values = self.__fetch_cached_gff_file(
+                DownloadCache(cache_dir, offline)
+            )
+        else:
+            # In pipelined mode the file is downloaded by parse(), which also generates the checksums
+            self.gff_file, hash_values = (
+                (None, None) if pipelined else self.__download_gff_file()
+            )
 
         ## STEP 3: Generate the organism taxon, genome assembly, checksums, and genome annotation objects
         # Generate the organism taxon object
@@ -246,13 +444,81 @@ class Gff3:
         self.genome_assembly = self.generate_genome_assembly(
             assembly_id, assembly_version, assembly_label, assembly_strain
         )
-        self.checksums = self.generate_digest(hash_values, DEFAULT_HASH)
+        self.checksums = (
+            [] if pipelined else self.generate_digest(hash_values, DEFAULT_HASH)
+        )
         self.genome_annotation = self.generate_genome_annotation(
             genome_label, genome_version
         )
 
+        self.gene_records = {}
         self.gene_annotations = {}
 
+    def resolve_scientific_name(self, scientific_name):
+        """
+        Returns the taxon ID of a scientific name. Names that are not NCBI scientific names are looked up again
+        ignoring case and separators. If that fails too, candidate names are logged and reported in the error.
+
+        Args:
+            scientific_name (str): The scientific name, e.g. "Mus musculus casteij".
+
+        Returns:
+            str: The taxon ID.
+
+        Raises:
+            ValueError: If the name is not in the NCBI taxonomy.
+        """
+        taxon_id = self.scientific_name_to_taxonid.get(scientific_name)
+        if taxon_id is not None:
+            return taxon_id
+        if self.scientific_name_index is None:
+            self.scientific_name_index = ScientificNameIndex(
+                SortedNameTable(self.scientific_name_to_taxonid)
+            )
+        taxon_id = self.scientific_name_index.get(scientific_name)
+        if taxon_id is not None:
+            self.logger.warning(
+                "Resolved '%s' to the NCBI scientific name '%s' (taxon ID %s).",
+                scientific_name,
+                self.taxon_scientific_name.get(taxon_id),
+                taxon_id,
+            )
+            return taxon_id
+
+        candidates = "; ".join(
+            f"{self.taxon_scientific_name.get(candidate.taxid, candidate.name)} "
+            f"({candidate.taxid}, {candidate.match})"
+            for candidate in self.scientific_name_index.candidates(scientific_name)
+        )
+        message = (
+            f"'{scientific_name}' is not an NCBI scientific name. "
+            + (f"Candidates: {candidates}. " if candidates else "No candidates were found. ")
+            + "Provide the taxon ID of the organism (--taxon_id)."
+        )
+        self.logger.critical(message)
+        raise ValueError(message)
+
+    def __getstate__(self):
+        """
+        Returns the state that is pickled when the object is sent to a worker process. The taxonomy dictionaries
+        and gene annotations are left out because the workers do not need them.
+
+        Returns:
+            dict: The picklable state of the object.
+        """
+        state = self.__dict__.copy()
+        for name in (
+            "scientific_name_to_taxonid",
+            "taxon_scientific_name",
+            "taxon_common_name",
+            "taxon_lineage",
+            "scientific_name_index",
+        ):
+            state.pop(name, None)
+        state["gene_records"] = {}
+        state["gene_annotations"] = {}
+        return state
+
     def parse_url(self):
         """
         Parses the content URL and extracts information about the genome annotation.
@@ -269,17 +535,23 @@ class Gff3:
         # Define regex patterns for NCBI and Ensembl URLs
         # NCBI : [assembly accession.version]_[assembly name]_[content type].[optional format]
         # ENSEMBL :  <species>.<assembly>.<_version>.gff3.gz -> organism full name, assembly name, genome version
-        ncbi_pattern = r"/genomes/all/annotation_releases/(\d+)(?:/(\d+))?/(GCF_\d+\.\d+)[_-]([^/]+)/(GCF_\d+\.\d+)[_-]([^/]+)_genomic\.gff\.gz"
+        ncbi_pattern = r"/genomes/all/annotation_releases/(\d+)(?:/(\d+))?/(GCF_\d+\.\d+)[_-]([^/]+)/(GCF_\d+\.\d+)[_-]([^/]+)_genomic\.gff(?:\.gz)?"
         ensembl_pattern = (
-            r"/pub/release-(\d+)/gff3/([^/]+)/([^/.]+)\.([^/.]+)\.([^/.]+)\.gff3\.gz"
+            r"/pub/release-(\d+)/gff3/([^/]+)/([^/.]+)\.([^/.]+)\.([^/.]+)\.gff3(?:\.gz)?"
         )
 
         # Parse the URL to get the path
         parsed_url = urlparse(self.content_url)
         path = parsed_url.path
 
+        # Local mirrors have no host name, so the layout of the path alone decides the authority
+        local_file = local_gff_path(self.content_url)
+        is_local = local_file is not None
+        if is_local:
+            path = local_file.replace(os.sep, "/")
+
         # Determine if the URL is from NCBI or Ensembl and extract information
-        if "ncbi" in parsed_url.netloc:
+        if is_local or "ncbi" in parsed_url.netloc:
             ncbi_match = re.search(ncbi_pattern, path)
             if ncbi_match:
                 return {
@@ -294,7 +566,7 @@ class Gff3:
                     "assembly_name": ncbi_match.group(6),
                 }
 
-        elif "ensembl" in parsed_url.netloc:
+        if is_local or "ensembl" in parsed_url.netloc:
             ensembl_match = re.search(ensembl_pattern, path)
             if ensembl_match:
                 return {
@@ -334,6 +606,7 @@ class Gff3:
                 unit="iB",
                 unit_scale=True,
                 desc="Downloading GFF file",
+                disable=not self.show_progress,
             )
 
             # Read the file in chunks, write to the temporary file, and update the hash
@@ -356,9 +629,34 @@ class Gff3:
             "SHA1": sha1_hash.hexdigest(),
         }
 
+    def __fetch_cached_gff_file(self, cache):
+        """
+        Returns the GFF file and its MD5, SHA256, and SHA1 hashes from the download cache. The file is only
+        downloaded if it is not cached yet or if the server reports that it changed.
+
+        Args:
+            cache (DownloadCache): The download cache.
+
+        Returns:
+            tuple: A tuple containing the path to the cached gzip file and a dictionary
+            with the MD5, SHA256, and SHA1 hashes of the file.
+        """
+        progress_bar = self.__new_progress_bar("Downloading GFF file")
+        try:
+            gff_file, hash_values = cache.fetch(self.content_url, progress_bar)
+        except FileNotFoundError as e:
+            self.logger.critical(e)
+            raise
+        finally:
+            if progress_bar is not None:
+                progress_bar.close()
+        self.logger.info("Using GFF file %s from the download cache.", gff_file)
+        return gff_file, hash_values
+
     def generate_organism_taxon(self, taxon_id: str):
         """
         Generates an organism taxon object based on the provided taxon ID.
+        If the taxonomy lineage index is available, the taxonomic rank of the taxon is filled in from it.
 
         Args:
             taxon_id (str): The taxon ID of the organism.
@@ -366,11 +664,15 @@ class Gff3:
         Returns:
             ga.OrganismTaxon: The generated organism taxon object.
         """
+        rank = None
+        if self.taxon_lineage is not None:
+            rank = self.taxon_lineage.get_rank(int(taxon_id)) or None
         return ga.OrganismTaxon(
             id=TAXON_PREFIX + ":" + taxon_id,
             full_name=self.taxon_scientific_name[taxon_id],
             name=self.taxon_common_name[taxon_id],
             iri=PREFIX_MAP[TAXON_PREFIX] + taxon_id,
+            has_taxonomic_rank=rank,
         )
 
     def assign_authority_type(self, authority: str):
@@ -510,32 +812,40 @@ class Gff3:
                 )
         return checksums
 
-    def __get_line_count(self, file_path):
+    def __new_progress_bar(self, desc):
         """
-        Get the line count of a file.
+        Create a progress bar that tracks the number of bytes read, or None if progress reporting is disabled.
 
         Args:
-            file_path (str): The path to the file.
+            desc (str): The description shown next to the progress bar.
 
         Returns:
-            int: The number of lines in the file.
+            tqdm or None: The progress bar.
         """
+        if not self.show_progress:
+            return None
+        return tqdm(unit="B", unit_scale=True, desc=desc)
 
-        result = subprocess.run(
-            ["wc", "-l", file_path], stdout=subprocess.PIPE, check=True
-        )  # If check is True and the exit code was non-zero, it raises a CalledProcessError.
-        # The CalledProcessError object will have the return code in the returncode attribute,
-        # and output & stderr attributes if those streams were captured.
-        output = result.stdout.decode().strip()
-        line_count = int(output.split()[0])  # Extract the line count from the output
-        return line_count
-
-    def parse(self, feature_filter: tuple[str] = DEFAULT_FEATURE_FILTER):
+    def parse(
+        self,
+        feature_filter: tuple[str] = DEFAULT_FEATURE_FILTER,
+        workers: int = 1,
+        batch_validate: bool = False,
+    ):
         """
         Parses the GFF file and extracts gene annotations based on the provided feature filter.
+        Compressed files are decompressed as a stream, so no decompressed copy is held in memory or written to disk.
+        If the instance was created in pipelined mode, the GFF file is downloaded and parsed in a single pass.
+
+        Rows are first collected as lightweight GeneRecord objects and deduplicated; only the surviving records are
+        turned into validated GeneAnnotation objects once the whole file has been parsed.
 
         Args:
             feature_filter (tuple[str]): Tuple of feature types to include in the gene annotations.
+            workers (int, optional): The number of worker processes that parse the file in chunks. Defaults to 1,
+                which parses the file in the current process.
+            batch_validate (bool, optional): If True, the surviving gene annotations are validated in one batched
+                pass instead of one by one. Defaults to False.
 
         Raises:
             FileNotFoundError: If the GFF file does not exist.
@@ -543,68 +853,230 @@ class Gff3:
         Returns:
             None
         """
-        gff_file = self.gff_file
-        if self.gff_file.endswith(".gz"):
-            # Decompress the gzip file
-            with gzip.open(self.gff_file, "rb") as f_in:
-                # Create a temporary file to save the decompressed data
-                with tempfile.NamedTemporaryFile(delete=False) as f_out:
-                    # Copy the decompressed data to the temporary file
-                    f_out.write(f_in.read())
-                    gff_file = f_out.name
-
-        if not os.path.isfile(gff_file):
-            raise FileNotFoundError(f"File {gff_file} does not exist.")
-
-        with open(gff_file, "r", encoding="utf-8") as file:
-            curr_line_num = 1
-            progress_bar = tqdm(
-                total=self.__get_line_count(gff_file), desc="Parsing GFF3 File"
-            )
-            for line_raw in file:
-                line_strip = line_raw.strip()
-                if curr_line_num == 1 and not line_strip.startswith("##gff-version 3"):
+        hashers = None
+        if self.gff_file is None:
+            hashers = {
+                "MD5": hashlib.md5(),
+                "SHA256": hashlib.sha256(),
+                "SHA1": hashlib.sha1(),
+            }
+        elif not os.path.isfile(self.gff_file):
+            raise FileNotFoundError(f"File {self.gff_file} does not exist.")
+
+        progress_bar = self.__new_progress_bar(
+            "Parsing GFF3 File" if hashers is None else "Downloading and parsing GFF3 File"
+        )
+        try:
+            # The block and chunk sizes are read at call time, so they can be changed after import
+            if hashers is None:
+                blocks = iter_gff_blocks(self.gff_file, progress_bar, PIPELINE_BLOCK_SIZE)
+            else:
+                blocks = stream_gff_blocks(
+                    self.content_url, hashers, PIPELINE_BLOCK_SIZE, progress_bar=progress_bar
+                )
+            if workers > 1:
+                self.__parse_chunks(
+                    chunk_blocks(blocks, PARSE_CHUNK_SIZE), feature_filter, workers
+                )
+            else:
+                for curr_line_num, gene_record in self.generate_gene_records(
+                    split_lines(blocks), feature_filter
+                ):
+                    self.__add_gene_record(gene_record, curr_line_num)
+        finally:
+            if progress_bar is not None:
+                progress_bar.close()
+        self.__materialize_gene_annotations(batch_validate)
+
+        if hashers is not None:
+            # In pipelined mode the checksums are only known once the whole file has been downloaded
+            hash_values = {name: hasher.hexdigest() for name, hasher in hashers.items()}
+            self.checksums = self.generate_digest(hash_values, DEFAULT_HASH)
+            self.genome_annotation.digest = [
+                checksum.id for checksum in self.checksums
+            ]
+
+    def __parse_chunks(self, chunks, feature_filter, workers):
+        """
+        Parses chunks of the GFF file in a pool of worker processes and merges the results in file order.
+
+        The workers only generate gene records; duplicates are resolved in this process in the same order as
+        a serial parse, so the result is identical to parsing with a single process. At most 2 * workers chunks
+        are in flight at a time, which bounds memory use. The workers are started with forkserver (or spawn)
+        rather than fork, because parse() may run on a thread of gff2jsonld_batch or next to the download thread of
+        pipelined mode, and a forked child can inherit locks held by other threads. Such workers do not inherit the
+        logging configuration, so every worker sets up logging to the same destination and level as this process.
+
+        Args:
+            chunks (Iterable[bytes]): Consecutive chunks of the decompressed GFF file, each ending at a line boundary.
+            feature_filter (tuple[str]): Tuple of feature types to include in the gene annotations.
+            workers (int): The number of worker processes.
+
+        Returns:
+            None
+        """
+        pending = deque()
+        first_line_num = 1
+        start_method = (
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        with multiprocessing.get_context(start_method).Pool(
+            workers,
+            initializer=init_parse_worker,
+            initargs=(self, feature_filter, LOG_FILE_NAME, self.log_level, self.log_to_file),
+        ) as pool:
+            for chunk in chunks:
+                pending.append(pool.apply_async(parse_chunk, (chunk, first_line_num)))
+                first_line_num += chunk.count(b"\n")
+                if len(pending) >= 2 * workers:
+                    for curr_line_num, gene_record in pending.popleft().get():
+                        self.__add_gene_record(gene_record, curr_line_num)
+            while pending:
+                for curr_line_num, gene_record in pending.popleft().get():
+                    self.__add_gene_record(gene_record, curr_line_num)
+
+    def __materialize_gene_annotations(self, batch_validate=False):
+        """
+        Turns the deduplicated gene records into validated GeneAnnotation objects and stores them in
+        self.gene_annotations, keyed like the gene records. Gene records that fail validation are logged and
+        skipped, whether they are validated one by one or in a batch.
+
+        Args:
+            batch_validate (bool, optional): If True, all gene annotations are validated in one batched pass.
+                Defaults to False.
+
+        Returns:
+            None
+        """
+        keys = list(self.gene_records.keys())
+        fields = [
+            self.__gene_annotation_fields(gene_record)
+            for gene_record in self.gene_records.values()
+        ]
+        if batch_validate:
+            try:
+                gene_annotations = GENE_ANNOTATION_LIST_ADAPTER.validate_python(fields)
+            except ValidationError as e:
+                # The first element of the location of every error is the index of the invalid gene record
+                invalid = {}
+                for error in e.errors():
+                    invalid.setdefault(error["loc"][0], []).append(error)
+                for index, errors in invalid.items():
+                    self.__log_invalid_gene_annotation(fields[index]["id"], errors)
+                keys = [key for index, key in enumerate(keys) if index not in invalid]
+                fields = [f for index, f in enumerate(fields) if index not in invalid]
+                gene_annotations = GENE_ANNOTATION_LIST_ADAPTER.validate_python(fields)
+        else:
+            gene_annotations = []
+            for index, f in enumerate(fields):
+                try:
+                    gene_annotations.append(ga.GeneAnnotation(**f))
+                except ValidationError as e:
+                    self.__log_invalid_gene_annotation(f["id"], e.errors())
+                    keys[index] = None
+            keys = [key for key in keys if key is not None]
+
+        if self.genome_annotation.authority == ga.AuthorityType.ENSEMBL:
+            self.gene_annotations = {
+                gene_annotation: gene_annotation for gene_annotation in gene_annotations
+            }
+        else:
+            self.gene_annotations = dict(zip(keys, gene_annotations))
+
+    def __log_invalid_gene_annotation(self, gene_id, errors):
+        """
+        Logs the validation errors of a gene record that is skipped.
+
+        Args:
+            gene_id (str): The id of the gene record.
+            errors (list[dict]): The pydantic errors of the gene record, with or without its index in the batch.
+
+        Returns:
+            None
+        """
+        details = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'] if not isinstance(part, int))}: {error['msg']}"
+            for error in errors
+        )
+        self.logger.error(
+            "Gene %s: No GeneAnnotation object created due to invalid fields: %s",
+            gene_id,
+            details,
+        )
+
+    def __gene_annotation_fields(self, gene_record):
+        """
+        Returns the keyword arguments of the GeneAnnotation object for the given gene record.
+
+        Args:
+            gene_record (GeneRecord): The gene record.
+
+        Returns:
+            dict: The fields of the GeneAnnotation object.
+        """
+        fields = {
+            "id": gene_record.id,
+            "source_id": gene_record.source_id,
+            "symbol": gene_record.name,
+            "name": gene_record.name,
+            "description": gene_record.description,
+            "molecular_type": gene_record.molecular_type,
+            "referenced_in": self.genome_annotation.id,
+            "in_taxon": [self.organism_taxon.id],
+            "in_taxon_label": self.organism_taxon.full_name,
+        }
+        if gene_record.synonym is not None:
+            fields["synonym"] = list(gene_record.synonym)
+        return fields
+
+    def generate_gene_records(self, lines, feature_filter, first_line_num=1):
+        """
+        Generates gene records for the feature rows of the given GFF3 lines. Duplicates are not resolved.
+
+        Args:
+            lines (Iterable[str]): Consecutive lines of the GFF3 file.
+            feature_filter (tuple[str]): Tuple of feature types to include in the gene annotations.
+            first_line_num (int, optional): The line number of the first line in the input file. Defaults to 1.
+
+        Yields:
+            tuple: The line number and the generated GeneRecord object of each feature row.
+        """
+        for curr_line_num, line_raw in enumerate(lines, first_line_num):
+            line_strip = line_raw.strip()
+            if curr_line_num == 1 and not line_strip.startswith("##gff-version 3"):
+                self.logger.warning(
+                    '"##gff-version 3" missing from the first line of the file. The given file may not be a valid GFF3 file.'
+                )
+            elif len(line_strip) == 0:  # blank line
+                continue
+            elif line_strip.startswith("##"):  # TODO: parse more metadata
+                pass
+            elif line_strip.startswith("#"):  # TODO: parse more metadata
+                pass
+            else:  # line may be a feature or unknown
+                tokens = line_raw.split("\t")
+                if len(tokens) != 9:
                     self.logger.warning(
-                        '"##gff-version 3" missing from the first line of the file. The given file may not be a valid GFF3 file.'
+                        "Line %s: Features are expected 9 columns, found %s.",
+                        curr_line_num,
+                        len(tokens),
                     )
-                elif len(line_strip) == 0:  # blank line
-                    continue
-                elif line_strip.startswith("##"):  # TODO: parse more metadata
-                    pass
-                elif line_strip.startswith("#"):  # TODO: parse more metadata
-                    pass
-                else:  # line may be a feature or unknown
-                    tokens = list(map(str.strip, line_raw.split("\t")))
-                    if len(tokens) != 9:
-                        self.logger.warning(
-                            "Line %s: Features are expected 9 columns, found %s.",
-                            curr_line_num,
-                            len(tokens),
+                if (
+                    tokens[2].strip() in feature_filter
+                ):  # only look at rows that have a type that is included in feature_filter
+                    attributes = parse_gff3_attributes(tokens[8])
+                    # TODO: Write cleaner code that calls respective generate function based on the authority automatically
+                    gene_record = None
+                    if self.genome_annotation.authority == ga.AuthorityType.ENSEMBL:
+                        gene_record = self.generate_ensembl_gene_record(
+                            attributes, curr_line_num
                         )
-                    if (
-                        tokens[2] in feature_filter
-                    ):  # only look at rows that have a type that is included in feature_filter
-                        attributes = self.__merge_values(
-                            tuple(a.split("=") for a in tokens[8].split(";"))
+                    elif self.genome_annotation.authority == ga.AuthorityType.NCBI:
+                        gene_record = self.generate_ncbi_gene_record(
+                            attributes, curr_line_num
                         )
-                        # TODO: Write cleaner code that calls respective generate function based on the authority automatically
-                        if self.genome_annotation.authority == ga.AuthorityType.ENSEMBL:
-                            gene_annotation = self.generate_ensembl_gene_annotation(
-                                attributes, curr_line_num
-                            )
-                            if gene_annotation is not None:
-                                self.gene_annotations[gene_annotation] = gene_annotation
-                        elif self.genome_annotation.authority == ga.AuthorityType.NCBI:
-                            gene_annotation = self.generate_ncbi_gene_annotation(
-                                attributes, curr_line_num
-                            )
-                            if gene_annotation is not None:
-                                self.gene_annotations[gene_annotation.id] = (
-                                    gene_annotation
-                                )
-                progress_bar.update(1)
-                curr_line_num += 1
-            progress_bar.close()
+                    if gene_record is not None:
+                        yield curr_line_num, gene_record
 
     def generate_ensembl_gene_annotation(self, attributes, curr_line_num):
         """
@@ -615,8 +1087,28 @@ class Gff3:
             curr_line_num (int): The line number of the current row in the input file.
 
         Returns:
-            GeneAnnotation or None: The generated GeneAnnotation object if it is not a duplicate,
-            otherwise None.
+            GeneAnnotation: The generated GeneAnnotation object.
+
+        Raises:
+            None
+
+        """
+        return ga.GeneAnnotation(
+            **self.__gene_annotation_fields(
+                self.generate_ensembl_gene_record(attributes, curr_line_num)
+            )
+        )
+
+    def generate_ensembl_gene_record(self, attributes, curr_line_num):
+        """
+        Generates a GeneRecord object for Ensembl based on the provided attributes.
+
+        Args:
+            attributes (dict): A dictionary containing the attributes of the gene.
+            curr_line_num (int): The line number of the current row in the input file.
+
+        Returns:
+            GeneRecord: The generated GeneRecord object. Duplicates are handled by __add_gene_record.
 
         Raises:
             None
@@ -635,21 +1127,13 @@ class Gff3:
         # Check and validate the biotype attribute
         biotype = self.__get_attribute(attributes, "biotype", curr_line_num)
 
-        gene_annotation = ga.GeneAnnotation(
+        return GeneRecord(
             id=ENSEMBL_GENE_ID_PREFIX + ":" + stable_id,
             source_id=stable_id,
-            symbol=name,
             name=name,
             description=description,
             molecular_type=biotype,
-            referenced_in=self.genome_annotation.id,
-            in_taxon=[self.organism_taxon.id],
-            in_taxon_label=self.organism_taxon.full_name,
         )
-        # handle duplicates
-        if gene_annotation not in self.gene_annotations:
-            return gene_annotation
-        return None
 
     def generate_ncbi_gene_annotation(self, attributes, curr_line_num):
         """
@@ -660,8 +1144,28 @@ class Gff3:
             curr_line_num (int): The line number of the current row in the input file.
 
         Returns:
-            GeneAnnotation or None: The generated GeneAnnotation object if it is not a duplicate,
-            otherwise None.
+            GeneAnnotation or None: The generated GeneAnnotation object, or None if the row does not have exactly one GeneID.
+
+        Raises:
+            None
+
+        """
+        gene_record = self.generate_ncbi_gene_record(attributes, curr_line_num)
+        if gene_record is None:
+            return None
+        return ga.GeneAnnotation(**self.__gene_annotation_fields(gene_record))
+
+    def generate_ncbi_gene_record(self, attributes, curr_line_num):
+        """
+        Generates a GeneRecord object for NCBI based on the provided attributes.
+
+        Args:
+            attributes (dict): A dictionary containing the attributes of the gene.
+            curr_line_num (int): The line number of the current row in the input file.
+
+        Returns:
+            GeneRecord or None: The generated GeneRecord object, or None if the row does not have exactly one GeneID.
+            Duplicates are handled by __add_gene_record.
 
         Raises:
             None
@@ -713,33 +1217,41 @@ class Gff3:
                 curr_line_num,
             )
 
-        gene_annotation = ga.GeneAnnotation(
+        return GeneRecord(
             id=NCBI_GENE_ID_PREFIX + ":" + stable_id,
             source_id=stable_id,
-            symbol=name,
             name=name,
             description=description,
             molecular_type=biotype,
-            referenced_in=self.genome_annotation.id,
-            in_taxon=[self.organism_taxon.id],
-            in_taxon_label=self.organism_taxon.full_name,
-            synonym=synonyms,
+            synonym=tuple(synonyms),
         )
-        if gene_annotation.id in self.gene_annotations:
-            if gene_annotation != self.gene_annotations[gene_annotation.id]:
-                return self.__resolve_ncbi_gene_annotation(
-                    gene_annotation, curr_line_num
-                )
-            if name != self.gene_annotations[gene_annotation.id].name:
-                self.logger.debug(
-                    "Line %s: GeneAnnotation object with id %s already exists with a different name. Current name: %s, Existing name: %s",
-                    curr_line_num,
-                    stable_id,
-                    name,
-                    self.gene_annotations[gene_annotation.id].name,
+
+    def __add_gene_record(self, gene_record, curr_line_num):
+        """
+        Adds a generated gene record to self.gene_records, resolving duplicates against the gene records
+        of earlier rows.
+
+        Ensembl gene records are only dropped if an identical gene record already exists. For NCBI, a gene
+        record with the same id as an existing one is resolved by __resolve_ncbi_gene_annotation.
+
+        Args:
+            gene_record (GeneRecord): The gene record generated for the current row.
+            curr_line_num (int): The line number of the current row in the input file.
+
+        Returns:
+            None
+        """
+        if self.genome_annotation.authority == ga.AuthorityType.ENSEMBL:
+            if gene_record not in self.gene_records:
+                self.gene_records[gene_record] = gene_record
+        elif self.genome_annotation.authority == ga.AuthorityType.NCBI:
+            existing_gene_record = self.gene_records.get(gene_record.id)
+            if existing_gene_record is not None and gene_record != existing_gene_record:
+                gene_record = self.__resolve_ncbi_gene_annotation(
+                    gene_record, curr_line_num
                 )
-                return None
-        return gene_annotation
+            if gene_record is not None:
+                self.gene_records[gene_record.id] = gene_record
 
     def __get_attribute(self, attributes, attribute_name, curr_line_num):
         """
@@ -763,11 +1275,12 @@ class Gff3:
                     attribute_name,
                 )
             elif attribute_name == "description":
-                value = re.sub(
-                    r"\s*\[Source.*?\]",
-                    "",
-                    urllib.parse.unquote(attributes["description"].pop()),
-                )
+                value = attributes["description"].pop()
+                # Only unescape and clean up descriptions that need it
+                if "%" in value:
+                    value = urllib.parse.unquote(value)
+                if "[Source" in value:
+                    value = DESCRIPTION_SOURCE_PATTERN.sub("", value)
             else:
                 value = attributes[attribute_name].pop()
                 if value.find(",") != -1:
@@ -792,19 +1305,19 @@ class Gff3:
         Resolves conflicts between existing and new gene annotations based on certain conditions.
 
         Args:
-            new_gene_annotation (GeneAnnotation): The new gene annotation to be resolved.
+            new_gene_annotation (GeneRecord): The new gene record to be resolved.
             curr_line_num (int): The current line number in the file.
 
         Returns:
-            GeneAnnotation or None: The resolved gene annotation or None if it cannot be resolved
-                                    or None if the resolution is in favor of the existing gene
-                                    annotation.
+            GeneRecord or None: The resolved gene record or None if it cannot be resolved
+                                or None if the resolution is in favor of the existing gene
+                                record.
 
         Raises:
             ValueError: If duplicates cannot be resolved.
 
         """
-        existing_gene_annotation = self.gene_annotations[new_gene_annotation.id]
+        existing_gene_annotation = self.gene_records[new_gene_annotation.id]
         if (
             existing_gene_annotation.description is not None
             and new_gene_annotation.description is None
@@ -839,61 +1352,568 @@ class Gff3:
         )
         return None
 
-    def __merge_values(self, t):
-        """
-        Merge values from a list of lists into a dictionary of sets.
-
-        Args:
-            t (list): A list of lists containing key-value pairs.
-
-        Returns:
-            dict: A dictionary where each key maps to a set of values.
-
-        """
-        result = defaultdict(set)
-        for lst in t:
-            key = lst[0].strip()
-            value = lst[1:]
-            for e in value:
-                result[key].add(e.strip())
-        return result
-
     def serialize_to_jsonld(
-        self, exclude_none: bool = True, exclude_unset: bool = False
+        self,
+        exclude_none: bool = True,
+        exclude_unset: bool = False,
+        output: str = None,
+        compact: bool = False,
+        compress: bool = False,
     ):
         """
         Serialize the object and either write it to the specified output file or print it to the CLI.
+        The graph is written one object at a time, so memory use does not grow with the number of genes.
 
         Parameters:
             exclude_none (bool): Whether to exclude None values in the output.
             exclude_unset (bool): Whether to exclude unset values in the output.
+            output (str, optional): The path of the output file. Defaults to None, which prints to the CLI.
+            compact (bool, optional): Whether to write the JSON-LD without indentation. Defaults to False.
+            compress (bool, optional): Whether to gzip compress the output. Defaults to False.
 
         Returns:
             None
         """
 
-        data = [
-            self.organism_taxon.dict(
+        def graph():
+            yield self.organism_taxon.dict(
                 exclude_none=exclude_none, exclude_unset=exclude_unset
-            ),
-            self.genome_assembly.dict(
+            )
+            yield self.genome_assembly.dict(
                 exclude_none=exclude_none, exclude_unset=exclude_unset
-            ),
-            self.genome_annotation.dict(
+            )
+            yield self.genome_annotation.dict(
                 exclude_none=exclude_none, exclude_unset=exclude_unset
-            ),
-        ]
-        for ck in self.checksums:
-            data.append(ck.dict(exclude_none=exclude_none, exclude_unset=exclude_unset))
-        for ga in self.gene_annotations.values():
-            data.append(ga.dict(exclude_none=exclude_none, exclude_unset=exclude_unset))
-
-        output_data = {
-            "@context": "https://raw.githubusercontent.com/brain-bican/models/main/jsonld-context-autogen/genome_annotation.context.jsonld",
-            "@graph": data,
+            )
+            for ck in self.checksums:
+                yield ck.dict(exclude_none=exclude_none, exclude_unset=exclude_unset)
+            for gene_annotation in self.gene_annotations.values():
+                yield gene_annotation.dict(
+                    exclude_none=exclude_none, exclude_unset=exclude_unset
+                )
+
+        write_jsonld(
+            CONTEXT,
+            graph(),
+            output=output,
+            indent=None if compact else 2,
+            compress=compress,
+        )
+
+
+def parse_gff3_attributes(attributes_column):
+    """
+    Extracts the attributes needed for gene annotations from column 9 of a GFF3 feature row.
+
+    Only the keys in GFF3_ATTRIBUTE_KEYS are kept; every other attribute is skipped without its values being
+    split or stripped. Values are returned unescaped, the caller decodes them only when needed.
+
+    Args:
+        attributes_column (str): The raw attributes column, e.g. "ID=gene-A1BG;Dbxref=GeneID:1;Name=A1BG".
+
+    Returns:
+        dict: A dictionary where each attribute name maps to the set of its stripped values.
+    """
+    attributes = {}
+    for attribute in attributes_column.split(";"):
+        key, separator, value = attribute.partition("=")
+        if key not in GFF3_ATTRIBUTE_KEYS:
+            key = key.strip()
+            if key not in GFF3_ATTRIBUTE_KEYS:
+                continue
+        if not separator:
+            continue
+        values = attributes.get(key)
+        if values is None:
+            values = attributes[key] = set()
+        if "=" in value:
+            values.update(v.strip() for v in value.split("="))
+        else:
+            values.add(value.strip())
+    return attributes
+
+
+def local_gff_path(content_url):
+    """
+    Returns the file path of a local path or file:// URL.
+
+    Args:
+        content_url (str): The URL or path of the GFF file.
+
+    Returns:
+        str or None: The local file path, or None if content_url refers to a remote file.
+    """
+    parsed_url = urlparse(content_url)
+    if parsed_url.scheme == "file":
+        return urllib.request.url2pathname(parsed_url.path)
+    if parsed_url.scheme == "" or os.path.splitdrive(content_url)[0]:
+        return content_url
+    return None
+
+
+def hash_file(file_path, hash_functions=("MD5", "SHA256", "SHA1")):
+    """
+    Calculates the checksums of a local file, running one thread per hash function over a memory-mapped view
+    of the file. hashlib releases the GIL while hashing, so the hash functions run in parallel.
+
+    Args:
+        file_path (str): The path to the file.
+        hash_functions (tuple[str], optional): The hash functions to use. Defaults to ("MD5", "SHA256", "SHA1").
+
+    Returns:
+        dict: A dictionary mapping each hash function to the hexadecimal digest of the file.
+    """
+    hashers = {name: hashlib.new(name.lower()) for name in hash_functions}
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                with ThreadPoolExecutor(max_workers=len(hashers)) as executor:
+                    for hasher in hashers.values():
+                        executor.submit(hasher.update, view)
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+
+def map_blocks(file_path, block_size=PIPELINE_BLOCK_SIZE):
+    """
+    Yields the blocks of a memory-mapped local file without copying them.
+
+    Args:
+        file_path (str): The path to the file.
+        block_size (int, optional): The number of bytes per block. Defaults to PIPELINE_BLOCK_SIZE.
+
+    Yields:
+        memoryview: A view of each block of the file. A view is released, and must no longer be used, once the
+        next block is requested.
+    """
+    with open(file_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as view:
+                for offset in range(0, size, block_size):
+                    block = view[offset : offset + block_size]
+                    try:
+                        yield block
+                    finally:
+                        # The mapping can only be closed once every view of it has been released
+                        block.release()
+
+
+def decompress_blocks(blocks, compressed, on_read=None):
+    """
+    Yields the (decompressed) data of consecutive blocks of raw bytes.
+
+    Args:
+        blocks (Iterable[bytes]): Consecutive blocks of raw (bytes-like) data.
+        compressed (bool): Whether the data is gzip compressed. Concatenated gzip members are supported.
+        on_read (Callable[[bytes], None], optional): Called with every block of raw bytes before it is decompressed.
+
+    Yields:
+        bytes: The decompressed data of each block. Uncompressed blocks are passed through unchanged.
+
+    Raises:
+        zlib.error: If the data is not valid gzip data.
+        EOFError: If the gzip data ends before the end of its last member, e.g. after an interrupted download.
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS) if compressed else None
+    started = False
+    for data in blocks:
+        if on_read is not None:
+            on_read(data)
+        if decompressor is not None:
+            block = b""
+            while data:
+                if decompressor.eof:
+                    # A gzip file may consist of several concatenated members, which may be padded with zeroes
+                    data = bytes(data).lstrip(b"\x00")
+                    if not data:
+                        break
+                    decompressor = zlib.decompressobj(GZIP_WBITS)
+                block += decompressor.decompress(data)
+                started = True
+                data = decompressor.unused_data
+            data = block
+        yield data
+    if decompressor is not None:
+        yield decompressor.flush()
+        if started and not decompressor.eof:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+
+def read_blocks(fileobj, compressed, block_size=PIPELINE_BLOCK_SIZE, on_read=None):
+    """
+    Reads a binary file object in blocks and yields the (decompressed) data.
+
+    Args:
+        fileobj (io.RawIOBase): A binary file object, e.g. an open file or an HTTP response.
+        compressed (bool): Whether the data is gzip compressed. Concatenated gzip members are supported.
+        block_size (int, optional): The number of bytes read at a time. Defaults to PIPELINE_BLOCK_SIZE.
+        on_read (Callable[[bytes], None], optional): Called with every block of raw bytes before it is decompressed.
+
+    Yields:
+        bytes: The decompressed data of each block.
+
+    Raises:
+        zlib.error: If the data is not valid gzip data.
+        EOFError: If the gzip data is truncated.
+    """
+    yield from decompress_blocks(
+        iter(functools.partial(fileobj.read, block_size), b""), compressed, on_read
+    )
+
+
+def split_lines(blocks):
+    """
+    Splits blocks of bytes into lines of text.
+
+    Args:
+        blocks (Iterable[bytes]): Consecutive blocks of UTF-8 encoded data.
+
+    Yields:
+        str: The decoded lines, including the trailing newline.
+    """
+    pending = b""
+    for block in blocks:
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8") + "\n"
+    if pending:
+        yield pending.decode("utf-8")
+
+
+def iter_gff_blocks(file_path, progress_bar=None, block_size=PIPELINE_BLOCK_SIZE):
+    """
+    Yields the decompressed data of a local GFF file block by block.
+
+    The file is memory-mapped and read in place: gzip data is decompressed straight from the mapping, and
+    uncompressed files are yielded as views of the mapping without copying them into a temporary file or buffer.
+    Progress is reported as the number of bytes read from disk, i.e. compressed bytes for gzip files, so the
+    file is read exactly once and the progress bar is only updated once per block.
+
+    Args:
+        file_path (str): The path to the (optionally gzip compressed) GFF file.
+        progress_bar (tqdm, optional): A progress bar to update with the number of bytes read. Defaults to None.
+        block_size (int, optional): The number of bytes read at a time. Defaults to PIPELINE_BLOCK_SIZE.
+
+    Yields:
+        bytes-like: The decompressed data of each block. Views of uncompressed files are only valid until the next
+        block is requested.
+    """
+    on_read = None
+    if progress_bar is not None:
+        progress_bar.total = os.path.getsize(file_path)
+
+        def on_read(data):
+            progress_bar.update(len(data))
+
+    yield from decompress_blocks(
+        map_blocks(file_path, block_size), file_path.endswith(".gz"), on_read
+    )
+
+
+def iter_gff_lines(file_path, progress_bar=None, block_size=PIPELINE_BLOCK_SIZE):
+    """
+    Yields the lines of a local GFF file, decompressing gzip files on the fly.
+
+    Args:
+        file_path (str): The path to the (optionally gzip compressed) GFF file.
+        progress_bar (tqdm, optional): A progress bar to update with the number of bytes read. Defaults to None.
+        block_size (int, optional): The number of bytes read at a time. Defaults to PIPELINE_BLOCK_SIZE.
+
+    Yields:
+        str: The lines of the GFF file, including the trailing newline.
+    """
+    yield from split_lines(iter_gff_blocks(file_path, progress_bar, block_size))
+
+
+def stream_gff_blocks(
+    content_url, hashers, block_size=PIPELINE_BLOCK_SIZE, progress_bar=None
+):
+    """
+    Downloads a GFF file and yields its decompressed data while the download is still running.
+
+    A background thread reads the response in blocks, updates the hash objects with the raw (compressed) bytes
+    and decompresses gzip data incrementally. Decompressed blocks are handed to the caller through a bounded
+    queue, so network time and parse time overlap and no intermediate file is written.
+
+    Args:
+        content_url (str): The URL of the GFF file. Files whose path ends with ".gz" are decompressed.
+        hashers (dict): A dictionary of hashlib objects that are updated with the downloaded bytes.
+        block_size (int, optional): The number of bytes read from the response at a time. Defaults to PIPELINE_BLOCK_SIZE.
+        progress_bar (tqdm, optional): A progress bar to update with the number of bytes downloaded. Defaults to None.
+
+    Yields:
+        bytes: The decompressed data of each downloaded block.
+
+    Raises:
+        urllib.error.URLError: If the file cannot be downloaded.
+        zlib.error: If the downloaded data is not valid gzip data.
+        EOFError: If the downloaded gzip data is truncated, e.g. because the download was interrupted.
+    """
+    compressed = urlparse(content_url).path.endswith(".gz")
+    blocks = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    end_of_stream = object()
+    stop = threading.Event()
+
+    def put(item):
+        # Give up once the consumer has stopped reading, otherwise the thread would block forever on a full queue
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def download():
+        bytes_read = 0
+
+        def on_read(data):
+            nonlocal bytes_read
+            bytes_read += len(data)
+            for hasher in hashers.values():
+                hasher.update(data)
+
+        try:
+            with urllib.request.urlopen(content_url) as response:
+                total_size = int(response.headers.get("content-length", 0)) or None
+                for block in read_blocks(response, compressed, block_size, on_read):
+                    if stop.is_set():
+                        break
+                    put((block, bytes_read, total_size))
+            put(end_of_stream)
+        except Exception as e:
+            put(e)
+
+    def received_blocks():
+        while True:
+            item = blocks.get()
+            if item is end_of_stream:
+                return
+            if isinstance(item, Exception):
+                raise item
+            block, bytes_read, total_size = item
+            # The progress bar is only touched from the consuming thread
+            if progress_bar is not None:
+                progress_bar.total = total_size
+                progress_bar.update(bytes_read - progress_bar.n)
+            yield block
+
+    downloader = threading.Thread(target=download, daemon=True)
+    downloader.start()
+    try:
+        yield from received_blocks()
+    finally:
+        stop.set()
+        downloader.join()
+
+
+def stream_gff_lines(
+    content_url, hashers, block_size=PIPELINE_BLOCK_SIZE, progress_bar=None
+):
+    """
+    Downloads a GFF file and yields its lines while the download is still running. See stream_gff_blocks.
+
+    Args:
+        content_url (str): The URL of the GFF file. Files whose path ends with ".gz" are decompressed.
+        hashers (dict): A dictionary of hashlib objects that are updated with the downloaded bytes.
+        block_size (int, optional): The number of bytes read from the response at a time. Defaults to PIPELINE_BLOCK_SIZE.
+        progress_bar (tqdm, optional): A progress bar to update with the number of bytes downloaded. Defaults to None.
+
+    Yields:
+        str: The lines of the decompressed GFF file, including the trailing newline.
+    """
+    yield from split_lines(
+        stream_gff_blocks(content_url, hashers, block_size, progress_bar)
+    )
+
+
+def chunk_blocks(blocks, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Regroups blocks of bytes into chunks of at least chunk_size bytes that end at a line boundary.
+
+    Args:
+        blocks (Iterable[bytes]): Consecutive blocks of data.
+        chunk_size (int, optional): The minimum size of a chunk, except for the last one. Defaults to PARSE_CHUNK_SIZE.
+
+    Yields:
+        bytes: Chunks of complete lines.
+    """
+    pending = bytearray()
+    for block in blocks:
+        pending += block
+        if len(pending) >= chunk_size:
+            end = pending.rfind(b"\n") + 1
+            if end:
+                yield bytes(pending[:end])
+                del pending[:end]
+    if pending:
+        yield bytes(pending)
+
+
+def init_parse_worker(gff3, feature_filter, log_file_name, log_level, log_to_file):
+    """
+    Initializes a worker process of Gff3.parse with a copy of the Gff3 object (without its taxonomy
+    dictionaries, gene records or gene annotations) and the feature filter, and sets up its logging like that of
+    the parent process.
+
+    Args:
+        gff3 (Gff3): The Gff3 object being parsed.
+        feature_filter (tuple[str]): Tuple of feature types to include in the gene annotations.
+        log_file_name (str): The log file of the parent process, whose LOG_FILE_NAME has an earlier timestamp.
+        log_level (str): The logging level.
+        log_to_file (bool): Flag to log messages to the log file.
+
+    Returns:
+        None
+    """
+    global PARSE_WORKER_STATE
+    setup_logger(log_file_name, log_level, log_to_file)
+    PARSE_WORKER_STATE = (gff3, feature_filter)
+
+
+def parse_chunk(chunk, first_line_num):
+    """
+    Generates the gene records of a chunk of the GFF file in a worker process.
+
+    Args:
+        chunk (bytes): A chunk of complete lines of the decompressed GFF file.
+        first_line_num (int): The line number of the first line of the chunk in the input file.
+
+    Returns:
+        list[tuple]: The line number and GeneRecord object of each feature row in the chunk.
+    """
+    gff3, feature_filter = PARSE_WORKER_STATE
+    return list(
+        gff3.generate_gene_records(
+            split_lines((chunk,)), feature_filter, first_line_num
+        )
+    )
+
+
+def load_ncbi_taxonomy():
+    """
+    Loads the NCBI taxonomy dictionaries used by Gff3.
+
+    If the indexed taxonomy store exists, the dictionaries are read-only mappings that look up every entry in the
+    store when it is needed, so nothing is loaded up front. Otherwise they are loaded from the JSON files.
+
+    Returns:
+        dict: The "scientific_name_to_taxonid", "taxon_scientific_name" and "taxon_common_name" dictionaries, the
+        "lineage" index of the taxonomy tree if it has been built, and the "name_index" of the scientific names.
+
+    Raises:
+        FileNotFoundError: If the NCBI taxonomy has not been downloaded.
+        ValueError: If the taxonomy store lacks a table and must be rebuilt.
+    """
+    lineage = (
+        TaxonomyLineage.load(TAXONOMY_LINEAGE_PATH)
+        if os.path.isfile(TAXONOMY_LINEAGE_PATH)
+        else None
+    )
+    if os.path.isfile(TAXONOMY_STORE_PATH):
+        store = TaxonomyStore(TAXONOMY_STORE_PATH)
+        return {
+            "scientific_name_to_taxonid": store["scientific_name_to_taxid"],
+            "taxon_scientific_name": store["taxid_to_scientific_name"],
+            "taxon_common_name": store["taxid_to_common_name"],
+            "lineage": lineage,
+            "name_index": ScientificNameIndex(store["normalized_name_to_taxid"]),
         }
+    scientific_name_to_taxonid = load_json(SCIENTIFIC_NAME_TO_TAXONID_PATH)
+    return {
+        "scientific_name_to_taxonid": scientific_name_to_taxonid,
+        "taxon_scientific_name": load_json(TAXON_SCIENTIFIC_NAME_PATH),
+        "taxon_common_name": load_json(TAXON_COMMON_NAME_PATH),
+        "lineage": lineage,
+        "name_index": ScientificNameIndex(SortedNameTable(scientific_name_to_taxonid)),
+    }
+
+
+# The NCBI taxonomy mappings shared by all Gff3 objects of a process
+TAXONOMY_PROVIDER = TaxonomyProvider(load_ncbi_taxonomy)
 
-        print(json.dumps(output_data, indent=2))
+
+def read_manifest(manifest_path):
+    """
+    Reads the annotations listed in a manifest file.
+
+    Every non-empty line that does not start with "#" lists the content URL of a GFF3 file, optionally followed
+    by the assembly accession and the assembly strain. Columns are separated by tabs, or by whitespace if the
+    line contains no tab. An empty column or "-" leaves the value unset.
+
+    Args:
+        manifest_path (str): The path to the manifest file.
+
+    Returns:
+        list[tuple]: The (content_url, assembly_accession, assembly_strain) tuple of each annotation.
+
+    Raises:
+        ValueError: If a line has more than three columns.
+    """
+    entries = []
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line_num, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            columns = line.split("\t") if "\t" in line else line.split()
+            if len(columns) > 3:
+                raise ValueError(
+                    f"Line {line_num} of {manifest_path} has more than three columns."
+                )
+            columns = [
+                column.strip() if column.strip() not in ("", "-") else None
+                for column in columns
+            ]
+            columns += [None] * (3 - len(columns))
+            entries.append(tuple(columns))
+    return entries
+
+
+def translate_gff3(
+    content_url,
+    assembly_accession=None,
+    assembly_strain=None,
+    output=None,
+    gff3_kwargs=None,
+    parse_kwargs=None,
+    serialize_kwargs=None,
+):
+    """
+    Translates a single GFF3 file to a JSON-LD file.
+
+    Args:
+        content_url (str): The URL or local path of the GFF3 file.
+        assembly_accession (str, optional): The ID of the genome assembly. Defaults to None.
+        assembly_strain (str, optional): The strain of the genome assembly. Defaults to None.
+        output (str, optional): The path of the JSON-LD file. Defaults to None, which writes to stdout.
+        gff3_kwargs (dict, optional): Additional keyword arguments of Gff3, e.g. taxonomy. Defaults to None.
+        parse_kwargs (dict, optional): Keyword arguments of Gff3.parse. Defaults to None.
+        serialize_kwargs (dict, optional): Keyword arguments of Gff3.serialize_to_jsonld. Defaults to None.
+
+    Returns:
+        dict: The number of gene annotations and the seconds spent downloading, parsing and serializing. In
+        pipelined mode the download happens while parsing and is included in the parse time.
+    """
+    start = time.perf_counter()
+    gff3 = Gff3(content_url, assembly_accession, assembly_strain, **(gff3_kwargs or {}))
+    downloaded = time.perf_counter()
+    gff3.parse(**(parse_kwargs or {}))
+    parsed = time.perf_counter()
+    gff3.serialize_to_jsonld(output=output, **(serialize_kwargs or {}))
+    serialized = time.perf_counter()
+    return {
+        "gene_annotations": len(gff3.gene_annotations),
+        "download": downloaded - start,
+        "parse": parsed - downloaded,
+        "serialize": serialized - parsed,
+    }
 
 
 @click.command()
@@ -928,15 +1948,274 @@ class Gff3:
     is_flag=True,
     help="Log to a file instead of the console.",
 )
-def gff2jsonld(content_url, assembly_accession, assembly_strain, log_level, log_to_file):
+# Option #5: Download and parse in a single pass
+@click.option(
+    "--pipelined",
+    "-p",
+    is_flag=True,
+    help="Parse the GFF3 file while it is being downloaded instead of downloading it to a temporary file first.",
+)
+# Option #6: Disable progress bars
+@click.option(
+    "--no-progress",
+    "no_progress",
+    is_flag=True,
+    help="Do not display progress bars.",
+)
+# Option #7: Number of worker processes
+@click.option(
+    "--workers",
+    "-w",
+    required=False,
+    default=1,
+    type=click.IntRange(min=1),
+    help="The number of processes that parse the GFF3 file in parallel. Defaults to 1.",
+)
+# Option #8: Validate gene annotations in one batch
+@click.option(
+    "--batch_validate",
+    is_flag=True,
+    help="Validate the deduplicated gene annotations in one batched pass.",
+)
+# Option #9: Output file
+@click.option(
+    "--output",
+    "-o",
+    required=False,
+    default=None,
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the JSON-LD to this file instead of the console.",
+)
+# Option #10: Compact output
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Write the JSON-LD without indentation.",
+)
+# Option #11: Gzip output
+@click.option(
+    "--gzip",
+    "compress",
+    is_flag=True,
+    help="Gzip compress the JSON-LD output.",
+)
+# Option #12: Download cache
+@click.option(
+    "--cache_dir",
+    required=False,
+    default=None,
+    type=click.Path(file_okay=False, writable=True),
+    help="Keep downloaded GFF3 files in this directory and reuse them on later runs.",
+)
+# Option #13: Offline mode
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Only use GFF3 files from the download cache and never access the network. Uses the default cache directory unless --cache_dir is given.",
+)
+# Option #14: Taxon ID
+@click.option(
+    "--taxon_id",
+    "-t",
+    required=False,
+    default=None,
+    type=str,
+    help="NCBI taxon ID of the organism of an Ensembl GFF3 file whose species name is not an NCBI scientific name.",
+)
+def gff2jsonld(content_url, assembly_accession, assembly_strain, log_level, log_to_file, pipelined, no_progress, workers, batch_validate, output, compact, compress, cache_dir, offline, taxon_id):
     '''
     Creates GeneAnnotation objects from a GFF3 file and serializes them to JSON-LD format.
     '''
     gff3 = Gff3(
-        content_url, assembly_accession, assembly_strain, log_level, log_to_file
+        content_url,
+        assembly_accession,
+        assembly_strain,
+        log_level,
+        log_to_file,
+        pipelined,
+        show_progress=not no_progress,
+        cache_dir=cache_dir,
+        offline=offline,
+        taxon_id=taxon_id,
     )
-    gff3.parse()
-    gff3.serialize_to_jsonld()
+    gff3.parse(workers=workers, batch_validate=batch_validate)
+    gff3.serialize_to_jsonld(output=output, compact=compact, compress=compress)
+
+
+@click.command()
+##ARGUEMENTS##
+# Argument #1: The manifest file
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+
+##OPTIONS##
+# Option #1: Output directory
+@click.option(
+    "--output_dir",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False, writable=True),
+    help="The directory that the JSON-LD files are written to, one per annotation.",
+)
+# Option #2: Number of annotations translated at the same time
+@click.option(
+    "--jobs",
+    "-j",
+    required=False,
+    default=2,
+    type=click.IntRange(min=1),
+    help="The number of annotations that are downloaded and parsed at the same time. Defaults to 2.",
+)
+# Option #3: Number of worker processes per annotation
+@click.option(
+    "--workers",
+    "-w",
+    required=False,
+    default=1,
+    type=click.IntRange(min=1),
+    help="The number of processes that parse each GFF3 file in parallel. Defaults to 1.",
+)
+# Option #4: The log level
+@click.option(
+    "--log_level",
+    "-l",
+    required=False,
+    default="WARNING",
+    help="The log level. Defaults to WARNING.",
+)
+# Option #5: Log to file
+@click.option(
+    "--log_to_file",
+    "-f",
+    is_flag=True,
+    help="Log to a file instead of the console.",
+)
+# Option #6: Download and parse in a single pass
+@click.option(
+    "--pipelined",
+    "-p",
+    is_flag=True,
+    help="Parse each GFF3 file while it is being downloaded instead of downloading it to a temporary file first.",
+)
+# Option #7: Download cache
+@click.option(
+    "--cache_dir",
+    required=False,
+    default=None,
+    type=click.Path(file_okay=False, writable=True),
+    help="Keep downloaded GFF3 files in this directory and reuse them on later runs.",
+)
+# Option #8: Offline mode
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Only use GFF3 files from the download cache and never access the network.",
+)
+# Option #9: Validate gene annotations in one batch
+@click.option(
+    "--batch_validate",
+    is_flag=True,
+    help="Validate the deduplicated gene annotations in one batched pass.",
+)
+# Option #10: Compact output
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Write the JSON-LD without indentation.",
+)
+# Option #11: Gzip output
+@click.option(
+    "--gzip",
+    "compress",
+    is_flag=True,
+    help="Gzip compress the JSON-LD output.",
+)
+# Option #12: Disable the progress bar
+@click.option(
+    "--no-progress",
+    "no_progress",
+    is_flag=True,
+    help="Do not display the progress bar.",
+)
+def gff2jsonld_batch(manifest, output_dir, jobs, workers, log_level, log_to_file, pipelined, cache_dir, offline, batch_validate, compact, compress, no_progress):
+    '''
+    Translates all GFF3 files listed in a manifest file to JSON-LD, one file per annotation.
+
+    Each line of the manifest lists a GFF3 URL, optionally followed by the assembly accession and the assembly
+    strain. The NCBI taxonomy is loaded once and shared by all annotations.
+    '''
+    logger = setup_logger(LOG_FILE_NAME, log_level, log_to_file)
+    entries = read_manifest(manifest)
+    try:
+        taxonomy = TAXONOMY_PROVIDER.get()
+    except FileNotFoundError as e:
+        logger.critical("NCBI Taxonomy not downloaded. Run 'bkbit download-ncbi-taxonomy' command first." )
+        print(e)
+        sys.exit(2)
+
+    # Name each output after its GFF3 file, e.g. Homo_sapiens.GRCh38.104.jsonld
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = []
+    for content_url, _, _ in entries:
+        name = os.path.basename(urlparse(content_url).path)
+        for extension in (".gz", ".gff3", ".gff"):
+            if name.endswith(extension):
+                name = name[: -len(extension)]
+        name += ".jsonld.gz" if compress else ".jsonld"
+        if name in (os.path.basename(output) for output in outputs):
+            name = f"{len(outputs)}-{name}"
+        outputs.append(os.path.join(output_dir, name))
+
+    gff3_kwargs = {
+        "log_level": log_level,
+        "log_to_file": log_to_file,
+        "pipelined": pipelined,
+        "show_progress": False,
+        "cache_dir": cache_dir,
+        "offline": offline,
+        "taxonomy": taxonomy,
+    }
+    parse_kwargs = {"workers": workers, "batch_validate": batch_validate}
+    serialize_kwargs = {"compact": compact, "compress": compress}
+
+    # Threads overlap the downloads of some annotations with the parsing of others
+    summary = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                translate_gff3,
+                *entry,
+                output,
+                gff3_kwargs,
+                parse_kwargs,
+                serialize_kwargs,
+            ): output
+            for entry, output in zip(entries, outputs)
+        }
+        for future in tqdm(
+            as_completed(futures),
+            total=len(futures),
+            desc="Translating GFF3 files",
+            disable=no_progress,
+        ):
+            output = futures[future]
+            try:
+                summary[output] = future.result()
+            except Exception as e:  # one failing annotation should not stop the others
+                logger.error("Failed to translate %s: %s", output, e)
+                summary[output] = {"error": str(e)}
+
+    click.echo(f"{'output':<50} {'genes':>8} {'download':>9} {'parse':>9} {'serialize':>9}")
+    for output in outputs:
+        result = summary[output]
+        if "error" in result:
+            click.echo(f"{output:<50} failed: {result['error']}")
+        else:
+            click.echo(
+                f"{output:<50} {result['gene_annotations']:>8} {result['download']:>8.1f}s "
+                f"{result['parse']:>8.1f}s {result['serialize']:>8.1f}s"
+            )
+    if any("error" in result for result in summary.values()):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
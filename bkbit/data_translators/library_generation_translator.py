@@ -1,7 +1,8 @@
 """
 Module for parsing and processing specimen data using BICAN models and NIMP API endpoints. This module provides functionality to:
 
-1. Parse nhash IDs for specimens from the NIMP API, either in a top-down (descendants) or bottom-up (ancestors) fashion.
+1. Parse nhash IDs for specimens from the NIMP API, either in a top-down (descendants) or bottom-up (ancestors) fashion,
+   fetching the records of the nodes concurrently with an asyncio traversal, optionally through an on-disk response cache.
 2. Generate BICAN objects based on the parsed specimen data.
 3. Serialize the extracted information into JSON-LD format for further use.
 4. Check if values belong to a specific enumeration set.
@@ -10,6 +11,7 @@ Classes:
     SpecimenPortal: A class responsible for handling the parsing and generation of BICAN objects for specimen data.
 
 Functions:
+    compile_mapping_plan: Returns the cached plan that maps NIMP records to the fields of a BICAN class.
     get_field_type: Determines if an annotation is multivalued and returns the field type.
     generate_bican_object: Generates a BICAN object based on the provided data and parent relationships.
     parse_nhash_id_bottom_up: Parses ancestors of the provided nhash ID, generating BICAN objects.
@@ -34,23 +36,40 @@ Example:
     This will parse the descendants of the specimen identified by the nhash ID and save the result as a JSON-LD file.
 
 Dependencies:
+    - asyncio
+    - functools
     - json
     - os
     - click
     - tqdm
     - multiprocessing.Pool
+    - concurrent.futures.ProcessPoolExecutor
+    - concurrent.futures.ThreadPoolExecutor
+    - pydantic.TypeAdapter
     - bkbit.models.library_generation
-    - bkbit.utils.nimp_api_endpoints (get_data, get_ancestors, get_descendants)
+    - bkbit.utils.nimp_api_endpoints (NimpClient, get_client)
+    - bkbit.utils.nimp_response_cache (NimpResponseCache)
 """
 
+import asyncio
+import functools
 import json
+from collections import namedtuple
+from contextlib import contextmanager
 from enum import Enum
+import multiprocessing
 import os
+import sys
 from multiprocessing import Pool
+from typing import List
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from tqdm import tqdm
 import click
+from pydantic import TypeAdapter, ValidationError
 from bkbit.models import library_generation as lg
-from bkbit.utils.nimp_api_endpoints import get_data, get_ancestors, get_descendants
+from bkbit.utils.nimp_api_endpoints import DEFAULT_POOL_SIZE, NimpClient, get_client
+from bkbit.utils.download_cache import DEFAULT_CACHE_DIR
+from bkbit.utils.nimp_response_cache import RESPONSE_CACHE_FILE_NAME, NimpResponseCache
 
 CATEGORY_TO_CLASS = {
     "Library Pool": lg.LibraryPool,
@@ -67,6 +86,133 @@ CATEGORY_TO_CLASS = {
 }
 JWT_TOKEN_OS_VAR_NAME = "jwt_token"
 CONTEXT = "https://raw.githubusercontent.com/brain-bican/models/main/jsonld-context-autogen/library_generation.context.jsonld"
+DEFAULT_CONCURRENCY = 8
+EXECUTORS = ("process", "thread")
+# nhash IDs parsed at the same time by the thread executor; the work is network-bound, so this exceeds the core count
+DEFAULT_THREAD_JOBS = 32
+# A core is left to the I/O threads, so single-core machines generate the BICAN objects on the threads
+DEFAULT_CONSTRUCTION_WORKERS = min(2, (os.cpu_count() or 1) - 1)
+VALIDATION_BATCH_SIZE = 64
+
+FieldPlan = namedtuple(
+    "FieldPlan", ["schema_field", "nimp_field", "convert", "required", "default", "multivalued"]
+)
+FieldPlan.__doc__ = """
+How generate_bican_object fills one field of a BICAN class from a NIMP record.
+
+Attributes:
+    schema_field (str): The name of the field in the BICAN class.
+    nimp_field (str): The name of the field in the NIMP record, or "id" and "was_derived_from" for the fields
+        that are filled from the nhash ID and the parents of the record.
+    convert (Callable or None): Converts a NIMP value to the type of the field, or None if the type of the field
+        is not supported.
+    required (bool): Whether the field is required.
+    default: The default value of the field, used when the record has no value.
+    multivalued (bool): Whether the field holds a list.
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _enum_members(enum_type):
+    # The first member with a value wins, like a scan of the members in definition order
+    members = {}
+    for member in enum_type:
+        members.setdefault(member.value, member)
+    return members
+
+
+def _str_list(value):
+    return [str(item) for item in value]
+
+
+def _int(value):
+    return int(float(value))
+
+
+def _enum_converter(enum_type):
+    members = _enum_members(enum_type)
+
+    def convert(value):
+        try:
+            return members.get(value)
+        except TypeError:
+            # Unhashable values, e.g. lists, are not the value of any member
+            return None
+
+    return convert
+
+
+@functools.lru_cache(maxsize=None)
+def compile_mapping_plan(bican_class):
+    """
+    Returns the plan that maps NIMP records to the fields of a BICAN class. Everything in the plan depends only on
+    the class (the NIMP name, type and default of every field), so it is built once per class and cached.
+
+    Args:
+        bican_class (type): A BICAN class, e.g. a value of CATEGORY_TO_CLASS.
+
+    Returns:
+        tuple[FieldPlan]: The plan of every field of the class, in field order.
+    """
+    plan = []
+    for schema_field_name, schema_field_metadata in bican_class.model_fields.items():
+        nimp_field_name = (
+            (schema_field_metadata.json_schema_extra or {})
+            .get("linkml_meta", {})
+            .get("local_names", {})
+            .get("NIMP", {})
+            .get("local_name_value", schema_field_name)
+        )
+        multivalued, field_type = SpecimenPortal.get_field_type(
+            schema_field_metadata.annotation
+        )
+        if field_type is str:
+            convert = _str_list if multivalued else str
+        elif field_type is int:
+            convert = _int
+        elif field_type in (float, bool):
+            convert = field_type
+        elif type(field_type) is type(Enum):
+            convert = _enum_converter(field_type)
+        else:
+            convert = None
+        plan.append(
+            FieldPlan(
+                schema_field_name,
+                nimp_field_name,
+                convert,
+                schema_field_metadata.is_required(),
+                schema_field_metadata.default,
+                multivalued,
+            )
+        )
+    return tuple(plan)
+
+
+@functools.lru_cache(maxsize=None)
+def _list_adapter(bican_class):
+    return TypeAdapter(List[bican_class])
+
+
+def error_entry(stage, error, message=None, details=None):
+    """
+    Returns the entry of an error report for an error raised while parsing a node.
+
+    Args:
+        stage (str): Where the error was raised: "retrieve" (the ancestors or descendants of a parsed nhash ID),
+            "fetch" (the record of a node), "convert" (mapping the record to the fields of its BICAN class) or
+            "validate" (validating the fields).
+        error (Exception): The error.
+        message (str, optional): The message of the entry. Defaults to the message of the error.
+        details (list[dict], optional): The pydantic errors of the fields, with their location, message and type.
+
+    Returns:
+        dict: The stage, the error type and message, and the details if any. The entry can be serialized to JSON.
+    """
+    entry = {"stage": stage, "error": type(error).__name__, "message": message or str(error)}
+    if details is not None:
+        entry["details"] = details
+    return entry
 
 
 class SpecimenPortal:
@@ -77,7 +223,19 @@ class SpecimenPortal:
 
     Attributes:
         jwt_token (str): The authentication token used to access the specimen data.
+        client (NimpClient): The client used to access the NIMP API. Defaults to the shared client of the jwt_token
+            with a connection per concurrent fetch, or to a new client limited to rate_limit requests per second and
+            reading through cache if either is given. A new client is owned by the portal and closed by close().
+        concurrency (int): The largest number of records that are fetched at the same time.
+        construction_pool (concurrent.futures.Executor): The process pool that generates the BICAN objects of each
+            parsed nhash ID, or None to generate them in the calling thread.
         generated_objects (dict): A dictionary that stores generated BICAN objects, keyed by nhash IDs.
+        errors (dict): The errors of the nodes that could not be parsed, keyed by nhash ID (see error_entry).
+        retrieval_errors (dict): The errors retrieving the ancestors or descendants of the nhash IDs given to
+            parse_nhash_ids, keyed by nhash ID. They are kept apart from errors, where the same nhash ID may have
+            an error as a node of another nhash ID.
+        fetch_stats (dict): The number of "roots" parsed by the last parse_nhash_ids call, the number of nodes they
+            "requested" together, the number of distinct nodes "fetched" and the number of fetches "saved".
 
     Methods:
         get_field_type(annotation, collected_annotations=None):
@@ -89,25 +247,62 @@ class SpecimenPortal:
         parse_nhash_id_top_down(nhash_id):
             Parses descendants of the provided nhash_id, starting from the node and moving downwards to the leaves (Library Pool).
 
+        parse_nhash_ids(nhash_ids, descendants=False):
+            Parses many nhash IDs as one deduplicated specimen graph, fetching every shared node once.
+
         generate_bican_object(data, was_derived_from=None):
             Generates a BICAN object based on the provided data and parent relationships.
 
-        serialize_to_jsonld(exclude_none=True, exclude_unset=False):
-            Serializes the generated objects into JSON-LD format for further use or storage.
+        map_bican_attributes(data, was_derived_from=None):
+            Maps a record to its BICAN class and the field values of the class, without validating them.
 
-        parse_single_nashid(jwt_token, nhash_id, descendants, save_to_file=False):
+        generate_bican_objects(nodes):
+            Generates the BICAN objects of many records, validating the records of each class in one batch.
+
+        serialize_to_jsonld(exclude_none=True, exclude_unset=False, nhash_ids=None):
+            Serializes the generated objects, or those of the given nhash IDs, into JSON-LD format for further use or storage.
+
+        close():
+            Closes the client if the portal created it. The portal is also a context manager that closes it on exit.
+
+        parse_single_nashid(jwt_token, nhash_id, descendants, save_to_file=False, concurrency=DEFAULT_CONCURRENCY, rate_limit=None, cache=None, client=None, construction_pool=None):
             Parses a single nhash ID and optionally saves the result to a JSON-LD file.
 
-        parse_multiple_nashids(jwt_token, file_path, descendants):
+        parse_multiple_nashids(jwt_token, file_path, descendants, concurrency=DEFAULT_CONCURRENCY, rate_limit=None, cache=None, shared_graph=False, executor="process", jobs=None, construction_workers=DEFAULT_CONSTRUCTION_WORKERS):
             Parses multiple nhash IDs from a file and saves the results to JSON-LD files.
-
-    Static Methods:
-        __check_valueset_membership(enum_type, nimp_value):
-            Checks if a given value belongs to a specified enum.
     """
-    def __init__(self, jwt_token):
+    def __init__(self, jwt_token, client=None, concurrency=DEFAULT_CONCURRENCY, rate_limit=None, cache=None, construction_pool=None):
         self.jwt_token = jwt_token
+        pool_size = max(concurrency, DEFAULT_POOL_SIZE)
+        # Clients with their own rate limit or cache are not shared, so the portal closes them
+        self.__owns_client = client is None and bool(rate_limit or cache is not None)
+        if self.__owns_client:
+            client = NimpClient(jwt_token, pool_size=pool_size, rate_limit=rate_limit, cache=cache)
+        elif client is None:
+            client = get_client(jwt_token, pool_size)
+        self.client = client
+        self.concurrency = concurrency
+        self.construction_pool = construction_pool
         self.generated_objects = {}
+        self.errors = {}
+        self.retrieval_errors = {}
+        self.fetch_stats = {}
+
+    def close(self):
+        """
+        Closes the client if the portal created it. Shared clients and clients passed in are left open.
+
+        Returns:
+            None
+        """
+        if self.__owns_client:
+            self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     @staticmethod
     def get_field_type(annotation, collected_annotations=None):
@@ -163,39 +358,24 @@ class SpecimenPortal:
 
         """
         # Traverse the nodes all the way to the root (Donor)
-        try:
-            ancestors = get_ancestors(nhash_id, self.jwt_token)
-            if "error" in ancestors:
-                raise ValueError(ancestors["error"])
-        except ValueError as e:
-            print(f"ValueError retrieving ancestors for '{nhash_id}': {e}")
-            return
-        except Exception as e:
-            print(f"Unexpected error retrieving ancestors for '{nhash_id}': {e}")
+        nodes = self.__retrieve_nodes(nhash_id, descendants=False)
+        if nodes is None:
             return
-        for curr_nhash_id, curr_value in tqdm(
-            ancestors.get("data", {}).items(),
-            desc="Processing ancestors and generating respective BICAN objects for NHash ID: "
-            + nhash_id,
-            unit="ancestor",
-        ):
-            try:
-                curr_data = get_data(curr_nhash_id, self.jwt_token).get("data")
-                parents = curr_value.get("edges", {}).get("has_parent")
-                generated_object = self.generate_bican_object(curr_data, parents)
-                if generated_object is not None:
-                    self.generated_objects[curr_nhash_id] = generated_object
-            except ValueError as e:
-                print(f"ValueError generating object for '{curr_nhash_id}': {e}")
-                continue
-            except Exception as e:
-                print(f"Unexpected error generating object for '{curr_nhash_id}': {e}")
-                continue
+        self.__generate_objects(
+            list(nodes),
+            self.__node_fetcher(nodes, descendants=False),
+            "Processing ancestors and generating respective BICAN objects for NHash ID: " + nhash_id,
+            "ancestor",
+        )
 
     def parse_nhash_id_top_down(self, nhash_id: str):
         """
         Parses the given nhash_id in a top-down manner, traversing the nodes all the way to the leaves (Library Pool).
 
+        The descendants are requested with nhash_only=False, whose response has the has_parent edges of every node,
+        so the only other requests are one get_data call per node, of which up to concurrency run at the same time.
+        Nodes without has_parent edges in the response fall back to a get_ancestors call.
+
         Args:
             nhash_id (str): The nhash_id to be parsed.
 
@@ -207,37 +387,200 @@ class SpecimenPortal:
             Exception: If an unexpected error occurs while retrieving descendants or generating objects.
         """
         # Traverse the nodes all the way to the leaves (Library Pool)
-        try:
-            descendants = get_descendants(nhash_id, self.jwt_token)
-            if "error" in descendants:
-                raise ValueError(descendants["error"])
-        except ValueError as e:
-            print(f"ValueError retrieving descendants for '{nhash_id}': {e}")
-            return
-        except Exception as e:
-            print(f"Unexpected error retrieving descendants for '{nhash_id}': {e}")
+        nodes = self.__retrieve_nodes(nhash_id, descendants=True)
+        if nodes is None:
             return
-        for curr_nhash_id in tqdm(
-            descendants.get("data", {}).keys(),
-            desc="Processing descendants and generating respective BICAN objects for NHash ID: "
-            + nhash_id,
-            unit="descendant",
-        ):
-            try:
-                curr_data = get_data(curr_nhash_id, self.jwt_token).get("data")
-                ancestors = get_ancestors(curr_nhash_id, self.jwt_token).get("data", {})
-                parents = (
-                    ancestors.get(curr_nhash_id).get("edges", {}).get("has_parent")
+        self.__generate_objects(
+            list(nodes),
+            self.__node_fetcher(nodes, descendants=True),
+            "Processing descendants and generating respective BICAN objects for NHash ID: " + nhash_id,
+            "descendant",
+        )
+
+    def parse_nhash_ids(self, nhash_ids, descendants: bool = False):
+        """
+        Parses many nhash IDs as one specimen graph. The ancestors (or descendants) of all the nhash IDs are merged
+        into one deduplicated graph, and every distinct node is fetched and turned into a BICAN object once, however
+        many of the nhash IDs share it. The objects of one nhash ID can then be serialized with
+        serialize_to_jsonld(nhash_ids=...).
+
+        The ancestors (or descendants) of the nhash IDs are retrieved concurrently, like the nodes. Errors
+        retrieving them are kept in retrieval_errors, and the number of node fetches saved over parsing every nhash
+        ID on its own in fetch_stats.
+
+        Args:
+            nhash_ids (Iterable[str]): The nhash IDs to parse.
+            descendants (bool, optional): The direction of parsing. True for descendants, False for ancestors.
+                Defaults to False.
+
+        Returns:
+            dict[str, list[str]]: The nhash IDs of the nodes of every parsed nhash ID, in the order of its
+            ancestors or descendants response. nhash IDs whose ancestors or descendants cannot be retrieved are
+            left out.
+        """
+        roots = list(dict.fromkeys(nhash_ids))
+        direction = "descendants" if descendants else "ancestors"
+        desc = f"Retrieving the {direction} of {len(roots)} NHash IDs"
+        with tqdm(total=len(roots), desc=desc, unit="NHash ID") as progress_bar:
+            responses = asyncio.run(
+                self.__fetch_nodes(roots, lambda nhash_id: self.__request_nodes(nhash_id, descendants), progress_bar)
+            )
+        graph_nodes, closures = {}, {}
+        for nhash_id, nodes in zip(roots, responses):
+            if isinstance(nodes, Exception):
+                self.retrieval_errors[nhash_id] = error_entry(
+                    "retrieve", nodes, f"Error retrieving {direction}: {nodes}"
                 )
-                generated_object = self.generate_bican_object(curr_data, parents)
-                if generated_object is not None:
-                    self.generated_objects[curr_nhash_id] = generated_object
-            except ValueError as e:
-                print(f"ValueError generating object for '{curr_nhash_id}': {e}")
-                continue
-            except Exception as e:
-                print(f"Unexpected error generating object for '{curr_nhash_id}': {e}")
                 continue
+            closures[nhash_id] = list(nodes)
+            for curr_nhash_id, curr_value in nodes.items():
+                # Prefer a value with has_parent edges, which saves the get_ancestors fallback of the node
+                if curr_nhash_id not in graph_nodes or (
+                    isinstance(curr_value, dict) and "has_parent" in curr_value.get("edges", {})
+                ):
+                    graph_nodes[curr_nhash_id] = curr_value
+        self.__generate_objects(
+            list(graph_nodes),
+            self.__node_fetcher(graph_nodes, descendants),
+            f"Processing the shared specimen graph of {len(closures)} NHash IDs",
+            "node",
+        )
+        requested = sum(len(nodes) for nodes in closures.values())
+        self.fetch_stats = {
+            "roots": len(closures),
+            "requested": requested,
+            "fetched": len(graph_nodes),
+            "saved": requested - len(graph_nodes),
+        }
+        return closures
+
+    def __request_nodes(self, nhash_id, descendants):
+        """
+        Requests the ancestors or descendants of an nhash ID.
+
+        Args:
+            nhash_id (str): The nhash ID.
+            descendants (bool): True to request the descendants, False to request the ancestors.
+
+        Returns:
+            dict: The nodes of the response, keyed by nhash ID.
+
+        Raises:
+            ValueError: If the response is an error.
+        """
+        # Only full descendants responses carry the has_parent edges of the nodes
+        response = (
+            self.client.get_descendants(nhash_id, nhash_only=False)
+            if descendants
+            else self.client.get_ancestors(nhash_id)
+        )
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response.get("data", {})
+
+    def __retrieve_nodes(self, nhash_id, descendants):
+        """
+        Retrieves the ancestors or descendants of an nhash ID. Errors are added to the error report.
+
+        Args:
+            nhash_id (str): The nhash ID.
+            descendants (bool): True to retrieve the descendants, False to retrieve the ancestors.
+
+        Returns:
+            dict or None: The nodes of the response, keyed by nhash ID, or None if they cannot be retrieved.
+        """
+        try:
+            return self.__request_nodes(nhash_id, descendants)
+        except Exception as e:
+            direction = "descendants" if descendants else "ancestors"
+            self.errors[nhash_id] = error_entry("retrieve", e, f"Error retrieving {direction}: {e}")
+            return None
+
+    def __node_fetcher(self, nodes, descendants):
+        """
+        Returns a function that fetches the data of a node and reads its parents from the has_parent edges of the
+        nodes. Descendants responses may lack the edges, in which case the parents are read from a get_ancestors
+        call instead.
+
+        Args:
+            nodes (dict): The nodes of an ancestors or descendants response, keyed by nhash ID.
+            descendants (bool): Whether the nodes are from a descendants response.
+
+        Returns:
+            Callable[[str], tuple]: Returns the data and the parents of a node.
+        """
+
+        def fetch_node(curr_nhash_id):
+            curr_data = self.client.get_data(curr_nhash_id).get("data")
+            curr_value = nodes.get(curr_nhash_id)
+            edges = curr_value.get("edges", {}) if isinstance(curr_value, dict) else {}
+            if "has_parent" in edges or not descendants:
+                return curr_data, edges.get("has_parent")
+            ancestors = self.client.get_ancestors(curr_nhash_id).get("data", {})
+            return curr_data, ancestors.get(curr_nhash_id).get("edges", {}).get("has_parent")
+
+        return fetch_node
+
+    async def __fetch_nodes(self, node_ids, fetch_node, progress_bar):
+        """
+        Calls fetch_node for every node ID on a thread pool, with at most concurrency calls running at the same
+        time. Also used to retrieve the ancestors or descendants of many nhash IDs. The HTTP client is synchronous, so the event loop schedules the calls and the threads wait for the
+        responses.
+
+        Args:
+            node_ids (list[str]): The nhash IDs of the nodes.
+            fetch_node (Callable[[str], tuple]): Returns the data and the parents of a node.
+            progress_bar (tqdm): The progress bar updated once per fetched node.
+
+        Returns:
+            list: The result of fetch_node, or the exception it raised, for every node ID in order.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+
+            async def fetch(curr_nhash_id):
+                async with semaphore:
+                    try:
+                        return await loop.run_in_executor(executor, fetch_node, curr_nhash_id)
+                    finally:
+                        progress_bar.update()
+
+            return await asyncio.gather(
+                *(fetch(curr_nhash_id) for curr_nhash_id in node_ids), return_exceptions=True
+            )
+
+    def __generate_objects(self, node_ids, fetch_node, desc, unit):
+        """
+        Fetches the nodes concurrently and generates their BICAN objects in the order of node_ids. Errors of a node
+        are added to the error report and the node is skipped. With a construction pool, the objects of all nodes are
+        generated by one task of the pool, so that the cost of sending the data to a worker process is paid once per
+        call.
+
+        Args:
+            node_ids (list[str]): The nhash IDs of the nodes.
+            fetch_node (Callable[[str], tuple]): Returns the data and the parents of a node.
+            desc (str): The description of the progress bar.
+            unit (str): The unit of the progress bar.
+
+        Returns:
+            None
+        """
+        with tqdm(total=len(node_ids), desc=desc, unit=unit) as progress_bar:
+            results = asyncio.run(self.__fetch_nodes(node_ids, fetch_node, progress_bar))
+        nodes = []
+        for curr_nhash_id, result in zip(node_ids, results):
+            if isinstance(result, Exception):
+                self.errors[curr_nhash_id] = error_entry("fetch", result)
+            else:
+                curr_data, parents = result
+                nodes.append((curr_nhash_id, curr_data, parents))
+        if self.construction_pool is not None:
+            generated_objects, errors = self.construction_pool.submit(_generate_bican_objects, nodes).result()
+        else:
+            generated_objects, errors = self.generate_bican_objects(nodes)
+        self.generated_objects.update(generated_objects)
+        self.errors.update(errors)
 
     @classmethod
     def generate_bican_object(cls, data, was_derived_from: list[str] = None):
@@ -248,106 +591,165 @@ class SpecimenPortal:
             data (dict): The data retrieved from the NIMP portal.
             was_derived_from (list): A list of parent NHash IDs.
 
+        The fields are filled following the cached mapping plan of the class (see compile_mapping_plan).
+
         Returns:
             The generated Bican object.
 
         Raises:
-            None.
+            ValueError: If the category or the type of a field with a value is not supported, or a required field is missing.
+            pydantic.ValidationError: If the field values are not valid.
+
+        """
+        bican_class, assigned_attributes = cls.map_bican_attributes(data, was_derived_from)
+        return bican_class(**assigned_attributes)
+
+    @staticmethod
+    def map_bican_attributes(data, was_derived_from=None):
+        """
+        Maps a record to its BICAN class and the values of the fields of the class, following the cached mapping
+        plan of the class (see compile_mapping_plan). The values are not validated.
+
+        Parameters:
+            data (dict): The data retrieved from the NIMP portal.
+            was_derived_from (list): A list of parent NHash IDs.
+
+        Returns:
+            tuple: The BICAN class and a dictionary of field values.
 
+        Raises:
+            ValueError: If the category or the type of a field with a value is not supported, or a required field is missing.
         """
         category = data.get("category")
         bican_class = CATEGORY_TO_CLASS.get(category)
         if bican_class is None:
             raise ValueError(f"Unsupported category: {category}.")
 
+        record = data.get("record", {})
         assigned_attributes = {}
-        for schema_field_name, schema_field_metadata in bican_class.__fields__.items():
-            nimp_field_name = (
-                schema_field_metadata.json_schema_extra.get("linkml_meta", {})
-                .get("local_names", {})
-                .get("NIMP", {})
-                .get("local_name_value", schema_field_name)
-            )
-            multivalued, field_type = SpecimenPortal.get_field_type(
-                schema_field_metadata.annotation
-            )
-            required = schema_field_metadata.is_required()
-            #! handle multivalued fields
-            if nimp_field_name == "id":
+        for schema_field, nimp_field, convert, required, default, multivalued in compile_mapping_plan(bican_class):
+            if nimp_field == "id":
                 #! might want to check if "id" is provided otherwise raise error
-                assigned_attributes[schema_field_name] = "NIMP:" + str(data.get("id"))
+                assigned_attributes[schema_field] = "NIMP:" + str(data.get("id"))
                 continue
-            if nimp_field_name == "was_derived_from" and was_derived_from is not None:
-                if multivalued:
-                    assigned_attributes[schema_field_name] = was_derived_from
-                else:
-                    assigned_attributes[schema_field_name] = was_derived_from[0]
+            # Records without parents, e.g. donors, have an empty has_parent list and keep their own field value
+            if nimp_field == "was_derived_from" and was_derived_from:
+                assigned_attributes[schema_field] = (
+                    was_derived_from if multivalued else was_derived_from[0]
+                )
                 continue
-            data_value = data.get("record", {}).get(nimp_field_name)
+            data_value = record.get(nimp_field)
             if data_value is None:
-                assigned_attributes[schema_field_name] = schema_field_metadata.default
-            elif field_type is str:
-                if multivalued:
-                    assigned_attributes[schema_field_name] = [
-                        str(item) for item in data_value
-                    ]
-                else:
-                    assigned_attributes[schema_field_name] = str(data_value)
-                # if schema_field_name == "id":
-                #     assigned_attributes[schema_field_name] = "NIMP:" + str(data.get("id"))
-                # elif multivalued:
-                #     assigned_attributes[schema_field_name] = [str(item) for item in data_value]
-                # else:
-                #     assigned_attributes[schema_field_name] = str(data_value)
-            elif field_type is int:
-                assigned_attributes[schema_field_name] = int(float(data_value))
-            elif field_type is float:
-                assigned_attributes[schema_field_name] = float(data_value)
-            elif field_type is bool:
-                assigned_attributes[schema_field_name] = bool(data_value)
-            elif type(field_type) is type(Enum):
-                assigned_attributes[schema_field_name] = (
-                    SpecimenPortal.__check_valueset_membership(field_type, data_value)
-                )
-
+                value = default
+            elif convert is None:
+                raise ValueError(f"Unsupported value for field: {schema_field}")
+            else:
+                value = convert(data_value)
             # check if the field is required; if missing raise an error
-            if assigned_attributes[schema_field_name] is None and required:
-                raise ValueError(f"Missing required field: {schema_field_name}")
+            if value is None and required:
+                raise ValueError(f"Missing required field: {schema_field}")
+            assigned_attributes[schema_field] = value
+        return bican_class, assigned_attributes
 
-        return bican_class(**assigned_attributes)
+    @classmethod
+    def generate_bican_objects(cls, nodes):
+        """
+        Generates the BICAN objects of many records. The records are mapped to their classes, grouped by class and
+        validated with one TypeAdapter call per VALIDATION_BATCH_SIZE records of a class, which moves the loop over
+        the records into pydantic-core. Records that fail are left out and reported instead of raising.
+
+        Parameters:
+            nodes (Iterable[tuple]): The nhash ID, the data retrieved from the NIMP portal and the parent nhash IDs
+                of every record.
+
+        Returns:
+            tuple: A dictionary of the generated objects in the order of nodes, and a dictionary of the errors of
+            the records that failed (see error_entry), both keyed by nhash ID.
+        """
+        nodes = list(nodes)
+        groups, validated, errors = {}, {}, {}
+        for curr_nhash_id, curr_data, parents in nodes:
+            try:
+                bican_class, assigned_attributes = cls.map_bican_attributes(curr_data, parents)
+            except Exception as e:
+                errors[curr_nhash_id] = error_entry("convert", e)
+                continue
+            members = groups.setdefault(bican_class, [])
+            members.append((curr_nhash_id, assigned_attributes))
+            # Bounded batches keep few field dictionaries alive, which keeps garbage collections cheap
+            if len(members) >= VALIDATION_BATCH_SIZE:
+                cls.__validate_batch(bican_class, members, validated, errors)
+                members.clear()
+        for bican_class, members in groups.items():
+            cls.__validate_batch(bican_class, members, validated, errors)
+
+        generated_objects = {
+            curr_nhash_id: validated[curr_nhash_id]
+            for curr_nhash_id, _, _ in nodes
+            if curr_nhash_id in validated
+        }
+        return generated_objects, errors
 
     @staticmethod
-    def __check_valueset_membership(enum_type, nimp_value):
+    def __validate_batch(bican_class, members, validated, errors):
         """
-        Check if the given value belongs to the specified enum.
+        Validates the field values of records of one BICAN class in one call.
 
         Parameters:
-            enum_type(Enum): The enum class
-            nimp_value: The value to check for membership in the enum.
+            bican_class (type): The BICAN class.
+            members (list[tuple]): The nhash ID and the field values of every record.
+            validated (dict): The generated objects, keyed by nhash ID, to add the objects of the records to.
+            errors (dict): The error report, keyed by nhash ID, to add the errors of the failed records to.
 
         Returns:
-            The enum member if the value belongs to the enum, None otherwise.
+            None
         """
-        for member in enum_type:
-            if member.value == nimp_value:
-                return member
-        return None
+        if not members:
+            return
+        adapter = _list_adapter(bican_class)
+        try:
+            objects = adapter.validate_python([attributes for _, attributes in members])
+        except ValidationError as e:
+            # The errors of every failed record are located by its index in the batch
+            details = {}
+            for error in json.loads(e.json(include_url=False)):
+                index, *location = error["loc"]
+                details.setdefault(index, []).append({**error, "loc": location})
+            for index, record_details in details.items():
+                message = f"{len(record_details)} validation error(s) for {bican_class.__name__}: " + "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in record_details
+                )
+                errors[members[index][0]] = error_entry("validate", e, message, record_details)
+            members = [member for index, member in enumerate(members) if index not in details]
+            objects = adapter.validate_python([attributes for _, attributes in members])
+        validated.update(zip((curr_nhash_id for curr_nhash_id, _ in members), objects))
 
     def serialize_to_jsonld(
-        self, exclude_none: bool = True, exclude_unset: bool = False
+        self, exclude_none: bool = True, exclude_unset: bool = False, nhash_ids=None
     ):
         """
         Serialize the object and write it to the specified output file.
 
         Parameters:
             output_file (str): The path of the output file.
+            nhash_ids (Iterable[str], optional): The nhash IDs of the objects to serialize, in order, e.g. the nodes
+                of one nhash ID returned by parse_nhash_ids. nhash IDs without a generated object are skipped.
+                Defaults to None, which serializes all generated objects.
 
         Returns:
             None
         """
 
+        if nhash_ids is None:
+            objects = self.generated_objects.values()
+        else:
+            objects = [
+                self.generated_objects[curr_nhash_id]
+                for curr_nhash_id in nhash_ids
+                if curr_nhash_id in self.generated_objects
+            ]
         data = []
-        for obj in self.generated_objects.values():
+        for obj in objects:
             # data.append(obj.to_dict(exclude_none=exclude_none, exclude_unset=exclude_unset))
             data.append(obj.__dict__)
         output_data = {
@@ -357,35 +759,105 @@ class SpecimenPortal:
         return json.dumps(output_data, indent=2)
 
 
-def parse_single_nashid(jwt_token, nhash_id, descendants, save_to_file=False):
+def _generate_bican_objects(nodes):
+    """
+    Generates the BICAN objects of fetched nodes in a worker process of a construction pool.
+
+    Args:
+        nodes (list[tuple]): The nhash ID, the data and the parents of every node.
+
+    Returns:
+        tuple: The generated objects and the error report of the nodes, see SpecimenPortal.generate_bican_objects.
+    """
+    return SpecimenPortal.generate_bican_objects(nodes)
+
+
+def write_error_report(errors, file_path=None):
+    """
+    Writes an error report as JSON, to a file or to standard error.
+
+    Args:
+        errors (dict): The errors keyed by nhash ID, e.g. SpecimenPortal.errors.
+        file_path (str, optional): The path of the report file. Defaults to None, which writes to standard error.
+
+    Returns:
+        None
+    """
+    report = json.dumps(errors, indent=2)
+    if file_path is None:
+        print(report, file=sys.stderr)
+    else:
+        with open(file_path, "w") as f:
+            f.write(report)
+
+
+@contextmanager
+def _construction_pool(workers):
+    """
+    Returns a process pool for generating BICAN objects, or None if workers is 0. The workers are started with
+    forkserver (or spawn) rather than fork, because the pool is used by the threads of the thread executor.
+
+    Args:
+        workers (int): The number of worker processes.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor or None: The pool, shut down when the context exits.
+    """
+    if not workers:
+        yield None
+        return
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(start_method)) as pool:
+        yield pool
+
+
+def parse_single_nashid(jwt_token, nhash_id, descendants, save_to_file=False, concurrency=DEFAULT_CONCURRENCY, rate_limit=None, cache=None, client=None, construction_pool=None):
     """
-    Parse a single nashid using the SpecimenPortal class.
+    Parse a single nashid using the SpecimenPortal class. The nodes that cannot be parsed are reported as JSON,
+    in {nhash_id}.errors.json when saving to a file and on standard error otherwise.
 
     Parameters:
     - jwt_token (str): The JWT token for authentication.
     - nhash_id (str): The nashid to parse.
     - descendants (bool): The direction of parsing. True for descendants, False for ancestors.
     - save_to_file (bool): Whether to save the parsed data to a file. Default is False.
+    - concurrency (int): The largest number of records fetched at the same time. Default is DEFAULT_CONCURRENCY.
+    - rate_limit (float): The largest number of requests per second. Default is None, which does not limit them.
+    - cache (NimpResponseCache): The cache of the portal responses. Default is None, which fetches every response.
+    - client (NimpClient): The client used to access the NIMP API, e.g. one shared by the threads of a batch. Default is None, which creates one from rate_limit and cache.
+    - construction_pool (concurrent.futures.Executor): The process pool that generates the BICAN objects. Default is None, which generates them in this thread.
 
     Returns:
-    - None
+    - dict: The error report of the nashid, keyed by nhash ID. Empty if every node was parsed.
 
     Raises:
     - None
     """
-    sp_obj = SpecimenPortal(jwt_token)
-    if descendants == False:
-        sp_obj.parse_nhash_id_bottom_up(nhash_id)
-    else:
-        sp_obj.parse_nhash_id_top_down(nhash_id)
+    with SpecimenPortal(
+        jwt_token,
+        client=client,
+        concurrency=concurrency,
+        rate_limit=rate_limit,
+        cache=cache,
+        construction_pool=construction_pool,
+    ) as sp_obj:
+        if descendants == False:
+            sp_obj.parse_nhash_id_bottom_up(nhash_id)
+        else:
+            sp_obj.parse_nhash_id_top_down(nhash_id)
     if save_to_file:
         with open(f"{nhash_id}.jsonld", "w") as f:
             f.write(sp_obj.serialize_to_jsonld())
+        if sp_obj.errors:
+            write_error_report(sp_obj.errors, f"{nhash_id}.errors.json")
     else:
         print(sp_obj.serialize_to_jsonld())
+        if sp_obj.errors:
+            write_error_report(sp_obj.errors)
+    return sp_obj.errors
 
 
-def parse_multiple_nashids(jwt_token, file_path, descendants):
+def parse_multiple_nashids(jwt_token, file_path, descendants, concurrency=DEFAULT_CONCURRENCY, rate_limit=None, cache=None, shared_graph=False, executor="process", jobs=None, construction_workers=DEFAULT_CONSTRUCTION_WORKERS):
     """
     Parse multiple nashids from a file.
 
@@ -393,17 +865,88 @@ def parse_multiple_nashids(jwt_token, file_path, descendants):
         jwt_token (str): The JWT token.
         file_path (str): The path to the file containing the nashids.
         descendants (bool): The direction of parsing. True for descendants, False for ancestors.
+        concurrency (int): The largest number of records fetched at the same time for each nashid.
+        rate_limit (float): The largest number of requests per second of each process, i.e. of the whole batch with
+            the thread executor. None does not limit them.
+        cache (NimpResponseCache): The cache of the portal responses, shared by all processes. None fetches every response.
+        shared_graph (bool): If True, the nashids are parsed in this process as one specimen graph, so that records
+            shared by several nashids are fetched and validated once, and the number of fetches saved is printed.
+            The executor options are ignored.
+        executor (str): "process" parses every nashid in a worker process of a multiprocessing.Pool. "thread" parses
+            the nashids on threads of this process, which share one pooled client, and generates the BICAN objects
+            in a small process pool. The work is network-bound, so threads avoid the cost of forking and importing
+            the models per process and are not limited to the number of CPU cores.
+        jobs (int): The number of nashids parsed at the same time. Defaults to the number of CPU cores for the
+            process executor and DEFAULT_THREAD_JOBS for the thread executor.
+        construction_workers (int): The number of processes that generate the BICAN objects for the thread
+            executor. 0 generates them on the threads.
 
     Returns:
-        list: A list of results from parsing each nashid.
+        list[dict]: The error report of every nashid, in the order of the file (see parse_single_nashid). With
+        shared_graph, the report of a nashid has the errors of its nodes, or the error retrieving them.
 
     """
     with open(file_path, "r") as file:
         nhashids = [line.strip() for line in file.readlines()]
-    with Pool() as pool:
+    if shared_graph:
+        with SpecimenPortal(jwt_token, concurrency=concurrency, rate_limit=rate_limit, cache=cache) as sp_obj:
+            closures = sp_obj.parse_nhash_ids(nhashids, descendants)
+        reports = {}
+        for nhash_id in dict.fromkeys(nhashids):
+            nodes = closures.get(nhash_id)
+            if nodes is not None:
+                with open(f"{nhash_id}.jsonld", "w") as f:
+                    f.write(sp_obj.serialize_to_jsonld(nhash_ids=nodes))
+                # The errors of the nodes of the nhash ID
+                errors = {
+                    curr_nhash_id: sp_obj.errors[curr_nhash_id]
+                    for curr_nhash_id in nodes
+                    if curr_nhash_id in sp_obj.errors
+                }
+            else:
+                errors = {nhash_id: sp_obj.retrieval_errors[nhash_id]}
+            if errors:
+                write_error_report(errors, f"{nhash_id}.errors.json")
+            reports[nhash_id] = errors
+        stats = sp_obj.fetch_stats
+        print(
+            f"Fetched {stats['fetched']} distinct records for the {stats['requested']} records of "
+            f"{stats['roots']} NHash IDs; deduplication saved {stats['saved']} fetches."
+        )
+        return [reports[nhash_id] for nhash_id in nhashids]
+    if executor == "thread":
+        jobs = jobs or DEFAULT_THREAD_JOBS
+        client = NimpClient(
+            jwt_token,
+            pool_size=max(DEFAULT_POOL_SIZE, jobs * concurrency),
+            rate_limit=rate_limit,
+            cache=cache,
+        )
+        try:
+            with _construction_pool(construction_workers) as construction_pool, ThreadPoolExecutor(jobs) as io_pool:
+                return list(
+                    io_pool.map(
+                        lambda nhash_id: parse_single_nashid(
+                            jwt_token,
+                            nhash_id,
+                            descendants,
+                            True,
+                            concurrency,
+                            client=client,
+                            construction_pool=construction_pool,
+                        ),
+                        nhashids,
+                    )
+                )
+        finally:
+            client.close()
+    with Pool(jobs) as pool:
         results = pool.starmap(
             parse_single_nashid,
-            [(jwt_token, nhash_id, descendants, True) for nhash_id in nhashids],
+            [
+                (jwt_token, nhash_id, descendants, True, concurrency, rate_limit, cache)
+                for nhash_id in nhashids
+            ],
         )
     return results
 
@@ -416,28 +959,75 @@ def parse_multiple_nashids(jwt_token, file_path, descendants):
 ##OPTIONS##
 # Option #1: Which direction to parse the nhash id. Default is ancestors.
 @click.option('--descendants', '-d', is_flag=True, help='Parse the given nhash_id and all of its children down to Library Pool.')
-
-def specimen2jsonld(nhash_id: str, descendants: bool):
+# Option #2: How many records are fetched at the same time.
+@click.option('--concurrency', '-c', type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY, show_default=True, help='Number of records fetched from the Specimen Portal at the same time.')
+# Option #3: The rate limit of the requests.
+@click.option('--rate_limit', '-r', type=click.FloatRange(min=0, min_open=True), default=None, help='Maximum number of requests per second sent to the Specimen Portal (per process when a file of nhash IDs is given).')
+# Option #4: Response cache
+@click.option('--cache_dir', required=False, default=None, type=click.Path(file_okay=False, writable=True), help='Keep Specimen Portal responses in this directory and reuse them on later runs.')
+# Option #5: Offline mode
+@click.option('--offline', is_flag=True, help='Only use Specimen Portal responses from the response cache, regardless of their age, and never access the network. Uses the default cache directory unless --cache_dir is given.')
+# Option #6: Time-to-live of cached responses
+@click.option('--cache_ttl', type=click.FloatRange(min=0), default=None, help='Number of hours after which cached responses are fetched again. Defaults to 24 hours for descendants and 7 days for other responses.')
+# Option #7: Shared specimen graph of a file of nhash IDs
+@click.option('--shared_graph', '-s', is_flag=True, help='Parse a file of nhash IDs as one specimen graph in a single process, so that records shared by several nhash IDs are fetched once.')
+# Option #8: Executor of a file of nhash IDs
+@click.option('--executor', type=click.Choice(EXECUTORS), default="process", show_default=True, help='Parse a file of nhash IDs in one worker process per CPU core, or on I/O threads of a single process that build the BICAN objects in a small process pool.')
+# Option #9: Number of nhash IDs parsed at the same time
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=None, help=f'Number of nhash IDs of a file parsed at the same time. Defaults to the number of CPU cores for the process executor and {DEFAULT_THREAD_JOBS} for the thread executor.')
+# Option #10: Construction processes of the thread executor
+@click.option('--construction_workers', type=click.IntRange(min=0), default=DEFAULT_CONSTRUCTION_WORKERS, show_default=True, help='Number of processes that build BICAN objects for the thread executor. 0 builds them on the I/O threads.')
+
+def specimen2jsonld(nhash_id: str, descendants: bool, concurrency: int, rate_limit: float, cache_dir: str, offline: bool, cache_ttl: float, shared_graph: bool, executor: str, jobs: int, construction_workers: int):
     """
     Convert the specimen portal data to JSON-LD format.
 
     Args:
         nhash_id (str): The nhash ID of the specimen.
         descendants (bool): Which direction to parse the nhash id. Default is ancestors.
+        concurrency (int): The number of records fetched at the same time.
+        rate_limit (float): The maximum number of requests per second. Default is no limit.
+        cache_dir (str): The directory of the response cache. Default is no cache.
+        offline (bool): Whether to only use cached responses. Implies the default cache directory.
+        cache_ttl (float): The number of hours after which cached responses expire.
+        shared_graph (bool): Whether to parse a file of nhash IDs as one specimen graph.
+        executor (str): Whether to parse a file of nhash IDs in worker processes ("process") or threads ("thread").
+        jobs (int): The number of nhash IDs of a file parsed at the same time.
+        construction_workers (int): The number of processes that build BICAN objects for the thread executor.
 
     Raises:
-        ValueError: If JWT token is missing or empty.
+        ValueError: If JWT token is missing or empty and the run is not offline.
 
     Returns:
         None
     """
     jwt_token = os.getenv(JWT_TOKEN_OS_VAR_NAME)
-    if not jwt_token or jwt_token == "":
+    # Offline runs never contact the portal
+    if (not jwt_token or jwt_token == "") and not offline:
         raise ValueError("JWT token is required")
+    if offline and cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+    cache = None
+    if cache_dir is not None:
+        ttls = None
+        if cache_ttl is not None:
+            ttls = {endpoint: cache_ttl * 3600 for endpoint in ("info", "ancestors", "descendants")}
+        cache = NimpResponseCache(os.path.join(cache_dir, RESPONSE_CACHE_FILE_NAME), ttls, offline)
     if os.path.isfile(nhash_id):
-        parse_multiple_nashids(jwt_token, nhash_id, descendants)
+        parse_multiple_nashids(
+            jwt_token,
+            nhash_id,
+            descendants,
+            concurrency,
+            rate_limit,
+            cache,
+            shared_graph,
+            executor,
+            jobs,
+            construction_workers,
+        )
     else:
-        parse_single_nashid(jwt_token, nhash_id, descendants)
+        parse_single_nashid(jwt_token, nhash_id, descendants, concurrency=concurrency, rate_limit=rate_limit, cache=cache)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+import collections
+import functools
+import http.server
+import threading
+import pytest
+
+LocalServer = collections.namedtuple("LocalServer", ["directory", "base_url", "requests", "server"])
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class RecordingHandler(QuietHandler):
+    # record the path and If-Modified-Since header of every GET request
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-Modified-Since")))
+        super().do_GET()
+
+
+@pytest.fixture()
+def http_server(request, tmp_path):
+    # serve the files of a temporary directory from a local HTTP server; parametrize indirectly with
+    # record_requests=True to record the requests it receives
+    record_requests = getattr(request, "param", {}).get("record_requests", False)
+    directory = tmp_path / "www"
+    directory.mkdir()
+    handler = functools.partial(
+        RecordingHandler if record_requests else QuietHandler, directory=str(directory)
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield LocalServer(directory, f"http://127.0.0.1:{server.server_address[1]}", server.requests, server)
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import pytest
+from bkbit.utils.download_cache import DownloadCache
+
+CONTENT = b"##gff-version 3\n" * 100
+
+
+# every test records the requests of the local server
+pytestmark = pytest.mark.parametrize(
+    "http_server", [{"record_requests": True}], ids=["recording"], indirect=True
+)
+
+
+def test_fetch_downloads_once_and_revalidates(http_server, tmp_path):
+    directory, base_url, requests, _ = http_server
+    (directory / "data.gff3.gz").write_bytes(CONTENT)
+    cache = DownloadCache(str(tmp_path / "cache"))
+
+    path, checksums = cache.fetch(base_url + "/data.gff3.gz")
+    second_path, second_checksums = cache.fetch(base_url + "/data.gff3.gz")
+
+    assert path.endswith(".gff3.gz")
+    assert open(path, "rb").read() == CONTENT
+    assert checksums == {
+        "MD5": hashlib.md5(CONTENT).hexdigest(),
+        "SHA256": hashlib.sha256(CONTENT).hexdigest(),
+        "SHA1": hashlib.sha1(CONTENT).hexdigest(),
+    }
+    assert (second_path, second_checksums) == (path, checksums)
+    # the second request is conditional and answered with 304 Not Modified
+    assert requests[0][1] is None
+    assert requests[1][1] is not None
+
+
+def test_fetch_downloads_changed_file(http_server, tmp_path):
+    directory, base_url, _, _ = http_server
+    data_file = directory / "data.gff3.gz"
+    data_file.write_bytes(CONTENT)
+    cache = DownloadCache(str(tmp_path / "cache"))
+    path, _ = cache.fetch(base_url + "/data.gff3.gz")
+
+    data_file.write_bytes(CONTENT + b"#changed\n")
+    os.utime(data_file, (os.path.getmtime(path) + 10,) * 2)
+    new_path, checksums = cache.fetch(base_url + "/data.gff3.gz")
+
+    assert new_path != path
+    assert checksums["SHA256"] == hashlib.sha256(CONTENT + b"#changed\n").hexdigest()
+
+
+def test_identical_files_are_stored_once(http_server, tmp_path):
+    directory, base_url, _, _ = http_server
+    (directory / "a.gff3.gz").write_bytes(CONTENT)
+    (directory / "b.gff3.gz").write_bytes(CONTENT)
+    cache = DownloadCache(str(tmp_path / "cache"))
+
+    first_path, _ = cache.fetch(base_url + "/a.gff3.gz")
+    second_path, _ = cache.fetch(base_url + "/b.gff3.gz")
+
+    assert first_path == second_path
+    assert len(os.listdir(cache.objects_dir)) == 1
+
+
+def test_offline(http_server, tmp_path):
+    directory, base_url, requests, _ = http_server
+    (directory / "data.gff3.gz").write_bytes(CONTENT)
+    DownloadCache(str(tmp_path / "cache")).fetch(base_url + "/data.gff3.gz")
+    offline_cache = DownloadCache(str(tmp_path / "cache"), offline=True)
+    requests.clear()
+
+    path, _ = offline_cache.fetch(base_url + "/data.gff3.gz")
+
+    assert open(path, "rb").read() == CONTENT
+    assert not requests
+    with pytest.raises(FileNotFoundError):
+        offline_cache.fetch(base_url + "/missing.gff3.gz")
+
+
+def test_unreachable_server_uses_cached_file(http_server, tmp_path):
+    directory, base_url, _, server = http_server
+    (directory / "data.gff3.gz").write_bytes(CONTENT)
+    url = base_url + "/data.gff3.gz"
+    cache = DownloadCache(str(tmp_path / "cache"))
+    path, checksums = cache.fetch(url)
+    server.shutdown()
+    server.server_close()
+
+    assert cache.fetch(url) == (path, checksums)
+    assert cache.lookup(url) == (path, checksums)
+
+
+class InterruptingProgressBar:
+    total = None
+
+    def update(self, size):
+        raise KeyboardInterrupt
+
+
+def test_interrupted_download_leaves_no_partial_file(http_server, tmp_path):
+    directory, base_url, _, _ = http_server
+    (directory / "data.gff3.gz").write_bytes(CONTENT)
+    cache = DownloadCache(str(tmp_path / "cache"))
+
+    with pytest.raises(KeyboardInterrupt):
+        cache.fetch(base_url + "/data.gff3.gz", InterruptingProgressBar())
+
+    assert not os.listdir(cache.objects_dir)
+    assert cache.lookup(base_url + "/data.gff3.gz") is None
+
+
+def test_relative_cache_dir_paths_resolve_from_other_directories(http_server, tmp_path, monkeypatch):
+    directory, base_url, _, _ = http_server
+    (directory / "data.gff3.gz").write_bytes(CONTENT)
+    monkeypatch.chdir(tmp_path)
+    path, checksums = DownloadCache("cache").fetch(base_url + "/data.gff3.gz")
+
+    monkeypatch.chdir(directory)
+
+    assert os.path.isabs(path)
+    assert DownloadCache(str(tmp_path / "cache"), offline=True).lookup(base_url + "/data.gff3.gz") == (path, checksums)
@@ -0,0 +1,40 @@
+from bkbit.data_translators import genome_annotation_translator as gt
+
+
+def test_parse_ncbi_attributes():
+    column = "ID=gene-OR4F5;Dbxref=GeneID:79501,HGNC:HGNC:14825;Name=OR4F5;gbkey=Gene;gene_biotype=protein_coding; gene_synonym = A, B;description=olfactory%2C receptor\n"
+
+    attributes = gt.parse_gff3_attributes(column)
+
+    assert attributes == {
+        "Dbxref": {"GeneID:79501,HGNC:HGNC:14825"},
+        "Name": {"OR4F5"},
+        "gene_biotype": {"protein_coding"},
+        "gene_synonym": {"A, B"},
+        "description": {"olfactory%2C receptor"},
+    }
+
+
+def test_parse_repeated_and_empty_attributes():
+    column = "Name=A;Name=B;gene_id=ENSG1.2;biotype=;Name;description=a=b;"
+
+    attributes = gt.parse_gff3_attributes(column)
+
+    assert attributes == {
+        "Name": {"A", "B"},
+        "gene_id": {"ENSG1.2"},
+        "biotype": {""},
+        "description": {"a", "b"},
+    }
+
+
+def test_gene_record_equality_and_pickling():
+    import pickle
+
+    record = gt.GeneRecord("NCBIGene:1", "1", "A1BG", None, "protein_coding", ("A1B",))
+    same = gt.GeneRecord("NCBIGene:1", "1", "A1BG", None, "protein_coding", ("A1B",))
+    other_synonyms = gt.GeneRecord("NCBIGene:1", "1", "A1BG", None, "protein_coding", ())
+
+    assert record == same and hash(record) == hash(same)
+    assert record != other_synonyms and hash(record) == hash(other_synonyms)
+    assert pickle.loads(pickle.dumps(record)) == record
@@ -0,0 +1,75 @@
+import gzip
+import json
+import pytest
+from click.testing import CliRunner
+from bkbit.data_translators import genome_annotation_translator as gt
+
+ENSEMBL_URL = "https://ftp.ensembl.org/pub/release-104/gff3/homo_sapiens/Homo_sapiens.GRCh38.104.gff3.gz"
+NCBI_URL = "https://ftp.ncbi.nlm.nih.gov/genomes/all/annotation_releases/9606/110/GCF_000001405.40_GRCh38.p14/GCF_000001405.40_GRCh38.p14_genomic.gff.gz"
+
+TAXONOMY = {
+    "scientific_name_to_taxonid": {"Homo sapiens": "9606"},
+    "taxon_scientific_name": {"9606": "Homo sapiens"},
+    "taxon_common_name": {"9606": "human"},
+}
+NCBI_GFF3 = (
+    "##gff-version 3\n"
+    "NC_000001.11\tBestRefSeq\tgene\t65419\t71585\t.\t+\t.\tID=gene-OR4F5;Dbxref=GeneID:79501;Name=OR4F5;gene_biotype=protein_coding\n"
+    "NC_000001.11\tGnomon\tgene\t29774\t35418\t.\t+\t.\tID=gene-MIR1302-2HG;Dbxref=GeneID:107985730;Name=MIR1302-2HG;gene_biotype=lncRNA\n"
+)
+ENSEMBL_GFF3 = (
+    "##gff-version 3\n"
+    "1\thavana\tgene\t65419\t71585\t.\t+\t.\tID=gene:ENSG00000186092;Name=OR4F5;biotype=protein_coding;gene_id=ENSG00000186092\n"
+)
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text(
+        "# annotations\n"
+        f"{NCBI_URL}\n"
+        "\n"
+        f"{ENSEMBL_URL}\tGCF_000001405.40\t-\n"
+        f"{ENSEMBL_URL} GCF_000001405.40 C57BL/6J\n"
+    )
+
+    assert gt.read_manifest(str(manifest)) == [
+        (NCBI_URL, None, None),
+        (ENSEMBL_URL, "GCF_000001405.40", None),
+        (ENSEMBL_URL, "GCF_000001405.40", "C57BL/6J"),
+    ]
+
+
+def test_read_manifest_too_many_columns(tmp_path):
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text(f"{ENSEMBL_URL}\tGCF_000001405.40\tstrain\textra\n")
+
+    with pytest.raises(ValueError):
+        gt.read_manifest(str(manifest))
+
+
+def test_batch_translates_local_manifest_entries(tmp_path, monkeypatch):
+    ncbi_file = tmp_path / NCBI_URL.split("/", 3)[3]
+    ensembl_file = tmp_path / ENSEMBL_URL.split("/", 3)[3]
+    for file_path, content in ((ncbi_file, NCBI_GFF3), (ensembl_file, ENSEMBL_GFF3)):
+        file_path.parent.mkdir(parents=True)
+        file_path.write_bytes(gzip.compress(content.encode("utf-8")))
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text(f"{ncbi_file}\n{ensembl_file}\tGCF_000001405.40\n")
+    monkeypatch.setattr(gt.TAXONOMY_PROVIDER, "get", lambda: TAXONOMY)
+
+    # two annotations on two threads, each parsed by a pool of two processes
+    result = CliRunner().invoke(
+        gt.gff2jsonld_batch,
+        [str(manifest), "--output_dir", str(tmp_path / "out"), "--jobs", "2", "--workers", "2", "--no-progress"],
+    )
+
+    assert result.exit_code == 0, result.output
+    genes = {}
+    for name in ("GCF_000001405.40_GRCh38.p14_genomic.jsonld", "Homo_sapiens.GRCh38.104.jsonld"):
+        with open(tmp_path / "out" / name, encoding="utf-8") as file:
+            genes[name] = [node["id"] for node in json.load(file)["@graph"] if "bican:GeneAnnotation" in node["category"]]
+    assert genes == {
+        "GCF_000001405.40_GRCh38.p14_genomic.jsonld": ["NCBIGene:79501", "NCBIGene:107985730"],
+        "Homo_sapiens.GRCh38.104.jsonld": ["ENSEMBL:ENSG00000186092"],
+    }
@@ -0,0 +1,291 @@
+import gzip
+import hashlib
+import pytest
+from bkbit.data_translators import genome_annotation_translator as gt
+from bkbit.data_translators.genome_annotation_translator import GeneRecord
+
+GFF3_CONTENT = (
+    "##gff-version 3\n"
+    "NC_000001.11\tGnomon\tgene\t29774\t35418\t.\t+\t.\tID=gene-MIR1302-2HG;Dbxref=GeneID:107985730,HGNC:HGNC:52482;Name=MIR1302-2HG;gbkey=Gene;gene=MIR1302-2HG;gene_biotype=lncRNA\n"
+    "NC_000001.11\tBestRefSeq\tgene\t65419\t71585\t.\t+\t.\tID=gene-OR4F5;Dbxref=GeneID:79501,HGNC:HGNC:14825;Name=OR4F5;description=olfactory receptor family 4 subfamily F member 5;gbkey=Gene;gene=OR4F5;gene_biotype=protein_coding\n"
+)
+
+# NCBI taxonomy mappings injected into Gff3, so that the tests do not need the downloaded taxonomy
+TAXONOMY = {
+    "scientific_name_to_taxonid": {"Homo sapiens": "9606"},
+    "taxon_scientific_name": {"9606": "Homo sapiens"},
+    "taxon_common_name": {"9606": "human"},
+}
+NCBI_PATH = "genomes/all/annotation_releases/9606/110/GCF_000001405.40_GRCh38.p14/GCF_000001405.40_GRCh38.p14_genomic.gff.gz"
+
+
+def ncbi_gff3_content(rows=60, genes=17):
+    # gene rows whose GeneIDs repeat with and without descriptions and biotypes, between blank, comment and mRNA rows
+    lines = ["##gff-version 3", "#!genome-build GRCh38.p14"]
+    for row in range(rows):
+        gene_id = 1000 + row % genes
+        description = f";description=gene {gene_id} variant {row % 4}" if row % 3 else ""
+        biotype = ("protein_coding", "lncRNA", "", "misc_RNA")[row % 4]
+        lines.append(
+            f"NC_000001.11\tBestRefSeq\tgene\t{row * 100 + 1}\t{row * 100 + 50}\t.\t+\t.\t"
+            f"ID=gene-{row};Dbxref=GeneID:{gene_id};Name=G{gene_id}"
+            + (f";gene_biotype={biotype}" if biotype else "")
+            + description
+        )
+        if row % 4 == 0:
+            lines.append("")
+        if row % 5 == 0:
+            lines.append(f"NC_000001.11\tBestRefSeq\tmRNA\t{row * 100 + 1}\t{row * 100 + 50}\t.\t+\t.\tID=rna-{row};Parent=gene-{row}")
+        if row % 7 == 0:
+            lines.append("###")
+            lines.append(f"# comment {row}")
+    return "\n".join(lines) + "\n"
+
+ENSEMBL_PATH = "pub/release-104/gff3/homo_sapiens/Homo_sapiens.GRCh38.104.gff3.gz"
+ENSEMBL_CONTENT = (
+    "##gff-version 3\n"
+    "1\thavana\tgene\t11869\t14409\t.\t+\t.\tID=gene:ENSG00000223972;Name=DDX11L1;biotype=transcribed_unprocessed_pseudogene;description=DEAD/H-box helicase 11 like 1;gene_id=ENSG00000223972.5\n"
+    "1\thavana\tgene\t14404\t29570\t.\t-\t.\tID=gene:ENSG00000227232;Name=WASH7P;biotype=unprocessed_pseudogene;gene_id=ENSG00000227232\n"
+    "1\thavana\tgene\t11869\t14409\t.\t+\t.\tID=gene:ENSG00000223972;Name=DDX11L1;biotype=transcribed_unprocessed_pseudogene;description=DEAD/H-box helicase 11 like 1;gene_id=ENSG00000223972.5\n"
+    "1\tensembl\tgene\t11869\t14409\t.\t+\t.\tID=gene:ENSG00000223972;Name=DDX11L1;biotype=lncRNA;gene_id=ENSG00000223972\n"
+    "1\thavana\tgene\t65419\t71585\t.\t+\t.\tID=gene:ENSG00000186092;Name=OR4F5;biotype=protein_coding;gene_id=ENSG00000186092\n"
+)
+
+
+def write_gzip(file_path, members):
+    # every member is compressed on its own, like the output of concatenated gzip files
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_bytes(b"".join(gzip.compress(member.encode("utf-8")) for member in members))
+    return str(file_path)
+
+
+def parse_gff3(file_path, **parse_kwargs):
+    gff = gt.Gff3(file_path, assembly_accession="GCF_000001405.40", show_progress=False, taxonomy=TAXONOMY)
+    gff.parse(**parse_kwargs)
+    return gff
+
+
+def new_hashers():
+    return {"MD5": hashlib.md5(), "SHA256": hashlib.sha256(), "SHA1": hashlib.sha1()}
+
+
+def test_stream_gzip_lines(http_server):
+    directory, base_url, _, _ = http_server
+    compressed = gzip.compress(GFF3_CONTENT.encode("utf-8"))
+    (directory / "data.gff.gz").write_bytes(compressed)
+
+    hashers = new_hashers()
+    lines = list(gt.stream_gff_lines(base_url + "/data.gff.gz", hashers, block_size=16))
+
+    assert lines == GFF3_CONTENT.splitlines(keepends=True)
+    assert hashers["MD5"].hexdigest() == hashlib.md5(compressed).hexdigest()
+    assert hashers["SHA256"].hexdigest() == hashlib.sha256(compressed).hexdigest()
+    assert hashers["SHA1"].hexdigest() == hashlib.sha1(compressed).hexdigest()
+
+
+def test_stream_multi_member_gzip_lines(http_server):
+    directory, base_url, _, _ = http_server
+    first, second = GFF3_CONTENT[:100], GFF3_CONTENT[100:]
+    compressed = gzip.compress(first.encode("utf-8")) + gzip.compress(
+        second.encode("utf-8")
+    )
+    (directory / "data.gff.gz").write_bytes(compressed)
+
+    lines = list(gt.stream_gff_lines(base_url + "/data.gff.gz", new_hashers()))
+
+    assert "".join(lines) == GFF3_CONTENT
+
+
+def test_stream_truncated_gzip(http_server):
+    directory, base_url, _, _ = http_server
+    compressed = gzip.compress(ncbi_gff3_content().encode("utf-8"))
+    (directory / "data.gff.gz").write_bytes(compressed[:-10])
+
+    with pytest.raises(EOFError):
+        list(gt.stream_gff_lines(base_url + "/data.gff.gz", new_hashers()))
+
+
+def test_stream_uncompressed_lines(http_server):
+    directory, base_url, _, _ = http_server
+    (directory / "data.gff").write_text(GFF3_CONTENT.rstrip("\n"))
+
+    lines = list(gt.stream_gff_lines(base_url + "/data.gff", new_hashers()))
+
+    assert lines == GFF3_CONTENT.rstrip("\n").splitlines(keepends=True)
+
+
+def test_stream_missing_file(http_server):
+    base_url = http_server.base_url
+
+    with pytest.raises(Exception):
+        list(gt.stream_gff_lines(base_url + "/missing.gff.gz", new_hashers()))
+
+
+def test_iter_local_gzip_lines(tmp_path):
+    temp_file = tmp_path / "data.gff.gz"
+    temp_file.write_bytes(gzip.compress(GFF3_CONTENT.encode("utf-8")))
+
+    lines = list(gt.iter_gff_lines(str(temp_file), block_size=16))
+
+    assert lines == GFF3_CONTENT.splitlines(keepends=True)
+
+
+def test_iter_local_truncated_gzip(tmp_path):
+    temp_file = tmp_path / "data.gff.gz"
+    compressed = gzip.compress(ncbi_gff3_content().encode("utf-8"))
+    temp_file.write_bytes(compressed[: len(compressed) // 2])
+
+    with pytest.raises(EOFError):
+        list(gt.iter_gff_lines(str(temp_file), block_size=16))
+
+
+def test_iter_local_zero_padded_gzip(tmp_path):
+    # zero padding between and after the members is skipped, as the gzip module does
+    temp_file = tmp_path / "data.gff.gz"
+    first, second = GFF3_CONTENT[:100], GFF3_CONTENT[100:]
+    compressed = (
+        gzip.compress(first.encode("utf-8")) + bytes(20) + gzip.compress(second.encode("utf-8")) + bytes(20)
+    )
+    temp_file.write_bytes(compressed)
+
+    lines = list(gt.iter_gff_lines(str(temp_file), block_size=16))
+
+    assert "".join(lines) == GFF3_CONTENT == gzip.decompress(compressed).decode("utf-8")
+
+
+def test_chunk_blocks_end_at_line_boundaries():
+    blocks = [GFF3_CONTENT[i : i + 7].encode("utf-8") for i in range(0, len(GFF3_CONTENT), 7)]
+
+    chunks = list(gt.chunk_blocks(blocks, chunk_size=50))
+
+    assert b"".join(chunks) == GFF3_CONTENT.encode("utf-8")
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    assert len(chunks) == GFF3_CONTENT.count("\n")
+
+
+def test_iter_local_uncompressed_lines(tmp_path):
+    temp_file = tmp_path / "data.gff3"
+    temp_file.write_text(GFF3_CONTENT)
+
+    lines = list(gt.iter_gff_lines(str(temp_file), block_size=16))
+
+    assert lines == GFF3_CONTENT.splitlines(keepends=True)
+
+
+def test_iter_local_empty_file(tmp_path):
+    temp_file = tmp_path / "data.gff3"
+    temp_file.write_bytes(b"")
+
+    assert not list(gt.iter_gff_lines(str(temp_file)))
+
+
+def test_hash_file(tmp_path):
+    temp_file = tmp_path / "data.gff.gz"
+    compressed = gzip.compress(GFF3_CONTENT.encode("utf-8"))
+    temp_file.write_bytes(compressed)
+
+    assert gt.hash_file(str(temp_file)) == {
+        "MD5": hashlib.md5(compressed).hexdigest(),
+        "SHA256": hashlib.sha256(compressed).hexdigest(),
+        "SHA1": hashlib.sha1(compressed).hexdigest(),
+    }
+
+
+def test_local_gff_path():
+    assert gt.local_gff_path("/data/genomes/all/x.gff.gz") == "/data/genomes/all/x.gff.gz"
+    assert gt.local_gff_path("file:///data/genomes/all/x.gff.gz") == "/data/genomes/all/x.gff.gz"
+    assert gt.local_gff_path("https://ftp.ncbi.nlm.nih.gov/genomes/all/x.gff.gz") is None
+
+
+def test_parse_multi_member_gzip(tmp_path, monkeypatch):
+    file_path = write_gzip(tmp_path / NCBI_PATH, [GFF3_CONTENT[:100], GFF3_CONTENT[100:]])
+    # show_progress=False must not create a progress bar
+    monkeypatch.setattr(gt, "tqdm", lambda *args, **kwargs: pytest.fail("progress bar created"))
+
+    gff = parse_gff3(file_path)
+
+    assert list(gff.gene_annotations) == ["NCBIGene:107985730", "NCBIGene:79501"]
+    gene = gff.gene_annotations["NCBIGene:79501"]
+    assert (gene.symbol, gene.molecular_type) == ("OR4F5", "protein_coding")
+    assert gene.description == "olfactory receptor family 4 subfamily F member 5"
+    assert gene.in_taxon == ["NCBITaxon:9606"]
+    assert gff.gene_annotations["NCBIGene:107985730"].description is None
+
+
+def test_parallel_parse_matches_serial_parse(tmp_path, monkeypatch):
+    content = ncbi_gff3_content()
+    file_path = write_gzip(tmp_path / NCBI_PATH, [content])
+    monkeypatch.setattr(gt, "PIPELINE_BLOCK_SIZE", 64)
+    monkeypatch.setattr(gt, "PARSE_CHUNK_SIZE", 512)
+    assert len(list(gt.chunk_blocks(gt.iter_gff_blocks(file_path, None, 64), 512))) > 4
+
+    serial = parse_gff3(file_path)
+    parallel = parse_gff3(file_path, workers=2)
+
+    # duplicates are resolved as in a serial parse, keeping the order in which the GeneIDs were first seen
+    assert list(serial.gene_annotations) == [f"NCBIGene:{1000 + row}" for row in range(17)]
+    assert list(parallel.gene_annotations) == list(serial.gene_annotations)
+    assert [gene.model_dump() for gene in parallel.gene_annotations.values()] == [
+        gene.model_dump() for gene in serial.gene_annotations.values()
+    ]
+
+
+@pytest.mark.parametrize("batch_validate", [False, True])
+def test_parse_skips_invalid_gene_annotations(tmp_path, monkeypatch, caplog, batch_validate):
+    file_path = write_gzip(tmp_path / ENSEMBL_PATH, [ENSEMBL_CONTENT])
+    generate_ensembl_gene_record = gt.Gff3.generate_ensembl_gene_record
+
+    def generate_invalid_record(self, attributes, curr_line_num):
+        # a name that is not a string fails validation
+        gene_record = generate_ensembl_gene_record(self, attributes, curr_line_num)
+        if gene_record.source_id == "ENSG00000227232":
+            return GeneRecord(gene_record.id, gene_record.source_id, 7, None, gene_record.molecular_type)
+        return gene_record
+
+    monkeypatch.setattr(gt.Gff3, "generate_ensembl_gene_record", generate_invalid_record)
+
+    gff = parse_gff3(file_path, batch_validate=batch_validate)
+
+    # the identical row is dropped, the row of the same gene with other fields is kept
+    assert [(gene.id, gene.molecular_type) for gene in gff.gene_annotations] == [
+        ("ENSEMBL:ENSG00000223972", "transcribed_unprocessed_pseudogene"),
+        ("ENSEMBL:ENSG00000223972", "lncRNA"),
+        ("ENSEMBL:ENSG00000186092", "protein_coding"),
+    ]
+    assert [record.message for record in caplog.records if record.levelname == "ERROR"] == [
+        "Gene ENSEMBL:ENSG00000227232: No GeneAnnotation object created due to invalid fields: "
+        "name: Input should be a valid string; symbol: Input should be a valid string"
+    ]
+
+
+@pytest.mark.parametrize("path, content", [(ENSEMBL_PATH, ENSEMBL_CONTENT), (NCBI_PATH, ncbi_gff3_content())])
+def test_batch_validation_matches_single_validation(tmp_path, path, content):
+    file_path = write_gzip(tmp_path / path, [content])
+
+    single = parse_gff3(file_path)
+    batch = parse_gff3(file_path, batch_validate=True)
+
+    assert list(batch.gene_annotations) == list(single.gene_annotations)
+    assert [gene.model_dump() for gene in batch.gene_annotations.values()] == [
+        gene.model_dump() for gene in single.gene_annotations.values()
+    ]
+
+
+def test_parallel_parse_logs_worker_warnings_to_file(tmp_path, monkeypatch):
+    log_file = tmp_path / "gff3_translator.log"
+    monkeypatch.setattr(gt, "LOG_FILE_NAME", str(log_file))
+    # a feature row with a tenth column, which a worker warns about
+    content = ncbi_gff3_content(rows=10) + GFF3_CONTENT.splitlines()[1] + "\textra\n"
+    gff = gt.Gff3(
+        write_gzip(tmp_path / NCBI_PATH, [content]),
+        assembly_accession="GCF_000001405.40",
+        log_to_file=True,
+        show_progress=False,
+        taxonomy=TAXONOMY,
+    )
+    monkeypatch.setattr(gt, "PARSE_CHUNK_SIZE", 256)
+
+    gff.parse(workers=2)
+
+    line_num = content.count("\n")
+    assert f"WARNING: Line {line_num}: Features are expected 9 columns, found 10." in log_file.read_text()
@@ -0,0 +1,198 @@
+import functools
+import hashlib
+import http.server
+import json
+import os
+import threading
+import zipfile
+import pytest
+from click.testing import CliRunner
+from bkbit.utils import get_ncbi_taxonomy as gnt
+from bkbit.utils.taxonomy_store import TaxonomyStore
+from bkbit.utils.taxonomy_lineage import TaxonomyLineage
+
+NAMES_DMP = (
+    "1\t|\troot\t|\t\t|\tscientific name\t|\n"
+    "9606\t|\tHomo sapiens\t|\t\t|\tscientific name\t|\n"
+    "9606\t|\thuman\t|\t\t|\tgenbank common name\t|\n"
+    "9606\t|\tman\t|\t\t|\tcommon name\t|\n"
+    "10090\t|\tMus musculus\t|\t\t|\tscientific name\t|\n"
+    "10090\t|\thouse mouse\t|\t\t|\tgenbank common name\t|\n"
+    "10090\t|\tmouse\t|\t\t|\tgenbank common name\t|\n"
+    "10091\t|\tMus\t|\tMus <genus>\t|\tscientific name\t|\n"
+    "10092\t|\tHomo sapiens\t|\t\t|\tscientific name\t|\n"
+)
+NODES_DMP = (
+    "1\t|\t1\t|\tno rank\t|\t\t|\t8\t|\n"
+    "9606\t|\t1\t|\tspecies\t|\tHS\t|\t5\t|\n"
+    "10091\t|\t1\t|\tgenus\t|\t\t|\t4\t|\n"
+    "10090\t|\t10091\t|\tspecies\t|\tMM\t|\t4\t|\n"
+    "10092\t|\t10090\t|\tsubspecies\t|\tMM\t|\t4\t|\n"
+)
+
+
+@pytest.fixture()
+def taxdmp_url(tmp_path):
+    # serve a small taxdmp.zip from a local HTTP server
+    with zipfile.ZipFile(tmp_path / "taxdmp.zip", "w") as z:
+        z.writestr("names.dmp", NAMES_DMP)
+        z.writestr("nodes.dmp", NODES_DMP)
+    handler = functools.partial(
+        http.server.SimpleHTTPRequestHandler, directory=str(tmp_path)
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/taxdmp.zip"
+    server.shutdown()
+    server.server_close()
+
+
+def test_process_and_save_taxdmp(taxdmp_url, tmp_path):
+    output_dir = tmp_path / "ncbi_taxonomy"
+
+    gnt.process_and_save_taxdmp(taxdmp_url, str(output_dir))
+
+    taxid_to_scientific_name, taxid_to_common_name, scientific_name_to_taxid = (
+        gnt.parse_dmp_content(NAMES_DMP)
+    )
+    expected = {
+        "taxid_to_scientific_name": taxid_to_scientific_name,
+        "taxid_to_common_name": taxid_to_common_name,
+        "scientific_name_to_taxid": scientific_name_to_taxid,
+    }
+    assert taxid_to_common_name == {"9606": "human", "10090": "house mouse"}
+    assert scientific_name_to_taxid["Homo sapiens"] == "10092"
+    assert taxid_to_scientific_name["10091"] == "Mus <genus>"
+    store = TaxonomyStore(str(output_dir / "taxonomy.sqlite"))
+    for table, values in expected.items():
+        assert dict(store[table]) == values
+        # same entries in the same order as the dictionaries, i.e. in names.dmp order rather than key order
+        assert (output_dir / f"{table}.json").read_text() == json.dumps(values, indent=4)
+    lineage = TaxonomyLineage.load(str(output_dir / "taxonomy_lineage.npz"))
+    assert lineage.lineage(10092) == [1, 10091, 10090, 10092]
+    assert lineage.get_rank(10092) == "subspecies"
+    assert not list(output_dir.glob("*.zip"))
+
+
+def test_dump_table_to_json_matches_json_dump(tmp_path):
+    for table in ({}, {"9606": "Homo sapiens", "1": "café \"quoted\""}):
+        gnt.dump_table_to_json(table, str(tmp_path / "table.json"))
+
+        assert (tmp_path / "table.json").read_text() == json.dumps(table, indent=4)
+
+
+class CountingHandler(http.server.SimpleHTTPRequestHandler):
+    requests = []
+
+    def do_HEAD(self):
+        self.requests.append(("HEAD", self.path))
+        super().do_HEAD()
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path))
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def taxdmp_server(tmp_path):
+    # serve taxdmp.zip and taxdmp.zip.md5 from a local HTTP server, recording every request
+    directory = tmp_path / "www"
+    directory.mkdir()
+    CountingHandler.requests = []
+    handler = functools.partial(CountingHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield directory, f"http://127.0.0.1:{server.server_address[1]}/taxdmp.zip"
+    server.shutdown()
+    server.server_close()
+
+
+def publish_taxdmp(directory, names_dmp, md5=None):
+    with zipfile.ZipFile(directory / "taxdmp.zip", "w") as z:
+        z.writestr("names.dmp", names_dmp)
+        z.writestr("nodes.dmp", NODES_DMP)
+    checksum = md5 or hashlib.md5((directory / "taxdmp.zip").read_bytes()).hexdigest()
+    (directory / "taxdmp.zip.md5").write_text(f"{checksum}  taxdmp.zip\n")
+
+
+def test_refresh_taxonomy(taxdmp_server, tmp_path):
+    directory, url = taxdmp_server
+    output_dir = tmp_path / "ncbi_taxonomy"
+    metadata_path = str(tmp_path / "metadata.json")
+    publish_taxdmp(directory, NAMES_DMP)
+
+    assert gnt.refresh_taxonomy(url, str(output_dir), metadata_path)
+
+    # unchanged file: a single HEAD request
+    CountingHandler.requests = []
+    assert not gnt.refresh_taxonomy(url, str(output_dir), metadata_path)
+    assert CountingHandler.requests == [("HEAD", "/taxdmp.zip")]
+
+    # touched but identical file: the published checksum avoids the download
+    zip_path = directory / "taxdmp.zip"
+    os.utime(zip_path, (zip_path.stat().st_mtime + 10,) * 2)
+    CountingHandler.requests = []
+    assert not gnt.refresh_taxonomy(url, str(output_dir), metadata_path)
+    assert ("GET", "/taxdmp.zip") not in CountingHandler.requests
+    assert not gnt.refresh_taxonomy(url, str(output_dir), metadata_path)
+
+    # new taxdump: rebuilt
+    publish_taxdmp(directory, NAMES_DMP + "9685\t|\tFelis catus\t|\t\t|\tscientific name\t|\n")
+    os.utime(zip_path, (zip_path.stat().st_mtime + 20,) * 2)
+    assert gnt.refresh_taxonomy(url, str(output_dir), metadata_path)
+    assert TaxonomyStore(str(output_dir / "taxonomy.sqlite"))["taxid_to_scientific_name"]["9685"] == "Felis catus"
+    assert sorted(os.listdir(output_dir)) == sorted(gnt.OUTPUT_FILE_NAMES)
+
+
+def test_refresh_taxonomy_checksum_mismatch_keeps_outputs(taxdmp_server, tmp_path):
+    directory, url = taxdmp_server
+    output_dir = tmp_path / "ncbi_taxonomy"
+    metadata_path = str(tmp_path / "metadata.json")
+    publish_taxdmp(directory, NAMES_DMP)
+    gnt.refresh_taxonomy(url, str(output_dir), metadata_path)
+    before = (output_dir / "taxid_to_scientific_name.json").read_text()
+
+    publish_taxdmp(directory, "9685\t|\tFelis catus\t|\t\t|\tscientific name\t|\n", md5="0" * 32)
+    with pytest.raises(ValueError):
+        gnt.refresh_taxonomy(url, str(output_dir), metadata_path, force=True)
+
+    assert (output_dir / "taxid_to_scientific_name.json").read_text() == before
+    assert sorted(os.listdir(output_dir)) == sorted(gnt.OUTPUT_FILE_NAMES)
+
+
+def test_download_upgrades_json_only_taxonomy(taxdmp_server, tmp_path, monkeypatch):
+    directory, url = taxdmp_server
+    publish_taxdmp(directory, NAMES_DMP)
+    # the JSON files of a taxonomy downloaded by an earlier version, without store, lineage index or metadata
+    output_dir = tmp_path / "ncbi_taxonomy"
+    output_dir.mkdir()
+    tables = dict(zip(
+        ("taxid_to_scientific_name", "taxid_to_common_name", "scientific_name_to_taxid"),
+        gnt.parse_dmp_content(NAMES_DMP),
+    ))
+    for table, values in tables.items():
+        (output_dir / f"{table}.json").write_text(json.dumps(values))
+    monkeypatch.setattr(gnt, "NCBI_TAXON_URL", url)
+    monkeypatch.setattr(gnt, "OUTPUT_DIR_PATH", str(output_dir))
+    monkeypatch.setattr(gnt, "TAXONOMY_METADATA_PATH", str(output_dir / "taxdmp_metadata.json"))
+    monkeypatch.setattr(gnt, "SCIENTIFIC_NAME_TO_TAXONID_PATH", str(output_dir / "scientific_name_to_taxid.json"))
+    monkeypatch.setattr(gnt, "TAXON_SCIENTIFIC_NAME_PATH", str(output_dir / "taxid_to_scientific_name.json"))
+    monkeypatch.setattr(gnt, "TAXON_COMMON_NAME_PATH", str(output_dir / "taxid_to_common_name.json"))
+
+    result = CliRunner().invoke(gnt.download_ncbi_taxonomy, [])
+
+    assert result.exit_code == 0, result.output
+    assert "NCBI taxonomy updated" in result.output
+    assert sorted(os.listdir(output_dir)) == sorted(gnt.OUTPUT_FILE_NAMES + ("taxdmp_metadata.json",))
+    assert TaxonomyLineage.load(str(output_dir / "taxonomy_lineage.npz")).get_rank(10092) == "subspecies"
+
+    # the upgraded taxonomy is complete, so the next run only checks for changes
+    CountingHandler.requests = []
+    result = CliRunner().invoke(gnt.download_ncbi_taxonomy, [])
+    assert result.exit_code == 0, result.output
+    assert CountingHandler.requests == [("HEAD", "/taxdmp.zip")]
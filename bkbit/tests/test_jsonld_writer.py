@@ -0,0 +1,32 @@
+import gzip
+import json
+from bkbit.utils.jsonld_writer import iter_jsonld, write_jsonld
+
+CONTEXT = "https://example.org/context.jsonld"
+GRAPH = [
+    {"id": "NCBITaxon:9606", "full_name": "Homo sapiens"},
+    {"id": "NCBIGene:1", "synonym": ["A1B", "ABG"], "nested": {"a": None}},
+]
+
+
+def test_indented_output_matches_json_dumps():
+    text = "".join(iter_jsonld(CONTEXT, iter(GRAPH)))
+
+    assert text == json.dumps({"@context": CONTEXT, "@graph": GRAPH}, indent=2)
+
+
+def test_empty_graph():
+    text = "".join(iter_jsonld(CONTEXT, iter([])))
+
+    assert text == json.dumps({"@context": CONTEXT, "@graph": []}, indent=2)
+
+
+def test_compact_gzip_file(tmp_path):
+    output = tmp_path / "output.jsonld.gz"
+
+    write_jsonld(CONTEXT, iter(GRAPH), output=str(output), indent=None, compress=True)
+
+    with gzip.open(output, "rt", encoding="utf-8") as f:
+        text = f.read()
+    assert "\n" not in text.rstrip("\n")
+    assert json.loads(text) == {"@context": CONTEXT, "@graph": GRAPH}
@@ -0,0 +1,257 @@
+import functools
+import json
+import threading
+import time
+from collections import Counter
+import pytest
+from bkbit.data_translators import library_generation_translator as lgt
+from bkbit.data_translators.library_generation_translator import SpecimenPortal
+from bkbit.models import library_generation as lg
+from bkbit.utils.mock_nimp_portal import MockNimpPortal
+from bkbit.utils.nimp_api_endpoints import NimpClient
+from bkbit.utils.nimp_response_cache import NimpResponseCache
+
+# nhash ID: (category, parents)
+SPECIMENS = {
+    "DO-1": ("Donor", []),
+    "SL-1": ("Slab", ["DO-1"]),
+    "TI-1": ("Tissue", ["SL-1"]),
+    "TI-2": ("Tissue", ["SL-1"]),
+    "DI-1": ("Dissociated Cell Sample", ["TI-1", "TI-2"]),
+    "EN-1": ("Enriched Cell Sample", ["DI-1"]),
+    "BA-1": ("Barcoded Cell Sample", ["EN-1"]),
+    "AC-1": ("Amplified cDNA", ["BA-1"]),
+    "LI-1": ("Library", ["AC-1"]),
+    "LA-1": ("Library Aliquot", ["LI-1"]),
+    "LP-1": ("Library Pool", ["LA-1"]),
+}
+
+
+GRAPH = {
+    nhash_id: {"category": category, "parents": parents, "record": {}}
+    for nhash_id, (category, parents) in SPECIMENS.items()
+}
+
+
+@pytest.fixture()
+def mock_portal():
+    # like the portal, descendants responses only have has_parent edges with nhash_only=False
+    with MockNimpPortal(GRAPH, descendants_edges=False) as mock_portal:
+        yield mock_portal
+
+
+@pytest.fixture()
+def client(mock_portal):
+    client = NimpClient("token", base_url=mock_portal.base_url)
+    yield client
+    client.close()
+
+
+def derived_from(portal):
+    return {
+        nhash_id: getattr(obj, "was_derived_from", None) for nhash_id, obj in portal.generated_objects.items()
+    }
+
+
+def test_top_down_reads_parents_from_descendants(client, mock_portal):
+    portal = SpecimenPortal("token", client=client, concurrency=4)
+    portal.parse_nhash_id_top_down("SL-1")
+
+    # one full descendants call and one info call per node (N + 1) instead of 2N + 1
+    assert not mock_portal.descendants_edges
+    assert mock_portal.requests == {"descendants": 1, "info": 10}
+    assert set(portal.generated_objects) == set(SPECIMENS) - {"DO-1"}
+    assert portal.generated_objects["DI-1"].was_derived_from == ["TI-1", "TI-2"]
+    assert portal.generated_objects["SL-1"].was_derived_from == "DO-1"
+
+
+def test_top_down_falls_back_to_ancestors(client, mock_portal, monkeypatch):
+    portal = SpecimenPortal("token", client=client, concurrency=4)
+    portal.parse_nhash_id_top_down("SL-1")
+    expected = derived_from(portal)
+
+    # a descendants response without has_parent edges
+    get_descendants = client.get_descendants
+    monkeypatch.setattr(client, "get_descendants", lambda nhash_id, **kwargs: get_descendants(nhash_id))
+    mock_portal.reset_stats()
+    fallback = SpecimenPortal("token", client=client)
+    fallback.parse_nhash_id_top_down("SL-1")
+
+    assert mock_portal.requests == {"descendants": 1, "info": 10, "ancestors": 10}
+    assert derived_from(fallback) == expected
+    assert list(fallback.generated_objects) == list(portal.generated_objects)
+
+
+def test_bottom_up_fetches_each_ancestor_once(client, mock_portal):
+    portal = SpecimenPortal("token", client=client, concurrency=4)
+    portal.parse_nhash_id_bottom_up("DI-1")
+
+    assert mock_portal.requests == {"ancestors": 1, "info": 5}
+    assert set(portal.generated_objects) == {"DO-1", "SL-1", "TI-1", "TI-2", "DI-1"}
+    assert portal.generated_objects["DI-1"].was_derived_from == ["TI-1", "TI-2"]
+
+
+def test_second_run_is_served_from_the_cache(client, mock_portal, tmp_path):
+    client.cache = NimpResponseCache(str(tmp_path / "nimp_responses.sqlite"))
+    portal = SpecimenPortal("token", client=client)
+    portal.parse_nhash_id_top_down("SL-1")
+    expected = derived_from(portal)
+
+    mock_portal.reset_stats()
+    cached = SpecimenPortal("token", client=client)
+    cached.parse_nhash_id_top_down("SL-1")
+
+    assert not mock_portal.requests
+    assert derived_from(cached) == expected
+
+
+def test_offline_misses_are_not_fetched(client, mock_portal, tmp_path):
+    client.cache = NimpResponseCache(str(tmp_path / "nimp_responses.sqlite"), offline=True)
+    portal = SpecimenPortal("token", client=client)
+    portal.parse_nhash_id_bottom_up("DI-1")
+
+    assert not mock_portal.requests
+    assert portal.errors["DI-1"]["stage"] == "retrieve"
+    assert "is not in the NIMP response cache" in portal.errors["DI-1"]["message"]
+
+
+def test_shared_graph_fetches_each_node_once(client, mock_portal):
+    portal = SpecimenPortal("token", client=client, concurrency=4)
+    closures = portal.parse_nhash_ids(["LP-1", "LA-1", "DI-1"])
+
+    # one ancestors call per root and one info call per distinct node
+    assert mock_portal.requests == {"ancestors": 3, "info": 11}
+    assert portal.fetch_stats == {"roots": 3, "requested": 26, "fetched": 11, "saved": 15}
+
+    single = SpecimenPortal("token", client=client)
+    single.parse_nhash_id_bottom_up("DI-1")
+    assert portal.serialize_to_jsonld(nhash_ids=closures["DI-1"]) == single.serialize_to_jsonld()
+
+
+def test_shared_graph_retrieves_roots_concurrently(client, mock_portal, monkeypatch):
+    running, peak, lock = [0], [0], threading.Lock()
+    get_ancestors, get_data = client.get_ancestors, client.get_data
+
+    def slow_get_ancestors(nhash_id):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        if nhash_id == "DI-1":
+            raise ValueError("portal unavailable")
+        return get_ancestors(nhash_id)
+
+    def failing_get_data(nhash_id):
+        if nhash_id == "DI-1":
+            raise ValueError("record unavailable")
+        return get_data(nhash_id)
+
+    monkeypatch.setattr(client, "get_ancestors", slow_get_ancestors)
+    monkeypatch.setattr(client, "get_data", failing_get_data)
+    portal = SpecimenPortal("token", client=client, concurrency=4)
+    closures = portal.parse_nhash_ids(["LP-1", "LA-1", "DI-1"])
+
+    assert peak[0] == 3
+    assert list(closures) == ["LP-1", "LA-1"]
+    # DI-1 failed both as a root and as a node of LP-1 and LA-1, and keeps both errors
+    assert portal.retrieval_errors["DI-1"]["message"] == "Error retrieving ancestors: portal unavailable"
+    assert portal.errors["DI-1"]["stage"] == "fetch"
+
+
+def test_shared_graph_returns_error_reports(client, tmp_path, monkeypatch):
+    (tmp_path / "ids.txt").write_text("LA-1\nXX-1\nLA-1\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(lgt, "get_client", lambda jwt_token, pool_size: client)
+
+    reports = lgt.parse_multiple_nashids("token", "ids.txt", False, shared_graph=True)
+
+    assert reports[0] == reports[2] == {}
+    assert list(reports[1]) == ["XX-1"]
+    assert reports[1]["XX-1"]["stage"] == "retrieve"
+    assert json.loads((tmp_path / "XX-1.errors.json").read_text()) == reports[1]
+    assert (tmp_path / "LA-1.jsonld").exists()
+
+
+def test_thread_executor_writes_the_same_files(client, tmp_path, monkeypatch):
+    expected = {}
+    for nhash_id in ("LA-1", "DI-1"):
+        portal = SpecimenPortal("token", client=client)
+        portal.parse_nhash_id_bottom_up(nhash_id)
+        expected[nhash_id] = portal.serialize_to_jsonld()
+    (tmp_path / "ids.txt").write_text("LA-1\nDI-1\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(lgt, "NimpClient", functools.partial(NimpClient, base_url=client.base_url))
+
+    lgt.parse_multiple_nashids("token", "ids.txt", False, executor="thread", jobs=2, construction_workers=1)
+
+    for nhash_id, jsonld in expected.items():
+        assert (tmp_path / f"{nhash_id}.jsonld").read_text() == jsonld
+
+
+def test_portal_closes_only_the_clients_it_creates(client, tmp_path, monkeypatch):
+    closed = []
+    monkeypatch.setattr(NimpClient, "close", lambda self: closed.append(self))
+
+    with SpecimenPortal("token", concurrency=4, cache=NimpResponseCache(str(tmp_path / "cache.sqlite"))) as owner:
+        assert owner.client.pool_size == 16
+    with SpecimenPortal("token", client=client) as borrower:
+        pass
+    with SpecimenPortal("token", concurrency=64) as sharer:
+        # the shared client of a larger concurrency has a connection per concurrent fetch
+        assert sharer.client.pool_size == 64
+        assert sharer.client is not SpecimenPortal("token").client
+
+    assert closed == [owner.client]
+
+
+def test_mapping_plan_converts_record_values():
+    data = {
+        "id": "LI-1",
+        "category": "Library",
+        "record": {
+            "library_avg_size_bp": "350.0",
+            "library_concentration_nm": "2.5",
+            "library_prep_pass_fail": "Low QC",
+            "library_r1_r2_index": "not an index",
+        },
+    }
+    library = SpecimenPortal.generate_bican_object(data, ["AC-1"])
+
+    assert lgt.compile_mapping_plan(lg.Library) is lgt.compile_mapping_plan(lg.Library)
+    assert library.id == "NIMP:LI-1"
+    assert library.was_derived_from == "AC-1"
+    assert library.library_avg_size_bp == 350
+    assert library.library_concentration_nm == 2.5
+    assert library.library_prep_pass_fail == lg.LibraryPrepPassFail("Low QC")
+    assert library.R1_R2_index_name is None
+
+
+def test_record_without_parents_converts():
+    # an ancestors response lists the donor with an empty has_parent list
+    donor = SpecimenPortal.generate_bican_object({"id": "DO-1", "category": "Donor", "record": {}}, [])
+
+    assert donor.id == "NIMP:DO-1"
+    assert donor.was_derived_from is None
+
+
+def test_batch_validation_reports_failed_records(monkeypatch):
+    # the two Tissue records are validated in one batch as soon as the second one is mapped
+    monkeypatch.setattr(lgt, "VALIDATION_BATCH_SIZE", 2)
+    records = [
+        ("TI-1", {"id": "TI-1", "category": "Tissue", "record": {}}, ["SL-1"]),
+        ("LI-1", {"id": "LI-1", "category": "Library", "record": {"library_avg_size_bp": "350"}}, ["AC-1"]),
+        ("LI-2", {"id": "LI-2", "category": "Library", "record": {"library_avg_size_bp": "x"}}, ["AC-1"]),
+        ("TI-2", {"id": "TI-2", "category": "Tissue", "record": {}}, [12]),
+        ("XX-1", {"id": "XX-1", "category": "Unknown", "record": {}}, []),
+    ]
+    objects, errors = SpecimenPortal.generate_bican_objects(records)
+
+    assert list(objects) == ["TI-1", "LI-1"]
+    assert objects["LI-1"] == SpecimenPortal.generate_bican_object(records[1][1], ["AC-1"])
+    assert errors["LI-2"] == {"stage": "convert", "error": "ValueError", "message": "could not convert string to float: 'x'"}
+    assert errors["XX-1"]["message"] == "Unsupported category: Unknown."
+    assert errors["TI-2"]["stage"] == "validate"
+    assert [detail["loc"] for detail in errors["TI-2"]["details"]] == [["was_derived_from"]]
+    json.dumps(errors)
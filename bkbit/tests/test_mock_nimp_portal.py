@@ -0,0 +1,64 @@
+from collections import Counter
+import pytest
+import requests
+from bkbit.data_translators.library_generation_translator import SpecimenPortal
+from bkbit.utils.mock_nimp_portal import MockNimpPortal, SPECIMEN_LEVELS, build_specimen_graph
+from bkbit.utils.nimp_api_endpoints import NimpClient
+
+
+@pytest.fixture()
+def graph():
+    return build_specimen_graph(donors=2, fanout=2, pool_size=3)
+
+
+def test_synthetic_graph_shape(graph):
+    categories = Counter(node["category"] for node in graph.values())
+
+    assert categories["Donor"] == 2
+    assert categories["Slab"] == 4
+    assert all(categories[category] == 8 for category, _ in SPECIMEN_LEVELS[2:-1])
+    assert categories["Library Pool"] == 3
+    # the second pool combines the aliquots of both donors
+    assert graph["LP-000002"]["parents"] == ["LA-000004", "LA-000005", "LA-000006"]
+    assert all(parent in graph for node in graph.values() for parent in node["parents"])
+
+
+def test_endpoints_serve_the_graph(graph):
+    with MockNimpPortal(graph) as portal:
+        client = NimpClient("token", base_url=portal.base_url)
+        info = client.get_data("TI-000001")
+        ancestors = client.get_ancestors("LP-000002")
+        descendants = client.get_descendants("DO-000001")
+        full_descendants = client.get_descendants("DO-000001", nhash_only=False)
+        donors = client.get_donor(sex="Female")
+        with pytest.raises(requests.exceptions.HTTPError, match="404"):
+            client.get_data("XX-1")
+
+    assert info["data"] == {"id": "TI-000001", "category": "Tissue", "record": graph["TI-000001"]["record"]}
+    assert {"DO-000001", "DO-000002"} <= set(ancestors["data"])
+    assert ancestors["data"]["LP-000002"]["edges"]["has_parent"] == ["LA-000004", "LA-000005", "LA-000006"]
+    assert "LP-000002" in descendants["data"] and "DO-000002" not in descendants["data"]
+    assert descendants["data"]["DO-000001"]["edges"] == {"has_child": ["SL-000001", "SL-000002"]}
+    assert full_descendants["data"]["SL-000001"]["edges"]["has_parent"] == ["DO-000001"]
+    assert [donor["id"] for donor in donors["data"]] == ["DO-000002"]
+    assert portal.requests == {"ancestors": 1, "descendants": 2, "donors": 1, "info": 2}
+
+
+def test_errors_are_retried_until_they_run_out(graph):
+    with MockNimpPortal(graph, error_rate=1.0, seed=0) as portal:
+        client = NimpClient("token", base_url=portal.base_url, max_retries=1, backoff_factor=0)
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_data("DO-000001")
+
+    assert portal.requests == {"info": 2}
+    assert portal.failures == 2
+
+
+def test_top_down_traversal_of_a_synthetic_donor(graph):
+    with MockNimpPortal(graph, latency=0.001) as portal:
+        specimen_portal = SpecimenPortal("token", client=NimpClient("token", base_url=portal.base_url))
+        specimen_portal.parse_nhash_id_top_down("DO-000001")
+
+    assert len(specimen_portal.generated_objects) == 1 + 2 + 4 + 6 * 4 + 2
+    assert not specimen_portal.errors
+    assert portal.requests["descendants"] == 1
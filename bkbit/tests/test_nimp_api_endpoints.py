@@ -0,0 +1,94 @@
+import http.server
+import json
+import threading
+import time
+import pytest
+import requests
+from bkbit.utils.nimp_api_endpoints import NimpClient, TokenBucket
+
+
+class PortalHandler(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    requests = []
+    connections = set()
+    # status codes (and Retry-After values) to answer before succeeding
+    failures = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("Authorization")))
+        self.connections.add(self.client_address)
+        if self.failures:
+            status, retry_after = self.failures.pop(0)
+            self.send_response(status)
+            if retry_after is not None:
+                self.send_header("Retry-After", retry_after)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"data": {"path": self.path}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def client():
+    PortalHandler.requests, PortalHandler.connections, PortalHandler.failures = [], set(), []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PortalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = NimpClient(
+        "token", base_url=f"http://127.0.0.1:{server.server_address[1]}/", backoff_factor=0
+    )
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_connection(client):
+    for index in range(20):
+        assert client.get_data(f"LP-{index}")["data"]["path"] == f"/info?id=LP-{index}"
+    client.get_descendants("DO-1")
+    client.get_donor(species="human", sex=None)
+
+    assert len(PortalHandler.requests) == 22
+    assert len(PortalHandler.connections) == 1
+    assert all(authorization == "Bearer token" for _, authorization in PortalHandler.requests)
+    assert PortalHandler.requests[20][0] == "/descendants?id=DO-1&nhash_only=True"
+    assert PortalHandler.requests[21][0] == "/donors?species=human"
+
+
+def test_retries_on_429_and_5xx(client):
+    PortalHandler.failures = [(429, "0"), (503, None), (502, "Wed, 21 Oct 2015 07:28:00 GMT")]
+
+    assert client.get_data("LP-1")["data"]["path"] == "/info?id=LP-1"
+    assert len(PortalHandler.requests) == 4
+
+
+def test_gives_up_after_max_retries(client):
+    client.max_retries = 2
+    PortalHandler.failures = [(500, None)] * 5
+    with pytest.raises(requests.exceptions.HTTPError, match="LP-1. Status Code: 500"):
+        client.get_data("LP-1")
+    assert len(PortalHandler.requests) == 3
+
+    PortalHandler.failures = [(404, None)]
+    with pytest.raises(requests.exceptions.HTTPError, match="Status Code: 404"):
+        client.get_data("LP-2")
+    assert len(PortalHandler.requests) == 4
+
+
+def test_token_bucket_limits_the_rate():
+    bucket = TokenBucket(20, capacity=1)
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire()
+    # the first token is in the bucket, the other nine arrive every 1/20 s
+    assert time.monotonic() - start >= 0.4
@@ -0,0 +1,49 @@
+import multiprocessing
+import pickle
+import pytest
+from bkbit.utils.nimp_response_cache import NimpResponseCache
+
+RESPONSE = {"data": {"id": "DO-1", "category": "Donor", "record": {}}}
+
+
+@pytest.fixture()
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "nimp_responses.sqlite")
+
+
+def put_responses(cache, worker):
+    for i in range(50):
+        cache.put("info", f"DO-{worker}-{i}", {"data": {"id": f"DO-{worker}-{i}"}})
+
+
+def test_get_returns_stored_responses(cache_path):
+    cache = NimpResponseCache(cache_path)
+    cache.put("info", "DO-1", RESPONSE)
+
+    assert cache.get("info", "DO-1") == RESPONSE
+    assert cache.get("ancestors", "DO-1") is None
+    assert cache.connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_expired_responses(cache_path):
+    cache = NimpResponseCache(cache_path, ttls={"info": -1, "ancestors": None})
+    cache.put("info", "DO-1", RESPONSE)
+    cache.put("ancestors", "DO-1", RESPONSE)
+
+    assert cache.get("info", "DO-1") is None
+    assert cache.get("ancestors", "DO-1") == RESPONSE
+    # offline caches use responses regardless of their age
+    assert NimpResponseCache(cache_path, ttls={"info": -1}, offline=True).get("info", "DO-1") == RESPONSE
+    assert cache.purge_expired() == 1
+    assert NimpResponseCache(cache_path, offline=True).get("info", "DO-1") is None
+
+
+def test_processes_share_the_cache(cache_path):
+    cache = NimpResponseCache(cache_path)
+    with multiprocessing.Pool(4) as pool:
+        pool.starmap(put_responses, [(cache, worker) for worker in range(4)])
+
+    unpickled = pickle.loads(pickle.dumps(cache))
+    for worker in range(4):
+        for i in range(50):
+            assert unpickled.get("info", f"DO-{worker}-{i}") == {"data": {"id": f"DO-{worker}-{i}"}}
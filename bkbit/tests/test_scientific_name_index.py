@@ -0,0 +1,84 @@
+import pytest
+from bkbit.data_translators.genome_annotation_translator import Gff3
+from bkbit.utils.scientific_name_index import (
+    NameCandidate,
+    ScientificNameIndex,
+    SortedNameTable,
+    edit_distance,
+    normalize_scientific_name,
+)
+from bkbit.utils.taxonomy_store import TaxonomyStore, build_taxonomy_store
+
+SCIENTIFIC_NAME_TO_TAXID = {
+    "Homo sapiens": "9606",
+    "Mus": "10088",
+    "Mus musculus": "10090",
+    "Mus musculus castaneus": "10091",
+    "Mus musculus domesticus": "10092",
+    "Mus spretus": "10096",
+}
+
+
+@pytest.fixture(params=["memory", "store"])
+def index(request, tmp_path):
+    if request.param == "memory":
+        return ScientificNameIndex(SortedNameTable(SCIENTIFIC_NAME_TO_TAXID))
+    store_path = str(tmp_path / "taxonomy.sqlite")
+    build_taxonomy_store(store_path, {"scientific_name_to_taxid": SCIENTIFIC_NAME_TO_TAXID})
+    return ScientificNameIndex(TaxonomyStore(store_path)["normalized_name_to_taxid"])
+
+
+def test_normalize_and_edit_distance():
+    assert normalize_scientific_name(" Mus_musculus  CASTANEUS") == "mus musculus castaneus"
+    assert edit_distance("homo sapeins", "homo sapiens", 2) == 2
+    assert edit_distance("homo sapiens", "homo", 2) is None
+    assert edit_distance("mus spretus", "mus spretus", 0) == 0
+
+
+def test_lookups(index):
+    assert index.get("MUS_MUSCULUS") == "10090"
+    assert index.get("Mus caroli") is None
+    assert index.prefix("Mus_musculus_d") == [("mus musculus domesticus", "10092")]
+    assert index.prefix("mus", limit=2) == [("mus", "10088"), ("mus musculus", "10090")]
+    assert index.similar("Homo sapeins") == [("homo sapiens", "9606", 2)]
+
+
+def test_candidates(index):
+    assert index.candidates("mus_musculus_casteij") == [
+        NameCandidate("mus musculus castaneus", "10091", "prefix"),
+        NameCandidate("mus musculus", "10090", "broader"),
+        NameCandidate("mus", "10088", "broader"),
+    ]
+    assert index.candidates("homo sapeins") == [NameCandidate("homo sapiens", "9606", "similar")]
+    assert index.candidates("danio rerio") == []
+
+
+def ensembl_gff3(tmp_path, species):
+    # a local file laid out like the Ensembl FTP tree
+    directory = tmp_path / "pub" / "release-104" / "gff3" / species.lower()
+    directory.mkdir(parents=True)
+    gff_file = directory / f"{species}.GRCm39.104.gff3"
+    gff_file.write_text("##gff-version 3\n")
+    return str(gff_file)
+
+
+TAXONOMY = {
+    "scientific_name_to_taxonid": SCIENTIFIC_NAME_TO_TAXID,
+    "taxon_scientific_name": {taxid: name for name, taxid in SCIENTIFIC_NAME_TO_TAXID.items()},
+    "taxon_common_name": {taxid: name.lower() for name, taxid in SCIENTIFIC_NAME_TO_TAXID.items()},
+}
+
+
+def test_gff3_resolves_ensembl_names_ignoring_case(tmp_path):
+    gff3 = Gff3(ensembl_gff3(tmp_path, "Mus_Musculus"), "GCF_000001635.27", show_progress=False, taxonomy=TAXONOMY)
+
+    assert gff3.organism_taxon.id == "NCBITaxon:10090"
+
+
+def test_gff3_reports_candidates(tmp_path):
+    gff_file = ensembl_gff3(tmp_path, "Mus_musculus_casteij")
+    with pytest.raises(ValueError, match=r"Candidates: Mus musculus castaneus \(10091, prefix\)"):
+        Gff3(gff_file, "GCA_001624445.1", show_progress=False, taxonomy=TAXONOMY)
+
+    gff3 = Gff3(gff_file, "GCA_001624445.1", show_progress=False, taxonomy=TAXONOMY, taxon_id="10091")
+    assert gff3.organism_taxon.full_name == "Mus musculus castaneus"
@@ -0,0 +1,18 @@
+import sqlite3
+import threading
+from bkbit.utils.sqlite_connections import ThreadConnections
+
+
+def test_every_thread_gets_its_own_connection(tmp_path):
+    connections = ThreadConnections(lambda: sqlite3.connect(str(tmp_path / "file.sqlite")))
+    main = connections.get()
+    others = []
+    thread = threading.Thread(target=lambda: others.append(connections.get()))
+    thread.start()
+    thread.join()
+
+    assert connections.get() is main
+    assert others[0] is not main
+
+    connections.close()
+    assert connections.get() is not main
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from bkbit.utils.taxonomy_lineage import MISSING, TaxonomyLineage
+
+# root > cellular organisms > Mammalia > {Homo > Homo sapiens, Mus > Mus musculus > Mus musculus domesticus}
+NODES = [
+    (1, 1, "no rank"),
+    (131567, 1, "no rank"),
+    (40674, 131567, "class"),
+    (9605, 40674, "genus"),
+    (9606, 9605, "species"),
+    (10088, 40674, "genus"),
+    (10090, 10088, "species"),
+    (10092, 10090, "subspecies"),
+    (555, 554, "species"),  # parent missing from the dump
+]
+
+
+@pytest.fixture()
+def lineage():
+    return TaxonomyLineage.from_nodes(NODES)
+
+
+def test_parent_depth_and_rank(lineage):
+    assert lineage.get_parent(9606) == 9605
+    assert lineage.get_depth(1) == 0
+    assert lineage.get_depth(10092) == 5
+    assert lineage.get_rank(10090) == "species"
+    assert lineage.get_rank(12345) == ""
+    assert lineage.get_depth(555) == MISSING
+    assert lineage.get_depth([9606, -1, 10**9]).tolist() == [4, MISSING, MISSING]
+
+
+def test_ancestor_queries(lineage):
+    assert lineage.lineage(10092) == [1, 131567, 40674, 10088, 10090, 10092]
+    assert lineage.lineage(555) == []
+    assert lineage.ancestor_at_depth(10092, 2) == 40674
+    assert lineage.ancestor_at_depth(9605, 4) == MISSING
+    assert lineage.ancestor_at_rank([10092, 9606, 1, 555], "genus").tolist() == [10088, 9605, MISSING, MISSING]
+    assert lineage.ancestor_at_rank(10092, "order") == MISSING
+    assert lineage.is_descendant([9606, 10092, 40674, 555], 10088).tolist() == [False, True, False, False]
+    assert lineage.is_descendant(9606, 40674)
+
+
+def test_lca(lineage):
+    assert lineage.lca(9606, 10092) == 40674
+    assert lineage.lca(10092, 10090) == 10090
+    assert lineage.lca(9606, 555) == MISSING
+    assert lineage.lca(np.array([9606, 10092, 1]), 10090).tolist() == [40674, 10090, 1]
+
+
+def test_batch_queries_match_single_queries():
+    # a random tree that is deep enough to need several binary lifting levels
+    rng = np.random.default_rng(0)
+    nodes = [(1, 1, "no rank")] + [
+        (taxid, int(rng.integers(max(1, taxid - 20), taxid)), "no rank") for taxid in range(2, 2000)
+    ]
+    lineage = TaxonomyLineage.from_nodes(nodes)
+    parent = dict((taxid, parent) for taxid, parent, _ in nodes)
+
+    def ancestors(taxid):
+        path = [taxid]
+        while taxid != 1:
+            taxid = parent[taxid]
+            path.append(taxid)
+        return path
+
+    taxids, other_taxids = rng.integers(1, 2000, 200), rng.integers(1, 2000, 200)
+    for taxid, other_taxid, lca in zip(taxids, other_taxids, lineage.lca(taxids, other_taxids)):
+        assert lineage.lineage(int(taxid)) == ancestors(int(taxid))[::-1]
+        common = set(ancestors(int(taxid)))
+        assert lca == next(a for a in ancestors(int(other_taxid)) if a in common)
+
+
+def test_ancestor_at_rank_matches_walking_up():
+    # a deep random tree with a few ranks, including a rank on the root
+    rng = np.random.default_rng(1)
+    ranks = ["no rank", "genus", "species"]
+    nodes = [(1, 1, "genus")] + [
+        (taxid, int(rng.integers(max(1, taxid - 5), taxid)), ranks[int(rng.integers(0, 3))])
+        for taxid in range(2, 2000)
+    ]
+    lineage = TaxonomyLineage.from_nodes(nodes)
+    parent = dict((taxid, parent) for taxid, parent, _ in nodes)
+    rank = dict((taxid, rank) for taxid, _, rank in nodes)
+
+    def walk(taxid, wanted):
+        while rank[taxid] != wanted:
+            if taxid == 1:
+                return MISSING
+            taxid = parent[taxid]
+        return taxid
+
+    taxids = np.arange(1, 2000)
+    for wanted in ("genus", "species"):
+        assert lineage.ancestor_at_rank(taxids, wanted).tolist() == [walk(int(taxid), wanted) for taxid in taxids]
+    assert lineage.ancestor_at_rank(2500, "genus") == MISSING
+
+
+def test_save_and_load(lineage, tmp_path):
+    lineage.save(str(tmp_path / "taxonomy_lineage.npz"))
+    loaded = TaxonomyLineage.load(str(tmp_path / "taxonomy_lineage.npz"))
+
+    assert loaded.lineage(10092) == lineage.lineage(10092)
+    assert loaded.get_rank(10092) == "subspecies"
+    assert loaded.lca(9606, 10092) == 40674
@@ -0,0 +1,68 @@
+import os
+import threading
+import pytest
+from bkbit.utils.taxonomy_provider import TaxonomyProvider
+from bkbit.utils.taxonomy_store import TaxonomyStore, build_taxonomy_store
+
+TAXONOMY = {"taxon_scientific_name": {"9606": "Homo sapiens"}}
+
+
+def test_loads_once_across_threads():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return TAXONOMY
+
+    provider = TaxonomyProvider(loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is TAXONOMY for result in results)
+    stats = provider.stats()
+    assert (stats["hits"], stats["misses"]) == (7, 1)
+
+
+def test_failed_load_is_not_cached():
+    outcomes = [FileNotFoundError("taxonomy.sqlite"), TAXONOMY]
+
+    def loader():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    provider = TaxonomyProvider(loader)
+    with pytest.raises(FileNotFoundError):
+        provider.get()
+
+    assert provider.get() is TAXONOMY
+    provider.clear()
+    with pytest.raises(IndexError):
+        provider.get()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_preloaded_taxonomy_is_used_by_forked_workers(tmp_path):
+    store_path = str(tmp_path / "taxonomy.sqlite")
+    build_taxonomy_store(store_path, {"taxid_to_scientific_name": {"9606": "Homo sapiens"}})
+    provider = TaxonomyProvider(lambda: TaxonomyStore(store_path))
+    provider.preload(freeze=False)["taxid_to_scientific_name"]["9606"]  # opens a connection in the parent
+
+    pid = os.fork()
+    if pid == 0:
+        # the child reuses the loaded store, opens its own connection and starts with fresh statistics
+        ok = (
+            provider.get()["taxid_to_scientific_name"]["9606"] == "Homo sapiens"
+            and provider.stats()["misses"] == 0
+        )
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.WEXITSTATUS(status) == 0
+    assert provider.get()["taxid_to_scientific_name"]["9606"] == "Homo sapiens"
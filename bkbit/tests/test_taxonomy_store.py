@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import pytest
+from bkbit.utils.taxonomy_store import TaxonomyStore, build_taxonomy_store
+
+TABLES = {
+    "scientific_name_to_taxid": {"Homo sapiens": "9606", "Mus musculus": "10090"},
+    "taxid_to_scientific_name": {"9606": "Homo sapiens", "10090": "Mus musculus"},
+    "taxid_to_common_name": {"9606": "human"},
+}
+
+
+@pytest.fixture()
+def store(tmp_path):
+    store_path = str(tmp_path / "taxonomy.sqlite")
+    build_taxonomy_store(store_path, TABLES)
+    return TaxonomyStore(store_path)
+
+
+def test_tables_behave_like_the_dictionaries(store):
+    for name, table in TABLES.items():
+        assert dict(store[name]) == table
+        assert len(store[name]) == len(table)
+    assert store["taxid_to_scientific_name"]["9606"] == "Homo sapiens"
+    assert store["scientific_name_to_taxid"].get("Mus musculus") == "10090"
+    assert store["taxid_to_common_name"].get("10090") is None
+    with pytest.raises(KeyError):
+        store["taxid_to_common_name"]["10090"]
+
+
+def test_scan_keeps_row_order(tmp_path):
+    store_path = str(tmp_path / "taxonomy.sqlite")
+    rows = [
+        ("taxid_to_scientific_name", "10", "Cellvibrio"),
+        ("taxid_to_scientific_name", "2", "Bacteria"),
+        ("taxid_to_scientific_name", "10", "Cellvibrio <bacteria>"),
+        ("taxid_to_scientific_name", "100", "Ancylobacter aquaticus"),
+        ("scientific_name_to_taxid", "Bacteria", "2"),
+        ("scientific_name_to_taxid", "Archaea", "2157"),
+        ("scientific_name_to_taxid", "Bacteria", "3"),
+    ]
+    build_taxonomy_store(store_path, rows)
+    store = TaxonomyStore(store_path)
+
+    assert list(store["taxid_to_scientific_name"].scan()) == [
+        ("10", "Cellvibrio"),
+        ("2", "Bacteria"),
+        ("100", "Ancylobacter aquaticus"),
+    ]
+    assert list(store["scientific_name_to_taxid"].scan()) == [("Bacteria", "3"), ("Archaea", "2157")]
+    # items() is still the reusable view of a Mapping
+    items = store["scientific_name_to_taxid"].items()
+    assert list(items) == list(items) == [("Archaea", "2157"), ("Bacteria", "3")]
+
+
+def test_lookups_from_other_threads(store):
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(store["taxid_to_common_name"]["9606"])
+    )
+    thread.start()
+    thread.join()
+
+    assert results == ["human"]
+
+
+def test_rebuild_replaces_store(store):
+    build_taxonomy_store(store.store_path, {**TABLES, "taxid_to_common_name": {"10090": "house mouse"}})
+    store.close()
+
+    assert dict(store["taxid_to_common_name"]) == {"10090": "house mouse"}
+
+
+def test_missing_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        TaxonomyStore(str(tmp_path / "missing.sqlite"))
+
+
+def test_store_without_normalized_names_must_be_rebuilt(tmp_path):
+    store_path = str(tmp_path / "taxonomy.sqlite")
+    connection = sqlite3.connect(store_path)
+    for name in TABLES:
+        connection.execute(f"CREATE TABLE {name} (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+    connection.close()
+
+    with pytest.raises(ValueError, match="normalized_name_to_taxid.*bkbit download-ncbi-taxonomy --reload"):
+        TaxonomyStore(store_path)
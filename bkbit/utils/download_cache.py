@@ -0,0 +1,210 @@
+"""
+Content-addressed local cache for downloaded files.
+
+Files are stored once under their SHA256 checksum ("objects/<sha256><suffix>"), and every URL that was
+downloaded gets a small metadata file ("urls/<sha256 of the URL>.json") that records the object it points
+to, its MD5, SHA1 and SHA256 checksums, and the ETag and Last-Modified headers of the response. When online,
+cached URLs are revalidated with a conditional request; when offline, cached files are used as they are.
+
+Example usage:
+    from bkbit.utils.download_cache import DownloadCache
+
+    cache = DownloadCache("/path/to/cache")
+    file_path, hash_values = cache.fetch("https://ftp.ensembl.org/pub/release-104/gff3/...gff3.gz")
+
+Classes:
+    DownloadCache: A content-addressed on-disk cache for files downloaded from URLs.
+
+Attributes:
+    DEFAULT_CACHE_DIR (str): The default cache directory, "$BKBIT_CACHE_DIR" or "~/.cache/bkbit".
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import PurePosixPath
+from urllib.parse import urlparse
+from bkbit.utils.load_json import load_json
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "BKBIT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bkbit")
+)
+BLOCK_SIZE = 1024 * 1024  # 1 Megabyte
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCache:
+    """
+    A content-addressed on-disk cache for files downloaded from URLs.
+
+    Attributes:
+        cache_dir (str): The root directory of the cache.
+        offline (bool): If True, no network requests are made and only cached files are returned.
+
+    Methods:
+        lookup(url):
+            Returns the path and checksums of the cached file for a URL, or None if it is not cached.
+
+        fetch(url, progress_bar=None):
+            Returns the path and checksums of the file for a URL, downloading it if it is missing or outdated.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.urls_dir = os.path.join(cache_dir, "urls")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.urls_dir, exist_ok=True)
+
+    def __metadata_path(self, url):
+        return os.path.join(
+            self.urls_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+        )
+
+    def __object_path(self, sha256, url):
+        # Keep the last extensions of the URL (e.g. ".gff3.gz") so callers can tell how to read the file
+        suffix = "".join(PurePosixPath(urlparse(url).path).suffixes[-2:])
+        return os.path.join(self.objects_dir, sha256 + suffix)
+
+    def __read_metadata(self, url):
+        metadata_path = self.__metadata_path(url)
+        if not os.path.isfile(metadata_path):
+            return None
+        metadata = load_json(metadata_path)
+        if not os.path.isfile(metadata["path"]):
+            return None
+        return metadata
+
+    def lookup(self, url):
+        """
+        Returns the path and checksums of the cached file for a URL without making any network request.
+
+        Args:
+            url (str): The URL of the file.
+
+        Returns:
+            tuple or None: The path to the cached file and a dictionary with its MD5, SHA256 and SHA1 checksums,
+            or None if the URL is not cached.
+        """
+        metadata = self.__read_metadata(url)
+        if metadata is None:
+            return None
+        return metadata["path"], metadata["checksums"]
+
+    def fetch(self, url, progress_bar=None):
+        """
+        Returns the path and checksums of the file for a URL.
+
+        Cached files are revalidated with If-None-Match / If-Modified-Since and only downloaded again if they
+        changed. If the server cannot be reached, the cached file is used. In offline mode no request is made.
+
+        Args:
+            url (str): The URL of the file.
+            progress_bar (tqdm, optional): A progress bar to update with the number of bytes downloaded.
+
+        Returns:
+            tuple: The path to the cached file and a dictionary with its MD5, SHA256 and SHA1 checksums.
+
+        Raises:
+            FileNotFoundError: If the cache is offline and the URL is not cached.
+            urllib.error.URLError: If the file is not cached and cannot be downloaded.
+        """
+        metadata = self.__read_metadata(url)
+        if self.offline:
+            if metadata is None:
+                raise FileNotFoundError(
+                    f"{url} is not in the download cache {self.cache_dir} and the cache is offline."
+                )
+            return metadata["path"], metadata["checksums"]
+
+        headers = {}
+        if metadata is not None:
+            if metadata.get("etag"):
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                headers["If-Modified-Since"] = metadata["last_modified"]
+        try:
+            response = urllib.request.urlopen(urllib.request.Request(url, headers=headers))
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and metadata is not None:
+                return metadata["path"], metadata["checksums"]
+            raise
+        except urllib.error.URLError as e:
+            if metadata is None:
+                raise
+            logger.warning(
+                "Could not revalidate %s (%s). Using the cached copy.", url, e.reason
+            )
+            return metadata["path"], metadata["checksums"]
+
+        with response:
+            return self.__store(url, response, progress_bar)
+
+    def __store(self, url, response, progress_bar=None):
+        """
+        Downloads a response into the cache and records the metadata of its URL.
+
+        Args:
+            url (str): The URL of the file.
+            response (http.client.HTTPResponse): The response to download.
+            progress_bar (tqdm, optional): A progress bar to update with the number of bytes downloaded.
+
+        Returns:
+            tuple: The path to the cached file and a dictionary with its MD5, SHA256 and SHA1 checksums.
+        """
+        hashers = {
+            "MD5": hashlib.md5(),
+            "SHA256": hashlib.sha256(),
+            "SHA1": hashlib.sha1(),
+        }
+        if progress_bar is not None:
+            progress_bar.total = int(response.headers.get("content-length", 0)) or None
+        with tempfile.NamedTemporaryFile(dir=self.objects_dir, delete=False) as f:
+            temp_path = f.name
+            try:
+                while True:
+                    data = response.read(BLOCK_SIZE)
+                    if not data:
+                        break
+                    f.write(data)
+                    for hasher in hashers.values():
+                        hasher.update(data)
+                    if progress_bar is not None:
+                        progress_bar.update(len(data))
+            except BaseException:
+                # The cache is never cleaned up, so a partial download must not be left behind
+                f.close()
+                os.remove(temp_path)
+                raise
+        checksums = {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+        # Files with the same content are stored once; os.replace makes the new file visible atomically. The
+        # absolute path keeps resolving when a cache in a relative directory is used from another directory.
+        object_path = os.path.abspath(self.__object_path(checksums["SHA256"], url))
+        if os.path.isfile(object_path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, object_path)
+
+        metadata = {
+            "url": url,
+            "path": object_path,
+            "checksums": checksums,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "downloaded_at": datetime.now().isoformat(),
+        }
+        metadata_path = self.__metadata_path(url)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.urls_dir, delete=False, encoding="utf-8"
+        ) as f:
+            json.dump(metadata, f, indent=4)
+        os.replace(f.name, metadata_path)
+        return object_path, checksums
@@ -1,17 +1,32 @@
 """
-This script downloads a zip file containing taxonomic data from a given URL, extracts and processes 
-the content of the 'names.dmp' file in memory, and saves the parsed data into JSON files. The script
-includes three main functions:
+This script downloads a zip file containing taxonomic data from a given URL, parses the 'names.dmp' file
+line by line, and saves the parsed data into an indexed taxonomy store (see bkbit.utils.taxonomy_store) and
+into JSON files. The zip file is streamed to disk and names.dmp is read straight from the archive, so neither is
+ever held in memory as a whole. The script includes these main functions:
 
-1. download_and_extract_zip_in_memory(url):
-    Downloads a zip file from the given URL and extracts the content of the 'names.dmp' file in memory.
+1. download_zip_to_file(url, file_path):
+    Streams a zip file from the given URL to a local file in chunks.
 
-2. parse_dmp_content(dmp_content):
+2. iter_names_dmp(zip_path):
+    Yields the tax_id, name, unique name and name class of every line of the 'names.dmp' file in a zip file.
+
+3. iter_nodes_dmp(zip_path):
+    Yields the tax_id, parent tax_id and rank of every line of the 'nodes.dmp' file in a zip file.
+
+4. iter_taxonomy_rows(names):
+    Yields the (table, key, value) rows of the taxonomy store for the lines of a names.dmp file.
+
+5. parse_dmp_content(dmp_content):
     Parses the content of a DMP file and extracts taxonomic information into dictionaries.
 
-3. process_and_save_taxdmp_in_memory(url, output_dir):
+6. process_and_save_taxdmp(url, output_dir, expected_md5=None):
     Downloads and processes the taxdump file from the given URL, and saves the parsed data into 
-    separate JSON files in the specified output directory.
+    a taxonomy store, a lineage index (see bkbit.utils.taxonomy_lineage) and separate JSON files in the
+    specified output directory.
+
+7. refresh_taxonomy(url, output_dir, metadata_path, force=False):
+    Rebuilds the taxonomy only if the taxdump file changed since the last download, using the ETag and
+    Last-Modified headers and the taxdmp.zip.md5 file that NCBI publishes next to it.
 
 Usage:
     The script can be executed as a standalone program. Modify the URL and output directory as needed.
@@ -21,9 +36,14 @@ import json
 import zipfile
 import io
 import os
+import tempfile
+import hashlib
+from datetime import datetime
 import requests
 import pkg_resources
 import click
+from bkbit.utils.taxonomy_store import TaxonomyStore, build_taxonomy_store
+from bkbit.utils.taxonomy_lineage import TaxonomyLineage
 
 NCBI_TAXON_URL = "https://ftp.ncbi.nih.gov/pub/taxonomy/taxdmp.zip"
 OUTPUT_DIR_NAME = "ncbi_taxonomy"
@@ -31,35 +51,199 @@ OUTPUT_DIR_PATH = pkg_resources.resource_filename(__name__, OUTPUT_DIR_NAME)
 SCIENTIFIC_NAME_TO_TAXONID_PATH = pkg_resources.resource_filename(__name__, "ncbi_taxonomy/scientific_name_to_taxid.json")
 TAXON_SCIENTIFIC_NAME_PATH = pkg_resources.resource_filename(__name__, "ncbi_taxonomy/taxid_to_scientific_name.json")
 TAXON_COMMON_NAME_PATH = pkg_resources.resource_filename(__name__, "ncbi_taxonomy/taxid_to_common_name.json")
+TAXONOMY_STORE_PATH = pkg_resources.resource_filename(__name__, "ncbi_taxonomy/taxonomy.sqlite")
+TAXONOMY_LINEAGE_PATH = pkg_resources.resource_filename(__name__, "ncbi_taxonomy/taxonomy_lineage.npz")
+TAXONOMY_METADATA_PATH = pkg_resources.resource_filename(__name__, "ncbi_taxonomy/taxdmp_metadata.json")
+OUTPUT_FILE_NAMES = (
+    "taxonomy.sqlite",
+    "taxonomy_lineage.npz",
+    "taxid_to_common_name.json",
+    "taxid_to_scientific_name.json",
+    "scientific_name_to_taxid.json",
+)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 Megabyte
+# names.dmp and nodes.dmp fields are separated by "\t|\t" and every line ends with "\t|\n"
+NAMES_DMP_FIELD_SEPARATOR = "\t|\t"
+NAMES_DMP_LINE_END = "\t|\r\n"
+
+
+
+def download_zip_to_file(url, file_path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Streams a zip file from the given URL to a local file in chunks.
 
+    Args:
+        url (str): The URL of the zip file to download.
+        file_path (str): The path of the local file.
+        chunk_size (int, optional): The number of bytes written at a time. Defaults to DOWNLOAD_CHUNK_SIZE.
 
+    Returns:
+        dict: The "etag" and "last_modified" headers of the response and the "md5" checksum of the file.
 
-def download_and_extract_zip_in_memory(url):
+    Raises:
+        requests.exceptions.HTTPError: If the file download fails with a non-200 status code.
+    """
+    md5_hash = hashlib.md5()
+    with requests.get(url, stream=True, timeout=30) as response:
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(
+                f"Failed to download file, status code: {response.status_code}"
+            )
+        with open(file_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                md5_hash.update(chunk)
+        return {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "md5": md5_hash.hexdigest(),
+        }
+
+
+def get_remote_metadata(url):
     """
-    Downloads a zip file from the given URL and extracts the content of the 'names.dmp' file in memory.
+    Returns the ETag and Last-Modified headers of a file with a HEAD request, without downloading it.
 
     Args:
-        url (str): The URL of the zip file to download.
+        url (str): The URL of the file.
 
     Returns:
-        str: The content of the 'names.dmp' file as a string.
+        dict: The "etag" and "last_modified" headers of the file. Headers the server does not send are None.
 
     Raises:
-        requests.exceptions.HTTPError: If the file download fails with a non-200 status code.
+        requests.exceptions.HTTPError: If the request fails with a non-200 status code.
     """
-    # Download the file
-    response = requests.get(url, timeout=30)
-    if response.status_code == 200:
-        # Unzip the file in memory
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-            # Extract names.dmp file content into memory
-            with z.open("names.dmp") as names_dmp_file:
-                names_dmp_content = names_dmp_file.read().decode("utf-8")
-                return names_dmp_content
-    else:
+    response = requests.head(url, timeout=30, allow_redirects=True)
+    if response.status_code != 200:
         raise requests.exceptions.HTTPError(
-            f"Failed to download file, status code: {response.status_code}"
+            f"Failed to check file, status code: {response.status_code}"
         )
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def get_remote_md5(url):
+    """
+    Returns the MD5 checksum that NCBI publishes next to a file, in "<url>.md5".
+
+    Args:
+        url (str): The URL of the file.
+
+    Returns:
+        str or None: The hexadecimal MD5 checksum, or None if no checksum file is published.
+    """
+    response = requests.get(url + ".md5", timeout=30)
+    if response.status_code != 200 or not response.text.strip():
+        return None
+    # The checksum file has the md5sum format "<checksum>  <file name>"
+    return response.text.split()[0].lower()
+
+
+def is_unchanged(local_metadata, remote_metadata):
+    """
+    Checks whether the validators of a remote file match the ones recorded for the local copy.
+
+    Args:
+        local_metadata (dict): The recorded "etag" and "last_modified" values of the local copy.
+        remote_metadata (dict): The current "etag" and "last_modified" values of the remote file.
+
+    Returns:
+        bool: True if the ETag, or the Last-Modified date when there is no ETag, is known and unchanged.
+    """
+    if local_metadata.get("etag") and remote_metadata.get("etag"):
+        return local_metadata["etag"] == remote_metadata["etag"]
+    return bool(local_metadata.get("last_modified")) and (
+        local_metadata.get("last_modified") == remote_metadata.get("last_modified")
+    )
+
+
+def write_json_atomically(data, file_path):
+    """
+    Writes data to a JSON file through a temporary file, so readers never see a partially written file.
+
+    Args:
+        data (dict): The data to write.
+        file_path (str): The path of the JSON file.
+
+    Returns:
+        None
+    """
+    fd, temp_path = tempfile.mkstemp(suffix=".json", dir=os.path.dirname(file_path))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    os.replace(temp_path, file_path)
+
+
+def iter_names_dmp(zip_path):
+    """
+    Yields the fields of every line of the 'names.dmp' file in a taxdump zip file, reading the archive member
+    as a stream.
+
+    Taxonomy names file (names.dmp):
+        tax_id-- the id of node associated with this name
+        name_txt-- name itself
+        unique name-- the unique variant of this name if name not unique
+        name class-- (synonym, common name, ...)
+
+    Args:
+        zip_path (str): The path to the taxdump zip file.
+
+    Yields:
+        tuple[str, str, str, str]: The tax_id, name, unique name and name class of each line.
+    """
+    with zipfile.ZipFile(zip_path) as z:
+        with z.open("names.dmp") as names_dmp_file:
+            for line in io.TextIOWrapper(names_dmp_file, encoding="utf-8"):
+                # Split off only the four fields; the rest of the line is the line terminator
+                taxid, name, unique_name, name_class = line.split(
+                    NAMES_DMP_FIELD_SEPARATOR, 3
+                )
+                yield taxid, name.strip(), unique_name.strip(), name_class.rstrip(
+                    NAMES_DMP_LINE_END
+                )
+
+
+def iter_nodes_dmp(zip_path):
+    """
+    Yields the tax_id, parent tax_id and rank of every line of the 'nodes.dmp' file in a taxdump zip file,
+    reading the archive member as a stream.
+
+    Args:
+        zip_path (str): The path to the taxdump zip file.
+
+    Yields:
+        tuple[int, int, str]: The tax_id, parent tax_id and rank of each line.
+    """
+    with zipfile.ZipFile(zip_path) as z:
+        with z.open("nodes.dmp") as nodes_dmp_file:
+            for line in io.TextIOWrapper(nodes_dmp_file, encoding="utf-8"):
+                taxid, parent_taxid, rank, _ = line.split(NAMES_DMP_FIELD_SEPARATOR, 3)
+                yield int(taxid), int(parent_taxid), rank
+
+
+def iter_taxonomy_rows(names):
+    """
+    Yields the taxonomy store rows for the lines of a names.dmp file.
+
+    Only scientific names (or their unique variant) and GenBank common names are kept. Duplicate taxids are
+    resolved by the store, which keeps the first name of a taxid and the last taxid of a scientific name.
+
+    Args:
+        names (Iterable[tuple[str, str, str, str]]): The tax_id, name, unique name and name class of each line.
+
+    Yields:
+        tuple[str, str, str]: The table, key and value of each row.
+    """
+    for taxid, name, unique_name, name_class in names:
+        if name_class == "scientific name":
+            if unique_name:
+                name = unique_name
+            yield "taxid_to_scientific_name", taxid, name
+            yield "scientific_name_to_taxid", name, taxid
+        elif name_class == "genbank common name":
+            yield "taxid_to_common_name", taxid, name
 
 
 def parse_dmp_content(dmp_content):
@@ -75,78 +259,153 @@ def parse_dmp_content(dmp_content):
             - taxid_to_common_name: A dictionary mapping taxonomic IDs to common names.
             - scientific_name_to_taxid: A dictionary mapping scientific names to taxonomic IDs.
     """
-    taxid_to_scientific_name = {}
-    taxid_to_common_name = {}
-    scientific_name_to_taxid = {}
-
-    for line in dmp_content.strip().split("\n"):
-        # Split the line by the delimiter '|'
-        parts = line.strip().split("|")
-
-        # Remove leading and trailing whitespace from each part
-        parts = [part.strip() for part in parts]
-        # Taxonomy names file (names.dmp):
-        #   tax_id-- the id of node associated with this name
-        #   name_txt-- name itself
-        #   unique name-- the unique variant of this name if name not unique
-        #   name class-- (synonym, common name, ...)
-        taxid = parts[0]
-        name = parts[1]
-        unique_name = parts[2]
-        name_class = parts[3]
-
-        # Create a dictionary with the parsed data
-        if name_class == "scientific name" and taxid not in taxid_to_scientific_name:
-            if unique_name:
-                taxid_to_scientific_name[taxid] = unique_name
-                scientific_name_to_taxid[unique_name] = taxid
-            else:
-                taxid_to_scientific_name[taxid] = name
-                scientific_name_to_taxid[name] = taxid
-        elif name_class == "genbank common name" and taxid not in taxid_to_common_name:
-            taxid_to_common_name[taxid] = name
-    return taxid_to_scientific_name, taxid_to_common_name, scientific_name_to_taxid
+    tables = {
+        "taxid_to_scientific_name": {},
+        "taxid_to_common_name": {},
+        "scientific_name_to_taxid": {},
+    }
+    names = (
+        tuple(part.strip() for part in line.split("|")[:4])
+        for line in dmp_content.strip().split("\n")
+    )
+    for table, key, value in iter_taxonomy_rows(names):
+        if table == "scientific_name_to_taxid":
+            tables[table][key] = value
+        else:
+            tables[table].setdefault(key, value)
+    return (
+        tables["taxid_to_scientific_name"],
+        tables["taxid_to_common_name"],
+        tables["scientific_name_to_taxid"],
+    )
+
 
+def dump_table_to_json(table, file_path):
+    """
+    Writes a table of a taxonomy store to a JSON file one entry at a time, in the same format and entry order as
+    json.dump with indent=4 of the dictionary the table was built from.
+
+    Args:
+        table (TaxonomyTable or Mapping[str, str]): The table to write.
+        file_path (str): The path of the JSON file.
 
-def process_and_save_taxdmp_in_memory(url, output_dir):
+    Returns:
+        None
+    """
+    encode = json.encoder.encode_basestring_ascii  # what json.dump uses for strings, without its per-call overhead
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("{")
+        separator = "\n    "
+        entries = table.scan() if hasattr(table, "scan") else table.items()
+        for key, value in entries:
+            f.write(separator + encode(key) + ": " + encode(value))
+            separator = ",\n    "
+        f.write("\n}" if separator != "\n    " else "}")
+
+
+def process_and_save_taxdmp(url, output_dir, expected_md5=None):
     """
     Downloads and processes the taxdump file from the given URL,
-    and saves the parsed data into separate JSON files in the specified output directory.
+    and saves the parsed data into a taxonomy store and separate JSON files in the specified output directory.
+
+    All files are built in a staging directory and then moved into place one by one with os.replace, so a
+    translator that reads the taxonomy at the same time sees either the old or the new version of every file,
+    never a partially written one.
 
     Args:
         url (str): The URL of the taxdump file to download and process.
         output_dir (str): The directory where the parsed data will be saved.
+        expected_md5 (str, optional): The MD5 checksum that the downloaded file must have. Defaults to None.
 
     Returns:
-        None
+        dict: The "etag" and "last_modified" headers and the "md5" checksum of the downloaded taxdump file.
+
+    Raises:
+        ValueError: If the checksum of the downloaded file does not match expected_md5.
     """
     # Ensure the output directory exists
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # Step 1: Download and unzip the folder in memory
-    names_dmp_content = download_and_extract_zip_in_memory(url)
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix=".staging-") as staging_dir:
+        # Step 1: Stream the zip file to disk
+        zip_path = os.path.join(staging_dir, "taxdmp.zip")
+        metadata = download_zip_to_file(url, zip_path)
+        if expected_md5 is not None and metadata["md5"] != expected_md5:
+            raise ValueError(
+                f"Checksum of {url} is {metadata['md5']}, expected {expected_md5}."
+            )
+
+        # Step 2: Parse names.dmp line by line into the taxonomy store
+        store_path = os.path.join(staging_dir, "taxonomy.sqlite")
+        build_taxonomy_store(store_path, iter_taxonomy_rows(iter_names_dmp(zip_path)))
+
+        # Step 3: Index the parents and ranks of nodes.dmp
+        TaxonomyLineage.from_nodes(iter_nodes_dmp(zip_path)).save(
+            os.path.join(staging_dir, "taxonomy_lineage.npz")
+        )
+        os.remove(zip_path)
+
+        # Step 4: Save the tables of the store to JSON files
+        store = TaxonomyStore(store_path)
+        try:
+            for table, file_name in (
+                ("taxid_to_common_name", "taxid_to_common_name.json"),
+                ("taxid_to_scientific_name", "taxid_to_scientific_name.json"),
+                ("scientific_name_to_taxid", "scientific_name_to_taxid.json"),
+            ):
+                dump_table_to_json(store[table], os.path.join(staging_dir, file_name))
+        finally:
+            store.close()
+
+        # Step 5: Swap the new files in
+        for file_name in OUTPUT_FILE_NAMES:
+            os.replace(
+                os.path.join(staging_dir, file_name), os.path.join(output_dir, file_name)
+            )
+    return metadata
+
+
+def refresh_taxonomy(url, output_dir, metadata_path, force=False):
+    """
+    Downloads and rebuilds the taxonomy only if the taxdump file changed since the last download.
 
-    # Step 2: Parse the names.dmp content
-    taxid_to_scientific_name, taxid_to_common_name, scientific_name_to_taxid = (
-        parse_dmp_content(names_dmp_content)
-    )
+    The ETag and Last-Modified headers of the last download are compared with a HEAD request first. If they
+    differ, the published MD5 checksum decides, so a file that was only touched is not processed again.
 
-    # Step 3: Save the dictionaries to files
-    with open(
-        os.path.join(output_dir, "taxid_to_common_name.json"), "w", encoding="utf-8"
-    ) as f:
-        json.dump(taxid_to_common_name, f, indent=4)
+    Args:
+        url (str): The URL of the taxdump file.
+        output_dir (str): The directory where the parsed data is saved.
+        metadata_path (str): The path of the JSON file that records the headers and checksum of the last download.
+        force (bool, optional): If True, the taxonomy is rebuilt without checking for changes. Defaults to False.
 
-    with open(
-        os.path.join(output_dir, "taxid_to_scientific_name.json"), "w", encoding="utf-8"
-    ) as f:
-        json.dump(taxid_to_scientific_name, f, indent=4)
+    Returns:
+        bool: True if the taxonomy was rebuilt, False if it was already up to date.
+    """
+    local_metadata = load_json(metadata_path) if os.path.exists(metadata_path) else None
+    outputs_exist = all(
+        os.path.exists(os.path.join(output_dir, file_name))
+        for file_name in OUTPUT_FILE_NAMES
+    )
+    remote_md5 = None
+    if not force and outputs_exist and local_metadata and local_metadata.get("url") == url:
+        remote_metadata = get_remote_metadata(url)
+        if is_unchanged(local_metadata, remote_metadata):
+            return False
+        remote_md5 = get_remote_md5(url)
+        if remote_md5 is not None and remote_md5 == local_metadata.get("md5"):
+            # Same content with new headers: remember the headers, nothing to rebuild
+            write_json_atomically({**local_metadata, **remote_metadata}, metadata_path)
+            return False
+    else:
+        remote_md5 = get_remote_md5(url)
 
-    with open(
-        os.path.join(output_dir, "scientific_name_to_taxid.json"), "w", encoding="utf-8"
-    ) as f:
-        json.dump(scientific_name_to_taxid, f, indent=4)
+    metadata = process_and_save_taxdmp(url, output_dir, expected_md5=remote_md5)
+    write_json_atomically(
+        {"url": url, **metadata, "updated_at": datetime.now().isoformat()},
+        metadata_path,
+    )
+    return True
 
 
     
@@ -165,23 +424,31 @@ def load_json(file_path):
         return json.load(f)
 
 @click.command()
-@click.option("--reload", '-r', is_flag=True, help="Reload NCBI taxonomy data")
+@click.option("--reload", '-r', is_flag=True, help="Reload NCBI taxonomy data, even if it did not change")
 
 def download_ncbi_taxonomy(reload=False):
 
     """
-    Load JSON data from a file.
+    Download the NCBI taxonomy, or rebuild it if NCBI published a new taxdump since the last download.
 
     Args:
-        file_path (str): The path to the JSON file.
+        reload (bool): Rebuild the taxonomy even if the taxdump did not change.
 
     Returns:
-        dict: The loaded JSON data as a dictionary.
+        None
     """
-    if reload or not os.path.exists(SCIENTIFIC_NAME_TO_TAXONID_PATH) or not os.path.exists(TAXON_SCIENTIFIC_NAME_PATH) or not os.path.exists(TAXON_COMMON_NAME_PATH):
-        process_and_save_taxdmp_in_memory(NCBI_TAXON_URL, OUTPUT_DIR_PATH)
+    json_files_exist = os.path.exists(SCIENTIFIC_NAME_TO_TAXONID_PATH) and os.path.exists(TAXON_SCIENTIFIC_NAME_PATH) and os.path.exists(TAXON_COMMON_NAME_PATH)
+    if not reload and json_files_exist:
+        # Already downloaded: only rebuild if NCBI published a new taxdump. A taxonomy downloaded by an earlier
+        # version lacks the store, the lineage index or the metadata, so refresh_taxonomy rebuilds all outputs.
+        try:
+            updated = refresh_taxonomy(NCBI_TAXON_URL, OUTPUT_DIR_PATH, TAXONOMY_METADATA_PATH)
+        except requests.exceptions.RequestException as e:
+            print(f"Could not check for NCBI taxonomy updates, keeping the downloaded taxonomy: {e}")
+            return
+        print("NCBI taxonomy updated" if updated else "PRINT already downloaded")
     else:
-        print("PRINT already downloaded")
+        refresh_taxonomy(NCBI_TAXON_URL, OUTPUT_DIR_PATH, TAXONOMY_METADATA_PATH, force=True)
 
 if __name__ == "__main__":
     download_ncbi_taxonomy() 
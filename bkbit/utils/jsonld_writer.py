@@ -0,0 +1,101 @@
+"""
+Streaming JSON-LD writer.
+
+This module writes a JSON-LD document of the form {"@context": ..., "@graph": [...]} one graph node at a
+time, so the whole graph never has to be held in memory as a single list or string. With the default
+indentation the output is identical to json.dumps(document, indent=2).
+
+Functions:
+    iter_jsonld(context, graph, indent=2):
+        Yields the text of a JSON-LD document piece by piece.
+
+    open_jsonld_output(output=None, compress=False):
+        Opens a text stream for a JSON-LD document, optionally gzip compressed.
+
+    write_jsonld(context, graph, output=None, indent=2, compress=False):
+        Writes a JSON-LD document to a file or to stdout.
+"""
+
+import contextlib
+import gzip
+import io
+import json
+import sys
+import textwrap
+
+
+def iter_jsonld(context, graph, indent=2):
+    """
+    Yields the text of a JSON-LD document piece by piece.
+
+    Args:
+        context (str or dict): The value of "@context".
+        graph (Iterable[dict]): The nodes of "@graph". The iterable is consumed lazily.
+        indent (int, optional): The indentation of the document. None writes a compact document without
+            whitespace. Defaults to 2.
+
+    Yields:
+        str: Consecutive pieces of the JSON-LD document.
+    """
+    if indent is None:
+        separators = (",", ":")
+        yield '{"@context":' + json.dumps(context, separators=separators) + ',"@graph":['
+        for i, node in enumerate(graph):
+            yield ("," if i else "") + json.dumps(node, separators=separators)
+        yield "]}"
+        return
+
+    padding = " " * indent
+    context_text = textwrap.indent(json.dumps(context, indent=indent), padding).lstrip()
+    yield "{\n" + padding + '"@context": ' + context_text + ",\n" + padding + '"@graph": ['
+    empty = True
+    for node in graph:
+        yield ("\n" if empty else ",\n") + textwrap.indent(
+            json.dumps(node, indent=indent), padding * 2
+        )
+        empty = False
+    yield ("]" if empty else "\n" + padding + "]") + "\n}"
+
+
+def open_jsonld_output(output=None, compress=False):
+    """
+    Opens a text stream for a JSON-LD document.
+
+    Args:
+        output (str, optional): The path of the output file. None writes to stdout. Defaults to None.
+        compress (bool, optional): Whether to gzip compress the output. Defaults to False.
+
+    Returns:
+        contextlib.AbstractContextManager: A context manager that yields the text stream. Leaving it closes
+        output files but never stdout.
+    """
+    if output is not None:
+        if compress:
+            return gzip.open(output, "wt", encoding="utf-8")
+        return open(output, "w", encoding="utf-8")
+    if compress:
+        # Closing the GzipFile writes the gzip trailer without closing stdout itself
+        return io.TextIOWrapper(
+            gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb"), encoding="utf-8"
+        )
+    return contextlib.nullcontext(sys.stdout)
+
+
+def write_jsonld(context, graph, output=None, indent=2, compress=False):
+    """
+    Writes a JSON-LD document to a file or to stdout, one graph node at a time.
+
+    Args:
+        context (str or dict): The value of "@context".
+        graph (Iterable[dict]): The nodes of "@graph". The iterable is consumed lazily.
+        output (str, optional): The path of the output file. None writes to stdout. Defaults to None.
+        indent (int, optional): The indentation of the document. None writes a compact document. Defaults to 2.
+        compress (bool, optional): Whether to gzip compress the output. Defaults to False.
+
+    Returns:
+        None
+    """
+    with open_jsonld_output(output, compress) as f:
+        for piece in iter_jsonld(context, graph, indent):
+            f.write(piece)
+        f.write("\n")
@@ -0,0 +1,326 @@
+"""
+Local stand-in for the NIMP (brain specimen portal) API.
+
+A MockNimpPortal serves the info, ancestors, descendants and donors endpoints used by bkbit.utils.nimp_api_endpoints
+over a specimen graph held in memory, so that the specimen translators can be tested and benchmarked without a JWT
+token or access to brain-specimenportal.org. Every response can be delayed by a fixed latency, and a share of the
+requests can fail with 503 Service Unavailable to exercise the retries of the client. build_specimen_graph creates
+synthetic graphs of any size, from donors down to library pools that combine aliquots of several donors.
+
+Example usage:
+    from bkbit.utils.mock_nimp_portal import MockNimpPortal, build_specimen_graph
+    from bkbit.utils.nimp_api_endpoints import NimpClient
+
+    with MockNimpPortal(build_specimen_graph(donors=2), latency=0.05) as portal:
+        client = NimpClient("token", base_url=portal.base_url)
+        client.get_descendants("DO-000001")
+        portal.requests  # Counter({'descendants': 1})
+
+    The server can also be started from the command line, e.g. to run specimen2jsonld against it:
+
+    ```
+    python -m bkbit.utils.mock_nimp_portal --port 8000 --donors 10 --latency 0.05
+    NIMP_API_URL=http://127.0.0.1:8000/ jwt_token=token bkbit specimen2jsonld -d DO-000001
+    ```
+
+Classes:
+    MockNimpPortal: A threaded HTTP server that answers NIMP API requests from a specimen graph.
+
+Functions:
+    build_specimen_graph(donors=1, fanout=2, pool_size=2, record_factory=None):
+        Returns a synthetic specimen graph.
+
+Attributes:
+    SPECIMEN_LEVELS (list[tuple[str, str]]): The category and nhash ID prefix of every level of a synthetic graph,
+        from the donors down to the library pools.
+"""
+
+import http.server
+import json
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qs, urlparse
+import click
+
+SPECIMEN_LEVELS = [
+    ("Donor", "DO"),
+    ("Slab", "SL"),
+    ("Tissue", "TI"),
+    ("Dissociated Cell Sample", "DC"),
+    ("Enriched Cell Sample", "EC"),
+    ("Barcoded Cell Sample", "BC"),
+    ("Amplified cDNA", "AC"),
+    ("Library", "LI"),
+    ("Library Aliquot", "LA"),
+    ("Library Pool", "LP"),
+]
+# Slabs and tissues branch out, every later level derives one record from its parent
+BRANCHING_LEVELS = 2
+SEXES = ("Male", "Female")
+
+
+def build_specimen_graph(donors=1, fanout=2, pool_size=2, record_factory=None):
+    """
+    Returns a synthetic specimen graph. Every donor has fanout slabs, every slab has fanout tissues, and every tissue
+    leads to one library aliquot through one record of each of the cell sample, cDNA and library levels. The library
+    aliquots are pooled pool_size at a time in the order they were created, so that pools combine the aliquots of
+    neighbouring tissues and donors.
+
+    Args:
+        donors (int, optional): The number of donors. Defaults to 1.
+        fanout (int, optional): The number of slabs per donor and of tissues per slab. Defaults to 2.
+        pool_size (int, optional): The number of library aliquots per library pool. Defaults to 2.
+        record_factory (Callable[[str, str], dict], optional): Returns the record of a node from its category and
+            nhash ID. Defaults to None, which gives every node a name, and every donor a local ID and a sex.
+
+    Returns:
+        dict[str, dict]: The nodes keyed by nhash ID, each with its "category", the nhash IDs of its "parents" and
+        its "record", in creation order.
+    """
+    graph = {}
+    counters = Counter()
+
+    def add(level, parents):
+        category, prefix = SPECIMEN_LEVELS[level]
+        counters[prefix] += 1
+        nhash_id = f"{prefix}-{counters[prefix]:06d}"
+        if record_factory is not None:
+            record = record_factory(category, nhash_id)
+        else:
+            record = {"name": f"{category} {counters[prefix]}"}
+            if category == "Donor":
+                record.update(local_id=f"D{counters[prefix]}", sex=SEXES[(counters[prefix] - 1) % 2])
+        graph[nhash_id] = {"category": category, "parents": list(parents), "record": record}
+        return nhash_id
+
+    aliquots = []
+    for _ in range(donors):
+        level_nodes = [add(0, [])]
+        for level in range(1, BRANCHING_LEVELS + 1):
+            level_nodes = [add(level, [parent]) for parent in level_nodes for _ in range(fanout)]
+        for parent in level_nodes:
+            for level in range(BRANCHING_LEVELS + 1, len(SPECIMEN_LEVELS) - 1):
+                parent = add(level, [parent])
+            aliquots.append(parent)
+    for start in range(0, len(aliquots), pool_size):
+        add(len(SPECIMEN_LEVELS) - 1, aliquots[start : start + pool_size])
+    return graph
+
+
+class MockNimpPortal:
+    """
+    A threaded HTTP server that answers NIMP API requests from a specimen graph, with the response format of the
+    portal: info returns {"data": {"id", "category", "record"}}, ancestors and descendants return {"data": {nhash ID:
+    {"edges": {...}}}} including the requested node, and donors returns {"data": [...]}. Ancestors responses have the
+    has_parent edges of the nodes. Descendants responses have their has_child edges, and also their has_parent edges
+    when complete records are requested with nhash_only=False.
+
+    Attributes:
+        graph (dict[str, dict]): The nodes keyed by nhash ID, each with its "category", "parents" and "record", as
+            returned by build_specimen_graph.
+        latency (float): The delay of every response in seconds.
+        error_rate (float): The share of requests that fail with 503 Service Unavailable.
+        descendants_edges (bool): Whether descendants responses include the has_parent edges of the nodes even with
+            nhash_only=True, which the portal does not do.
+        requests (Counter): The number of requests per endpoint, including failed ones.
+        failures (int): The number of requests that failed with 503.
+
+    Methods:
+        start():
+            Starts the server on a background thread and returns its base URL.
+
+        stop():
+            Stops the server.
+
+        reset_stats():
+            Resets the request counts.
+    """
+
+    def __init__(self, graph, latency=0.0, error_rate=0.0, descendants_edges=False, host="127.0.0.1", port=0, seed=None):
+        self.graph = graph
+        self.latency = latency
+        self.error_rate = error_rate
+        self.descendants_edges = descendants_edges
+        self.host = host
+        self.port = port
+        self.requests = Counter()
+        self.failures = 0
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__server = None
+        self.__children = {}
+        for nhash_id, node in graph.items():
+            for parent in node["parents"]:
+                self.__children.setdefault(parent, []).append(nhash_id)
+
+    @property
+    def base_url(self):
+        """
+        str: The URL prefix of the endpoints, to be used as the base_url of a NimpClient.
+        """
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """
+        Starts the server on a background thread. Port 0 picks a free port.
+
+        Returns:
+            str: The base URL of the server.
+        """
+        portal = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            # Keep-alive connections without Nagle's algorithm, like the pooled connections of the client
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body = portal.respond(self.path)
+                body = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(http.server.ThreadingHTTPServer):
+            daemon_threads = True
+            # Many clients connect at once when a batch starts
+            request_queue_size = 128
+
+        self.__server = Server((self.host, self.port), Handler)
+        self.port = self.__server.server_address[1]
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        """
+        Stops the server.
+
+        Returns:
+            None
+        """
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def reset_stats(self):
+        """
+        Resets the request and failure counts.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.requests = Counter()
+            self.failures = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __closure(self, nhash_id, upwards, parent_edges):
+        # The node and all of its ancestors (or descendants), in breadth-first order
+        nodes, pending = {}, [nhash_id]
+        while pending:
+            current = pending.pop(0)
+            if current in nodes:
+                continue
+            parents, children = self.graph[current]["parents"], self.__children.get(current, [])
+            edges = {} if upwards else {"has_child": children}
+            if parent_edges:
+                edges["has_parent"] = parents
+            nodes[current] = {"edges": edges}
+            pending.extend(parents if upwards else children)
+        return nodes
+
+    @staticmethod
+    def __donor_value(nhash_id, node, name):
+        # The donors endpoint filters on the donor_local_id and donor_nhash_id parameters and on record fields
+        if name == "donor_nhash_id":
+            return nhash_id
+        return str(node["record"].get("local_id" if name == "donor_local_id" else name))
+
+    def respond(self, path):
+        """
+        Returns the response to a request.
+
+        Args:
+            path (str): The path and query of the request, e.g. "/info?id=DO-000001".
+
+        Returns:
+            tuple[int, dict]: The status code and the JSON body of the response.
+        """
+        url = urlparse(path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        with self.__lock:
+            self.requests[endpoint] += 1
+            failed = self.__random.random() < self.error_rate
+            if failed:
+                self.failures += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            return 503, {"error": "Service Unavailable"}
+
+        if endpoint == "donors":
+            donors = [
+                {"id": nhash_id, "category": node["category"], "record": node["record"]}
+                for nhash_id, node in self.graph.items()
+                if node["category"] == "Donor" and all(
+                    self.__donor_value(nhash_id, node, name) == value for name, value in query.items()
+                )
+            ]
+            return 200, {"data": donors}
+        if endpoint not in ("info", "ancestors", "descendants"):
+            return 404, {"error": f"Unknown endpoint {endpoint}"}
+        nhash_id = query.get("id")
+        if nhash_id not in self.graph:
+            return 404, {"error": f"NHash ID {nhash_id} not found"}
+        if endpoint == "info":
+            node = self.graph[nhash_id]
+            return 200, {"data": {"id": nhash_id, "category": node["category"], "record": node["record"]}}
+        upwards = endpoint == "ancestors"
+        parent_edges = upwards or self.descendants_edges or query.get("nhash_only") == "False"
+        return 200, {"data": self.__closure(nhash_id, upwards, parent_edges)}
+
+
+@click.command()
+# Option #1: Port
+@click.option("--port", "-p", default=8000, show_default=True, help="Port of the server.")
+# Option #2: Size of the synthetic graph
+@click.option("--donors", default=10, show_default=True, help="Number of donors of the synthetic specimen graph.")
+@click.option("--fanout", default=2, show_default=True, help="Number of slabs per donor and of tissues per slab.")
+@click.option("--pool_size", default=2, show_default=True, help="Number of library aliquots per library pool.")
+# Option #3: Latency and errors
+@click.option("--latency", default=0.0, show_default=True, help="Delay of every response in seconds.")
+@click.option("--error_rate", default=0.0, show_default=True, help="Share of requests that fail with 503.")
+def mock_nimp_portal(port, donors, fanout, pool_size, latency, error_rate):
+    """
+    Serves the NIMP API endpoints over a synthetic specimen graph until interrupted.
+    """
+    graph = build_specimen_graph(donors, fanout, pool_size)
+    portal = MockNimpPortal(graph, latency, error_rate, port=port)
+    base_url = portal.start()
+    click.echo(f"Serving {len(graph)} specimens at {base_url} (set NIMP_API_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal.stop()
+
+
+if __name__ == "__main__":
+    mock_nimp_portal()
@@ -1,7 +1,49 @@
-import inspect
+"""
+Client for the NIMP (brain specimen portal) API endpoints.
+
+A NimpClient keeps one requests.Session with a pool of keep-alive connections, so a traversal that makes
+thousands of calls pays for the TCP and TLS handshakes once per pooled connection instead of once per call.
+Requests that fail with 429 Too Many Requests, a 5xx status or a connection error are retried with exponential
+backoff, waiting as long as the Retry-After header asks for when the portal sends one. A client can also be limited
+to a number of requests per second with a token bucket that is shared by all threads using the client, and can
+keep the info, ancestors and descendants responses in a NimpResponseCache (see bkbit.utils.nimp_response_cache) so
+that they are fetched once across runs.
+
+The module-level functions get_data, get_ancestors, get_descendants and get_donor are thin wrappers that use one
+shared client per JWT token and process.
+
+Example usage:
+    from bkbit.utils.nimp_api_endpoints import NimpClient
+
+    client = NimpClient(jwt_token, timeouts={"descendants": 60})
+    record = client.get_data("DO-GICE7463")
+
+Classes:
+    TokenBucket: A thread-safe token bucket rate limiter.
+    NimpClient: A pooled, retrying HTTP client for the NIMP API.
+
+Functions:
+    get_client(jwt_token, pool_size=DEFAULT_POOL_SIZE):
+        Returns the shared client of the current process for a JWT token and connection pool size.
+    get_data, get_ancestors, get_descendants, get_donor: Retrieve records with the shared client.
+
+Attributes:
+    API_URL_PREFIX (str): The URL prefix of the NhashID endpoints, from the NIMP_API_URL environment variable if set.
+    DEFAULT_TIMEOUTS (dict[str, float]): The default timeout in seconds of every endpoint.
+    RETRY_STATUS_CODES (frozenset[int]): The status codes of responses that are retried.
+"""
+
+import email.utils
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
 import requests
+from requests.adapters import HTTPAdapter
 
-API_URL_PREFIX = "https://brain-specimenportal.org/api/v1/nhash_ids/"
+# NIMP_API_URL points the clients at another server, e.g. a local bkbit.utils.mock_nimp_portal
+API_URL_PREFIX = os.environ.get("NIMP_API_URL", "https://brain-specimenportal.org/api/v1/nhash_ids/")
 INFO_URL_SUFFIX = "info?id="
 ANCESTORS_URL_SUFFIX = "ancestors?id="
 DESCENDANTS_URL_SUFFIX = "descendants?id="
@@ -9,6 +51,327 @@ PARENTS_URL_SUFFIX = "parents?id="
 NHASH_ONLY_SUFFIX = "&nhash_only="
 DONORS_URL_SUFFIX = "donors"
 
+DEFAULT_TIMEOUTS = {"info": 10, "ancestors": 10, "descendants": 30, "donors": 10}
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_MAX_BACKOFF = 60
+DEFAULT_POOL_SIZE = 16
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter. Tokens are added at a constant rate up to the capacity of the bucket,
+    and every acquisition takes one token, waiting for it if the bucket is empty.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (float): The largest number of tokens in the bucket, i.e. the largest burst.
+
+    Methods:
+        acquire():
+            Takes a token, waiting until one is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"The rate of a token bucket must be positive, got {rate}.")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.__tokens = self.capacity
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token, waiting until one is available. Waiting threads are served one at a time.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return
+            time.sleep((1 - self.__tokens) / self.rate)
+            # The token that was waited for is taken right away
+            self.__tokens = 0
+            self.__updated = time.monotonic()
+
+
+class NimpClient:
+    """
+    A pooled, retrying HTTP client for the NIMP API. The client can be shared by threads.
+
+    Attributes:
+        jwt_token (str): The JWT token for authentication.
+        base_url (str): The URL prefix of the NhashID endpoints.
+        timeouts (dict[str, float]): The timeout in seconds of every endpoint ("info", "ancestors",
+            "descendants", "donors").
+        max_retries (int): The number of times a failed request is retried.
+        backoff_factor (float): The wait before the first retry in seconds; it doubles with every retry.
+        max_backoff (float): The longest wait between retries in seconds, unless Retry-After asks for more.
+        pool_size (int): The largest number of pooled connections per host.
+        rate_limiter (TokenBucket): The rate limiter of the requests, or None if they are not limited.
+        cache (NimpResponseCache): The cache of the info, ancestors and descendants responses, or None.
+        session (requests.Session): The session that pools the connections.
+
+    Methods:
+        request(endpoint, url, params=None, error_message=None):
+            Sends a GET request, retrying it on 429, 5xx and connection errors, and returns the JSON response.
+
+        get_data(nhash_id), get_ancestors(nhash_id, nhash_only=True, depth=None),
+        get_descendants(nhash_id, nhash_only=True, depth=None), get_donor(**filters):
+            Retrieve records from the NIMP endpoints.
+
+        close():
+            Closes the pooled connections.
+    """
+
+    def __init__(
+        self,
+        jwt_token,
+        base_url=API_URL_PREFIX,
+        timeouts=None,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+        pool_size=DEFAULT_POOL_SIZE,
+        rate_limit=None,
+        cache=None,
+    ):
+        self.jwt_token = jwt_token
+        self.base_url = base_url
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        # Every attempt, including retries, takes a token
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {jwt_token}"
+        # Retries are handled by request(), which also honours Retry-After
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __retry_delay(self, attempt, response=None):
+        """
+        Returns how long to wait before a retry: the Retry-After header of the response if it has one, and
+        exponential backoff with jitter otherwise.
+
+        Args:
+            attempt (int): The number of the retry, starting at 0.
+            response (requests.Response, optional): The response that is retried.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = email.utils.parsedate_to_datetime(retry_after)
+                    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+                except (TypeError, ValueError):
+                    pass
+        delay = min(self.max_backoff, self.backoff_factor * 2**attempt)
+        return delay * (0.5 + random.random() / 2)
+
+    def request(self, endpoint, url, params=None, error_message=None):
+        """
+        Sends a GET request, retrying it on 429, 5xx and connection errors, and returns the JSON response.
+
+        Args:
+            endpoint (str): The endpoint name used to look up the timeout, e.g. "info".
+            url (str): The URL of the request.
+            params (dict, optional): The query parameters of the request. Defaults to None.
+            error_message (str, optional): The message of the error raised if the request fails.
+
+        Returns:
+            dict: The JSON response.
+
+        Raises:
+            requests.exceptions.HTTPError: If the response status is not 200 after all retries.
+            requests.exceptions.RequestException: If the portal cannot be reached after all retries.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.get(
+                    url, params=params, timeout=self.timeouts[endpoint]
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.__retry_delay(attempt))
+                continue
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                break
+            time.sleep(self.__retry_delay(attempt, response))
+        raise requests.exceptions.HTTPError(
+            f"{error_message or 'Error getting ' + url}. Status Code: {response.status_code}",
+            response=response,
+        )
+
+    def __cached(self, endpoint, key, fetch):
+        """
+        Returns the cached response of a request, calling fetch and caching its response on a miss.
+
+        Args:
+            endpoint (str): The endpoint of the request, e.g. "info".
+            key (str): The cache key of the request.
+            fetch (Callable[[], dict]): Sends the request and returns its JSON response.
+
+        Returns:
+            dict: The JSON response.
+
+        Raises:
+            LookupError: If the cache is offline and the response is not cached.
+        """
+        if self.cache is None:
+            return fetch()
+        response = self.cache.get(endpoint, key)
+        if response is not None:
+            return response
+        if self.cache.offline:
+            raise LookupError(
+                f"The {endpoint} response of {key} is not in the NIMP response cache {self.cache.cache_path} "
+                "and the cache is offline."
+            )
+        response = fetch()
+        # Error responses are not cached, so the next run asks the portal again
+        if "error" not in response:
+            self.cache.put(endpoint, key, response)
+        return response
+
+    def get_data(self, nhash_id):
+        """
+        Retrieve information of any record with a NHash ID in the system.
+
+        Args:
+            nhash_id (str): The NHash ID of the record to retrieve.
+
+        Returns:
+            dict: The JSON response containing the information of the record.
+        """
+        return self.__cached(
+            "info",
+            nhash_id,
+            lambda: self.request(
+                "info",
+                f"{self.base_url}{INFO_URL_SUFFIX}{nhash_id}",
+                error_message=f"Error getting data for NHash ID = {nhash_id}",
+            ),
+        )
+
+    def get_ancestors(self, nhash_id, nhash_only=True, depth=None):
+        """
+        Retrieve information of all ancestors of a record with the given NHash ID.
+
+        Args:
+            nhash_id (str): The NHash ID of the record.
+            nhash_only (bool): Flag indicating whether to retrieve only NHash IDs or complete record information. Default is True.
+            depth (int): The depth of ancestors to retrieve. Currently not sent to the portal.
+
+        Returns:
+            dict: The JSON response containing information of all ancestors.
+        """
+        return self.__cached(
+            "ancestors",
+            f"{nhash_id}{NHASH_ONLY_SUFFIX}{nhash_only}",
+            lambda: self.request(
+                "ancestors",
+                f"{self.base_url}{ANCESTORS_URL_SUFFIX}{nhash_id}{NHASH_ONLY_SUFFIX}{nhash_only}",
+                error_message=f"Error getting data for NHash ID = {nhash_id}",
+            ),
+        )
+
+    def get_descendants(self, nhash_id, nhash_only=True, depth=None):
+        """
+        Retrieve information of all descendants of a record with the given NHash ID.
+
+        Args:
+            nhash_id (str): The NHash ID of the record.
+            nhash_only (bool): Flag indicating whether to retrieve only NHash IDs or complete record information. Default is True.
+            depth (int): The depth of descendants to retrieve. Currently not sent to the portal.
+
+        Returns:
+            dict: The JSON response containing information of all descendants.
+        """
+        return self.__cached(
+            "descendants",
+            f"{nhash_id}{NHASH_ONLY_SUFFIX}{nhash_only}",
+            lambda: self.request(
+                "descendants",
+                f"{self.base_url}{DESCENDANTS_URL_SUFFIX}{nhash_id}{NHASH_ONLY_SUFFIX}{nhash_only}",
+                error_message=f"Error getting data for NHash ID = {nhash_id}",
+            ),
+        )
+
+    def get_donor(self, **filters):
+        """
+        Retrieve the donors that match the given filters.
+
+        Args:
+            **filters: The donor_local_id, donor_nhash_id, age_of_death, ethnicity, race, sex or species to
+                filter by. Filters that are None are ignored.
+
+        Returns:
+            dict: The JSON response containing the matching donors.
+        """
+        params = {name: value for name, value in filters.items() if value is not None}
+        return self.request(
+            "donors",
+            self.base_url + DONORS_URL_SUFFIX,
+            params=params,
+            error_message="Error getting donor data",
+        )
+
+    def close(self):
+        """
+        Closes the pooled connections.
+
+        Returns:
+            None
+        """
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(jwt_token, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Returns the shared client for a JWT token and connection pool size. Every process gets its own clients,
+    because pooled connections cannot be shared with forked processes.
+
+    Args:
+        jwt_token (str): The JWT token for authentication.
+        pool_size (int, optional): The largest number of pooled connections of the client, which should be at
+            least the number of requests sent at the same time. Defaults to DEFAULT_POOL_SIZE.
+
+    Returns:
+        NimpClient: The shared client.
+    """
+    key = (os.getpid(), jwt_token, pool_size)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = NimpClient(jwt_token, pool_size=pool_size)
+        return client
+
 
 def get_data(nhash_id, jwt_token):
     """
@@ -25,18 +388,7 @@ def get_data(nhash_id, jwt_token):
         requests.exceptions.HTTPError: If there is an error retrieving the data.
 
     """
-    headers = {"Authorization": f"Bearer {jwt_token}"}
-    response = requests.get(
-        f"{API_URL_PREFIX}{INFO_URL_SUFFIX}{nhash_id}",
-        headers=headers,
-        timeout=10,  # ? is this an appropriate timeout value?
-    )
-    if response.status_code == 200:
-        return response.json()
-
-    raise requests.exceptions.HTTPError(
-        f"Error getting data for NHash ID = {nhash_id}. Status Code: {response.status_code}"
-    )
+    return get_client(jwt_token).get_data(nhash_id)
 
 def get_ancestors(nhash_id, jwt_token, nhash_only=True, depth=None):
     """
@@ -55,19 +407,7 @@ def get_ancestors(nhash_id, jwt_token, nhash_only=True, depth=None):
         requests.exceptions.HTTPError: If there is an error getting data for the NHash ID.
 
     """
-    headers = {"Authorization": f"Bearer {jwt_token}"}
-
-    response = requests.get(
-        f"{API_URL_PREFIX}{ANCESTORS_URL_SUFFIX}{nhash_id}{NHASH_ONLY_SUFFIX}{nhash_only}",
-        headers=headers,
-        timeout=10,  # This is an appropriate timeout value.
-    )
-    if response.status_code == 200:
-        return response.json()
-
-    raise requests.exceptions.HTTPError(
-        f"Error getting data for NHash ID = {nhash_id}. Status Code: {response.status_code}"
-    )
+    return get_client(jwt_token).get_ancestors(nhash_id, nhash_only, depth)
 
 def get_descendants(nhash_id, jwt_token, nhash_only=True, depth=None):
     """
@@ -86,38 +426,29 @@ def get_descendants(nhash_id, jwt_token, nhash_only=True, depth=None):
         requests.exceptions.HTTPError: If there is an error getting data for the NHash ID.
 
     """
-    headers = {"Authorization": f"Bearer {jwt_token}"}
+    return get_client(jwt_token).get_descendants(nhash_id, nhash_only, depth)
 
-    response = requests.get(
-        f"{API_URL_PREFIX}{DESCENDANTS_URL_SUFFIX}{nhash_id}{NHASH_ONLY_SUFFIX}{nhash_only}",
-        headers=headers,
-        timeout=30,  # This is an appropriate timeout value.
-    )
-    if response.status_code == 200:
-        return response.json()
+def get_donor(jwt_token, donor_local_id=None, donor_nhash_id=None, age_of_death=None, ethnicity=None, race=None, sex=None, species=None):
+    """
+    Retrieve the donors that match the given filters.
 
-    raise requests.exceptions.HTTPError(
-        f"Error getting data for NHash ID = {nhash_id}. Status Code: {response.status_code}"
-    )
+    Parameters:
+        jwt_token (str): The JWT token for authentication.
+        donor_local_id, donor_nhash_id, age_of_death, ethnicity, race, sex, species: The filters. Filters that are None are ignored.
 
-def get_donor(jwt_token, donor_local_id=None, donor_nhash_id=None, age_of_death=None, ethnicity=None, race=None, sex=None, species=None):
-    headers = {"Authorization": f"Bearer {jwt_token}"}
-    # Create a dictionary of parameters to be sent in the request
-    params = {}
-    
-    # Iterate through the function's parameters and add them to the params dictionary if they are not None
-    for param_name in inspect.signature(get_donor).parameters.keys():
-        if param_name in ['jwt_token']:  # Skip the non-optional parameters
-            continue
-        value = locals().get(param_name)
-        if value is not None:
-            params[param_name] = value
-    
-    # Make the request with the dynamically created params
-    response = requests.get(API_URL_PREFIX + DONORS_URL_SUFFIX, headers=headers, params=params, timeout=10)
-    if response.status_code == 200:
-        return response.json()
-    
-    raise requests.exceptions.HTTPError(
-        f"Error getting donor data. Status Code: {response.status_code}"
-    )
\ No newline at end of file
+    Returns:
+        dict: The JSON response containing the matching donors.
+
+    Raises:
+        requests.exceptions.HTTPError: If there is an error getting donor data.
+
+    """
+    return get_client(jwt_token).get_donor(
+        donor_local_id=donor_local_id,
+        donor_nhash_id=donor_nhash_id,
+        age_of_death=age_of_death,
+        ethnicity=ethnicity,
+        race=race,
+        sex=sex,
+        species=species,
+    )
@@ -0,0 +1,176 @@
+"""
+Persistent on-disk cache for NIMP API responses.
+
+Parsing overlapping specimens fetches the same info, ancestors and descendants responses again and again. A
+NimpResponseCache keeps them in a single SQLite file, keyed by endpoint and nhash ID, so that later runs read them
+from local disk instead of the portal. Responses expire after a time-to-live per endpoint; in offline mode every
+cached response is used regardless of its age and nothing is fetched.
+
+The file is opened in WAL mode, so the worker processes of a batch can read it while one of them writes, and
+every thread and process uses its own connection. A cache object can be pickled, e.g. to hand it to the workers of
+a multiprocessing.Pool, and opens new connections on the other side.
+
+Example usage:
+    from bkbit.utils.nimp_api_endpoints import NimpClient
+    from bkbit.utils.nimp_response_cache import NimpResponseCache
+
+    client = NimpClient(jwt_token, cache=NimpResponseCache("/path/to/nimp_responses.sqlite"))
+    client.get_data("DO-GICE7463")  # fetched from the portal and cached
+    client.get_data("DO-GICE7463")  # read from the cache
+
+Classes:
+    NimpResponseCache: A process- and thread-safe SQLite cache of NIMP API responses.
+
+Attributes:
+    RESPONSE_CACHE_FILE_NAME (str): The name of the cache file in a cache directory.
+    DEFAULT_RESPONSE_CACHE_PATH (str): The default cache file, RESPONSE_CACHE_FILE_NAME in the bkbit cache directory.
+    DEFAULT_TTLS (dict[str, float]): The default time-to-live in seconds of the responses of every endpoint.
+        Descendants expire sooner than records and ancestors, because new children are added to existing records.
+    BUSY_TIMEOUT (float): How long in seconds a connection waits for a write lock held by another process.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from bkbit.utils.download_cache import DEFAULT_CACHE_DIR
+from bkbit.utils.sqlite_connections import ThreadConnections
+
+RESPONSE_CACHE_FILE_NAME = "nimp_responses.sqlite"
+DEFAULT_RESPONSE_CACHE_PATH = os.path.join(DEFAULT_CACHE_DIR, RESPONSE_CACHE_FILE_NAME)
+DEFAULT_TTLS = {"info": 7 * 24 * 3600, "ancestors": 7 * 24 * 3600, "descendants": 24 * 3600}
+BUSY_TIMEOUT = 60
+
+
+class NimpResponseCache:
+    """
+    A process- and thread-safe SQLite cache of NIMP API responses, keyed by endpoint and nhash ID.
+
+    Attributes:
+        cache_path (str): The path of the cache file.
+        ttls (dict[str, float]): The time-to-live in seconds of the responses of every endpoint. Responses of
+            endpoints without a time-to-live, or with None, never expire.
+        offline (bool): If True, cached responses are used regardless of their age and misses are not fetched.
+
+    Methods:
+        get(endpoint, key):
+            Returns the cached response of a request, or None if it is not cached or has expired.
+
+        put(endpoint, key, response):
+            Stores the response of a request.
+
+        purge_expired():
+            Deletes the expired responses from the cache file.
+
+        connection():
+            Returns the SQLite connection of the calling thread.
+
+        close():
+            Closes the connection of the calling thread.
+    """
+
+    def __init__(self, cache_path=DEFAULT_RESPONSE_CACHE_PATH, ttls=None, offline=False):
+        self.cache_path = cache_path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.offline = offline
+        self.__connections = ThreadConnections(self.__connect)
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        connection = self.connection()
+        # Switching to WAL needs an exclusive lock, so only the first process that opens the file does it
+        if connection.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+            connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "endpoint TEXT NOT NULL, key TEXT NOT NULL, body TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (endpoint, key)) WITHOUT ROWID"
+        )
+
+    def __getstate__(self):
+        # Connections cannot be pickled; the receiving process opens its own
+        return {"cache_path": self.cache_path, "ttls": self.ttls, "offline": self.offline}
+
+    def __setstate__(self, state):
+        self.__init__(state["cache_path"], state["ttls"], state["offline"])
+
+    def __connect(self):
+        connection = sqlite3.connect(self.cache_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        # In WAL mode a commit that is not synced until the next checkpoint can only be lost on power failure
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def connection(self):
+        """
+        Returns the SQLite connection of the calling thread, opening it on first use and again after a fork.
+
+        Returns:
+            sqlite3.Connection: An autocommit connection to the cache file.
+        """
+        return self.__connections.get()
+
+    def get(self, endpoint, key):
+        """
+        Returns the cached response of a request. Offline caches return responses regardless of their age.
+
+        Args:
+            endpoint (str): The endpoint of the request, e.g. "info".
+            key (str): The nhash ID of the request, followed by any other query parameters that change the response.
+
+        Returns:
+            dict or None: The cached JSON response, or None if it is not cached or has expired.
+        """
+        row = (
+            self.connection()
+            .execute("SELECT body, fetched_at FROM responses WHERE endpoint = ? AND key = ?", (endpoint, key))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        body, fetched_at = row
+        ttl = self.ttls.get(endpoint)
+        if not self.offline and ttl is not None and time.time() - fetched_at > ttl:
+            return None
+        return json.loads(body)
+
+    def put(self, endpoint, key, response):
+        """
+        Stores the response of a request, replacing any earlier response of the same request.
+
+        Args:
+            endpoint (str): The endpoint of the request, e.g. "info".
+            key (str): The nhash ID of the request, followed by any other query parameters that change the response.
+            response (dict): The JSON response.
+
+        Returns:
+            None
+        """
+        self.connection().execute(
+            "INSERT OR REPLACE INTO responses (endpoint, key, body, fetched_at) VALUES (?, ?, ?, ?)",
+            (endpoint, key, json.dumps(response), time.time()),
+        )
+
+    def purge_expired(self):
+        """
+        Deletes the responses that are older than the time-to-live of their endpoint.
+
+        Returns:
+            int: The number of deleted responses.
+        """
+        deleted = 0
+        now = time.time()
+        for endpoint, ttl in self.ttls.items():
+            if ttl is not None:
+                deleted += (
+                    self.connection()
+                    .execute("DELETE FROM responses WHERE endpoint = ? AND fetched_at < ?", (endpoint, now - ttl))
+                    .rowcount
+                )
+        return deleted
+
+    def close(self):
+        """
+        Closes the connection of the calling thread, if it has one.
+
+        Returns:
+            None
+        """
+        self.__connections.close()
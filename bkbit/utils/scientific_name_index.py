@@ -0,0 +1,288 @@
+"""
+Normalized lookup index of NCBI scientific names.
+
+Ensembl names species after their scientific name in lower case with underscores ("mus_musculus_casteij"),
+which often differs from the NCBI scientific name in case, or names a strain that NCBI does not list. This module
+looks names up by a normalized key (case folded, with underscores and runs of whitespace replaced by a single
+space) in a sorted table of all scientific names, so that exact and prefix lookups are binary searches, and
+proposes candidates for names that are not found.
+
+Example usage:
+    from bkbit.utils.scientific_name_index import ScientificNameIndex, SortedNameTable
+
+    index = ScientificNameIndex(SortedNameTable({"Mus musculus castaneus": "10091", "Mus musculus": "10090"}))
+    index.get("MUS_MUSCULUS")  # '10090'
+    index.candidates("mus_musculus_casteij")  # [NameCandidate(name='mus musculus castaneus', taxid='10091', ...
+
+Classes:
+    NameCandidate: A candidate scientific name for a name that was not found.
+    SortedNameTable: An in-memory sorted table of normalized scientific names, built on first use.
+    ScientificNameIndex: Normalized, prefix and edit distance lookups of scientific names.
+
+Functions:
+    normalize_scientific_name(name):
+        Returns the normalized lookup key of a scientific name.
+    edit_distance(a, b, max_distance):
+        Returns the Levenshtein distance of two strings if it is at most max_distance.
+
+Attributes:
+    SCAN_LIMIT (int): The largest number of names that are compared to a name in an edit distance lookup.
+"""
+
+import bisect
+import re
+from collections import namedtuple
+
+SCAN_LIMIT = 512
+# The smallest string that is greater than every string starting with a given prefix is prefix + MAX_CHARACTER
+MAX_CHARACTER = "\U0010ffff"
+SEPARATOR_PATTERN = re.compile(r"[\s_]+")
+
+NameCandidate = namedtuple("NameCandidate", ["name", "taxid", "match"])
+NameCandidate.__doc__ = """
+A candidate scientific name for a name that was not found.
+
+Attributes:
+    name (str): The normalized scientific name.
+    taxid (str): The taxid of the name.
+    match (str): How the candidate was found: "exact" (the names only differ in case or separators), "similar"
+        (within a small edit distance), "prefix" (the candidate extends the longest prefix of the name that is in
+        the index) or "broader" (the name without its last words, e.g. the species of a strain).
+"""
+
+
+def normalize_scientific_name(name):
+    """
+    Returns the normalized lookup key of a scientific name: case folded, with underscores and runs of whitespace
+    replaced by a single space.
+
+    Args:
+        name (str): The scientific name, e.g. "Mus_musculus".
+
+    Returns:
+        str: The normalized name, e.g. "mus musculus".
+    """
+    return SEPARATOR_PATTERN.sub(" ", name).strip().casefold()
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Returns the Levenshtein distance of two strings if it is at most max_distance, stopping as soon as every
+    alignment of a prefix of a exceeds max_distance.
+
+    Args:
+        a (str): The first string.
+        b (str): The second string.
+        max_distance (int): The largest distance of interest.
+
+    Returns:
+        int or None: The distance, or None if it is greater than max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, a_character in enumerate(a, 1):
+        current = [i]
+        for j, b_character in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (a_character != b_character),
+                )
+            )
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+class SortedNameTable:
+    """
+    An in-memory table of normalized scientific names and their taxids, sorted by name. The table is built from
+    a scientific name to taxid mapping on first use, so creating it costs nothing until a name has to be looked
+    up in it.
+
+    Attributes:
+        names (Mapping[str, str]): The scientific names and their taxids.
+
+    Methods:
+        get(key, default=None):
+            Returns the taxid of a normalized name.
+
+        range(prefix, limit):
+            Returns up to limit (name, taxid) pairs whose name starts with a prefix, in name order.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.__keys = None
+        self.__values = None
+
+    def __sorted_entries(self):
+        if self.__keys is None:
+            # Later names replace earlier ones, like the normalized_name_to_taxid table of the taxonomy store
+            entries = {}
+            for name, taxid in self.names.items():
+                entries[normalize_scientific_name(name)] = taxid
+            keys = sorted(entries)
+            self.__values = [entries[key] for key in keys]
+            self.__keys = keys
+        return self.__keys, self.__values
+
+    def get(self, key, default=None):
+        keys, values = self.__sorted_entries()
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return values[position]
+        return default
+
+    def range(self, prefix, limit):
+        keys, values = self.__sorted_entries()
+        start = bisect.bisect_left(keys, prefix)
+        end = min(bisect.bisect_left(keys, prefix + MAX_CHARACTER, start), start + limit)
+        return list(zip(keys[start:end], values[start:end]))
+
+
+class ScientificNameIndex:
+    """
+    Normalized, prefix and edit distance lookups of scientific names.
+
+    Attributes:
+        table: A table of normalized names and taxids with get(key) and range(prefix, limit) methods, i.e. a
+            SortedNameTable or the "normalized_name_to_taxid" table of a TaxonomyStore.
+
+    Methods:
+        get(name):
+            Returns the taxid of a name, ignoring case and separators.
+
+        prefix(name, limit=10):
+            Returns the names that start with a name.
+
+        similar(name, max_distance=2, limit=10):
+            Returns the names within an edit distance of a name.
+
+        candidates(name, limit=10):
+            Returns candidate names for a name, e.g. to report them when the name was not found.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, name):
+        """
+        Returns the taxid of a scientific name, ignoring case and separators.
+
+        Args:
+            name (str): The scientific name.
+
+        Returns:
+            str or None: The taxid, or None if the name is not in the index.
+        """
+        return self.table.get(normalize_scientific_name(name))
+
+    def prefix(self, name, limit=10):
+        """
+        Returns the names that start with a name, e.g. the subspecies and strains of a species.
+
+        Args:
+            name (str): The prefix.
+            limit (int, optional): The largest number of names to return. Defaults to 10.
+
+        Returns:
+            list[tuple[str, str]]: The normalized names and their taxids, in name order.
+        """
+        return self.table.range(normalize_scientific_name(name), limit)
+
+    def __shortest_prefix(self, key, fits):
+        # Prefix lengths for which fits() holds form a range ending at len(key), so a binary search finds its start
+        low, high = 0, len(key)
+        while low < high:
+            middle = (low + high) // 2
+            if fits(key[:middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def __longest_matching_prefix(self, key):
+        # Prefix lengths that match at least one name form a range starting at 0
+        low, high = 0, len(key)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.table.range(key[:middle], 1):
+                low = middle
+            else:
+                high = middle - 1
+        return key[:low]
+
+    def similar(self, name, max_distance=2, limit=10):
+        """
+        Returns the names within an edit distance of a name.
+
+        Only the names that share the longest prefix with the name that at most SCAN_LIMIT names start with are
+        compared, so the lookup takes a few range queries and at most SCAN_LIMIT distance computations. Names
+        that differ from the name in its first characters may therefore be missed.
+
+        Args:
+            name (str): The scientific name.
+            max_distance (int, optional): The largest Levenshtein distance of the names. Defaults to 2.
+            limit (int, optional): The largest number of names to return. Defaults to 10.
+
+        Returns:
+            list[tuple[str, str, int]]: The normalized names, their taxids and their distances, closest first.
+        """
+        key = normalize_scientific_name(name)
+        length = self.__shortest_prefix(
+            key, lambda prefix: len(self.table.range(prefix, SCAN_LIMIT + 1)) <= SCAN_LIMIT
+        )
+        matches = []
+        for candidate, taxid in self.table.range(key[:length], SCAN_LIMIT):
+            distance = edit_distance(key, candidate, max_distance)
+            if distance is not None:
+                matches.append((candidate, taxid, distance))
+        matches.sort(key=lambda match: (match[2], match[0]))
+        return matches[:limit]
+
+    def candidates(self, name, limit=10):
+        """
+        Returns candidate names for a name: the name itself ignoring case and separators, similar names, names
+        that extend the longest prefix of the name that is in the index, and the name without its trailing words.
+
+        Args:
+            name (str): The scientific name.
+            limit (int, optional): The largest number of candidates to return. Defaults to 10.
+
+        Returns:
+            list[NameCandidate]: The candidates, best first, with one candidate per taxid.
+        """
+        key = normalize_scientific_name(name)
+        found = []
+
+        taxid = self.table.get(key)
+        if taxid is not None:
+            found.append(NameCandidate(key, taxid, "exact"))
+        found.extend(
+            NameCandidate(candidate, taxid, "similar")
+            for candidate, taxid, _ in self.similar(key, limit=limit)
+        )
+        # Only prefixes that cover at least the genus are specific enough to be useful
+        prefix = self.__longest_matching_prefix(key)
+        if " " in prefix:
+            found.extend(
+                NameCandidate(candidate, taxid, "prefix")
+                for candidate, taxid in self.table.range(prefix, limit)
+            )
+        words = key.split(" ")
+        for end in range(len(words) - 1, 0, -1):
+            broader = " ".join(words[:end])
+            taxid = self.table.get(broader)
+            if taxid is not None:
+                found.append(NameCandidate(broader, taxid, "broader"))
+
+        candidates, taxids = [], set()
+        for candidate in found:
+            if candidate.taxid not in taxids:
+                taxids.add(candidate.taxid)
+                candidates.append(candidate)
+        return candidates[:limit]
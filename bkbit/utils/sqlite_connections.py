@@ -0,0 +1,70 @@
+"""
+Per-thread SQLite connections that survive forks.
+
+SQLite connections cannot be shared between threads, and a connection inherited from a parent process must not be
+used, or closed, in a forked child. A ThreadConnections object hands every thread its own connection, opened on
+first use, and opens a new one when it is used in a forked process. The taxonomy store and the NIMP response cache
+read and write their SQLite files through it.
+
+Example usage:
+    import sqlite3
+    from bkbit.utils.sqlite_connections import ThreadConnections
+
+    connections = ThreadConnections(lambda: sqlite3.connect("/path/to/file.sqlite"))
+    connections.get().execute("SELECT 1")
+    connections.close()
+
+Classes:
+    ThreadConnections: The SQLite connections of the threads of a process, opened by a connect function.
+"""
+
+import os
+import threading
+
+
+class ThreadConnections:
+    """
+    The SQLite connections of the threads of a process, opened by a connect function.
+
+    Attributes:
+        connect (Callable[[], sqlite3.Connection]): Opens a new connection.
+
+    Methods:
+        get():
+            Returns the connection of the calling thread.
+
+        close():
+            Closes the connection of the calling thread.
+    """
+
+    def __init__(self, connect):
+        self.connect = connect
+        self.__local = threading.local()
+
+    def get(self):
+        """
+        Returns the connection of the calling thread, opening it on first use and again after a fork.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        connection = getattr(self.__local, "connection", None)
+        # A connection inherited from the parent process must not be used, or closed, in a forked child
+        if connection is None or self.__local.pid != os.getpid():
+            connection = self.connect()
+            self.__local.connection = connection
+            self.__local.pid = os.getpid()
+        return connection
+
+    def close(self):
+        """
+        Closes the connection of the calling thread, if it has one.
+
+        Returns:
+            None
+        """
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            if self.__local.pid == os.getpid():
+                connection.close()
+            self.__local.connection = None
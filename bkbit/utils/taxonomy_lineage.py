@@ -0,0 +1,379 @@
+"""
+Array-backed lineage index of the NCBI taxonomy tree.
+
+The tree from nodes.dmp is stored as NumPy arrays indexed by taxid: the parent of every taxon, its rank and its
+depth below the root. A binary lifting table (the 2^k-th ancestor of every taxon) is derived from the parent
+pointers on first use, so ancestor-at-depth, descendant and lowest common ancestor queries take O(log depth)
+steps. The closest ancestor with a rank is computed for every taxon the first time that rank is asked for, so
+rank queries are a single lookup. Every query accepts a single taxid or an array of taxids and is evaluated with
+vectorized array operations, so a batch of taxids costs about as many NumPy operations as a single one.
+
+Example usage:
+    from bkbit.utils.taxonomy_lineage import TaxonomyLineage
+
+    lineage = TaxonomyLineage.load("/path/to/taxonomy_lineage.npz")
+    lineage.get_rank(9606)  # 'species'
+    lineage.is_descendant(9606, 40674)  # True: Homo sapiens is a mammal
+    lineage.ancestor_at_rank([10090, 10092], "genus")  # array([10088, 10088])
+    lineage.lca(9606, 10090)  # 314146 (Euarchontoglires)
+
+Classes:
+    TaxonomyLineage: Parent, rank and depth arrays of the taxonomy tree with ancestor, rank and LCA queries.
+
+Attributes:
+    MISSING (int): The value returned for taxids that are not in the index or have no matching ancestor.
+    ROOT_TAXID (int): The taxid of the root of the NCBI taxonomy.
+"""
+
+from array import array
+import numpy as np
+
+MISSING = -1
+ROOT_TAXID = 1
+
+
+class TaxonomyLineage:
+    """
+    Parent, rank and depth arrays of the taxonomy tree, indexed by taxid.
+
+    Attributes:
+        parent (numpy.ndarray): The parent taxid of every taxid, MISSING for unknown taxids. The root is its own parent.
+        rank (numpy.ndarray): The index into rank_names of the rank of every taxid.
+        depth (numpy.ndarray): The number of edges between every taxid and the root, MISSING for unknown taxids.
+        rank_names (list[str]): The rank names, e.g. "species". Index 0 is the empty rank of unknown taxids.
+
+    Methods:
+        from_nodes(nodes):
+            Builds the index from the (taxid, parent taxid, rank) rows of nodes.dmp.
+
+        load(file_path), save(file_path):
+            Reads or writes the index as an uncompressed .npz file.
+
+        get_parent(taxids), get_rank(taxids), get_depth(taxids):
+            Return the parent, rank name or depth of taxids.
+
+        ancestor_at_depth(taxids, depth), ancestor_at_rank(taxids, rank):
+            Return the ancestor of taxids at a depth or with a rank.
+
+        is_descendant(taxids, ancestor), lca(taxids, other_taxids), lineage(taxid):
+            Answer descendant, lowest common ancestor and full lineage queries.
+    """
+
+    def __init__(self, parent, rank, rank_names, depth=None):
+        self.parent = parent
+        self.rank = rank
+        self.rank_names = list(rank_names)
+        self.__rank_codes = {name: code for code, name in enumerate(self.rank_names)}
+        self.depth = self.__compute_depth() if depth is None else depth
+        self.__jumps = None
+        self.__levels = None
+        self.__rank_ancestors = {}
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        """
+        Builds the index from the rows of nodes.dmp.
+
+        Args:
+            nodes (Iterable[tuple[int, int, str]]): The taxid, parent taxid and rank of every taxon.
+
+        Returns:
+            TaxonomyLineage: The lineage index.
+        """
+        # Compact typed buffers keep the memory use of millions of rows low until the arrays are built
+        taxids, parents, ranks = array("q"), array("q"), array("h")
+        rank_codes = {"": 0}
+        for taxid, parent, rank in nodes:
+            taxids.append(taxid)
+            parents.append(parent)
+            ranks.append(rank_codes.setdefault(rank, len(rank_codes)))
+        taxids = np.frombuffer(taxids, dtype=np.int64) if taxids else np.zeros(0, np.int64)
+        size = int(taxids.max()) + 1 if len(taxids) else ROOT_TAXID + 1
+        parent = np.full(size, MISSING, dtype=np.int32)
+        parent[taxids] = np.frombuffer(parents, dtype=np.int64) if parents else []
+        rank = np.zeros(size, dtype=np.int16)
+        rank[taxids] = np.frombuffer(ranks, dtype=np.int16) if ranks else []
+        return cls(parent, rank, sorted(rank_codes, key=rank_codes.get))
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Reads the index from an .npz file written by save.
+
+        Args:
+            file_path (str): The path of the .npz file.
+
+        Returns:
+            TaxonomyLineage: The lineage index.
+        """
+        with np.load(file_path, allow_pickle=False) as data:
+            return cls(
+                data["parent"], data["rank"], data["rank_names"].tolist(), data["depth"]
+            )
+
+    def save(self, file_path):
+        """
+        Writes the index to an uncompressed .npz file.
+
+        Args:
+            file_path (str): The path of the .npz file.
+
+        Returns:
+            None
+        """
+        with open(file_path, "wb") as f:
+            np.savez(
+                f,
+                parent=self.parent,
+                rank=self.rank,
+                depth=self.depth,
+                rank_names=np.array(self.rank_names, dtype=str),
+            )
+
+    def __compute_depth(self):
+        """
+        Computes the depth of every taxid by pointer doubling: every pass adds the distance to the current
+        ancestor of a taxid and jumps to the ancestor of that ancestor, so O(log depth) passes reach the root.
+
+        Returns:
+            numpy.ndarray: The depth of every taxid, MISSING for unknown taxids and taxa below unknown parents.
+        """
+        size = len(self.parent)
+        own = np.arange(size, dtype=np.int32)
+        known = self.parent != MISSING
+        linked = known & (self.parent >= 0) & (self.parent < size)
+        linked[linked] = self.parent[self.parent[linked]] != MISSING
+        # Taxa below unknown parents point to themselves, like roots, and are told apart from roots at the end
+        ancestor = np.where(linked, self.parent, own).astype(np.int32)
+        distance = (ancestor != own).astype(np.int32)
+        for _ in range(max(1, size.bit_length()) + 1):
+            if (ancestor[ancestor] == ancestor).all():
+                break
+            distance += distance[ancestor]
+            ancestor = ancestor[ancestor]
+        roots = known & (self.parent == own)
+        return np.where(roots[ancestor] & (ancestor[ancestor] == ancestor), distance, MISSING).astype(np.int32)
+
+    def __jump_table(self):
+        """
+        Returns the binary lifting table, computing it on first use: row k holds the 2^k-th ancestor of every
+        taxid (the root for jumps past it).
+
+        Returns:
+            numpy.ndarray: The 2^k-th ancestors, one row per k.
+        """
+        if self.__jumps is None:
+            max_depth = int(self.depth.max()) if len(self.depth) else 0
+            levels = max(1, max_depth.bit_length())
+            jumps = np.empty((levels, len(self.parent)), dtype=np.int32)
+            # Unknown taxids and taxa below unknown parents jump to themselves and are filtered out by depth
+            own = np.arange(len(self.parent), dtype=np.int32)
+            jumps[0] = np.where(self.depth != MISSING, self.parent, own)
+            for k in range(1, levels):
+                jumps[k] = jumps[k - 1][jumps[k - 1]]
+            self.__jumps = jumps
+        return self.__jumps
+
+    def __depth_levels(self):
+        """
+        Returns the known taxids grouped by depth, computing them on first use.
+
+        Returns:
+            list[numpy.ndarray]: The taxids at every depth, starting with the roots at depth 0.
+        """
+        if self.__levels is None:
+            known = np.flatnonzero(self.depth != MISSING).astype(np.int32)
+            depths = self.depth[known]
+            order = np.argsort(depths, kind="stable")
+            bounds = np.searchsorted(depths[order], np.arange(int(depths.max()) + 2 if len(depths) else 1))
+            self.__levels = [known[order[start:end]] for start, end in zip(bounds[:-1], bounds[1:])]
+        return self.__levels
+
+    def __rank_ancestor_table(self, code):
+        """
+        Returns the closest ancestor (or the taxon itself) with a rank for every taxid, computing it on first use
+        of the rank with one pass over the taxids in depth order: a taxon inherits the answer of its parent unless
+        it has the rank itself.
+
+        Args:
+            code (int): The index into rank_names of the rank.
+
+        Returns:
+            numpy.ndarray: The ancestors with the rank, MISSING for unknown taxids and taxa without one.
+        """
+        ancestors = self.__rank_ancestors.get(code)
+        if ancestors is None:
+            ancestors = np.full(len(self.parent), MISSING, dtype=np.int32)
+            for depth, taxids in enumerate(self.__depth_levels()):
+                inherited = ancestors[self.parent[taxids]] if depth else MISSING
+                ancestors[taxids] = np.where(self.rank[taxids] == code, taxids, inherited)
+            self.__rank_ancestors[code] = ancestors
+        return ancestors
+
+    def __index(self, taxids):
+        """
+        Converts taxids to an index array and a mask of the taxids that are in the index.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+
+        Returns:
+            tuple: The taxids as a 1-d array (unknown taxids replaced by 0), the mask of known taxids and whether
+            the input was a single taxid.
+        """
+        values = np.asarray(taxids, dtype=np.int64)
+        scalar = values.ndim == 0
+        values = np.atleast_1d(values)
+        in_range = (values >= 0) & (values < len(self.parent))
+        index = np.where(in_range, values, 0)
+        known = in_range & (self.depth[index] != MISSING)
+        return np.where(known, index, 0), known, scalar
+
+    @staticmethod
+    def __result(values, scalar):
+        if not scalar:
+            return values
+        value = values[0]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def get_parent(self, taxids):
+        """
+        Returns the parent taxid of one or more taxids.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+
+        Returns:
+            int or numpy.ndarray: The parent taxids, MISSING for unknown taxids.
+        """
+        index, known, scalar = self.__index(taxids)
+        return self.__result(np.where(known, self.parent[index], MISSING), scalar)
+
+    def get_depth(self, taxids):
+        """
+        Returns the depth below the root of one or more taxids.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+
+        Returns:
+            int or numpy.ndarray: The depths, MISSING for unknown taxids.
+        """
+        index, known, scalar = self.__index(taxids)
+        return self.__result(np.where(known, self.depth[index], MISSING), scalar)
+
+    def get_rank(self, taxids):
+        """
+        Returns the rank name of one or more taxids.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+
+        Returns:
+            str or numpy.ndarray: The rank names, "" for unknown taxids.
+        """
+        index, known, scalar = self.__index(taxids)
+        names = np.array(self.rank_names, dtype=object)[np.where(known, self.rank[index], 0)]
+        return self.__result(names, scalar)
+
+    def ancestor_at_depth(self, taxids, depth):
+        """
+        Returns the ancestor at a given depth of one or more taxids, with O(log depth) vectorized jumps.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+            depth (int or array-like): The depth of the ancestor, per taxid or for all of them.
+
+        Returns:
+            int or numpy.ndarray: The ancestors, MISSING for unknown taxids and taxa above the depth.
+        """
+        index, known, scalar = self.__index(taxids)
+        steps = self.depth[index] - np.asarray(depth)
+        valid = known & (steps >= 0)
+        steps = np.where(valid, steps, 0)
+        jumps = self.__jump_table()
+        for k in range(len(jumps)):
+            jump = (steps >> k) & 1 == 1
+            index = np.where(jump, jumps[k][index], index)
+        return self.__result(np.where(valid, index, MISSING), scalar)
+
+    def ancestor_at_rank(self, taxids, rank):
+        """
+        Returns the closest ancestor (or the taxon itself) with a given rank, e.g. the species of a strain, with
+        one lookup in the ancestors of the rank.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+            rank (str): The rank name, e.g. "species" or "genus".
+
+        Returns:
+            int or numpy.ndarray: The ancestors, MISSING if there is no ancestor with the rank.
+        """
+        index, known, scalar = self.__index(taxids)
+        code = self.__rank_codes.get(rank)
+        if code is None:
+            return self.__result(np.full(len(index), MISSING, dtype=np.int64), scalar)
+        ancestors = self.__rank_ancestor_table(code)
+        return self.__result(np.where(known, ancestors[index], MISSING).astype(np.int64), scalar)
+
+    def is_descendant(self, taxids, ancestor):
+        """
+        Checks whether one or more taxids descend from (or are) a given taxon, e.g. whether they are mammals.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+            ancestor (int): The taxid of the ancestor.
+
+        Returns:
+            bool or numpy.ndarray: Whether each taxid is in the subtree of the ancestor.
+        """
+        ancestor_depth = self.get_depth(ancestor)
+        if ancestor_depth == MISSING:
+            _, known, scalar = self.__index(taxids)
+            return self.__result(np.zeros(len(known), dtype=bool), scalar)
+        index, known, scalar = self.__index(taxids)
+        return self.__result(
+            known & (np.atleast_1d(self.ancestor_at_depth(index, ancestor_depth)) == ancestor), scalar
+        )
+
+    def lca(self, taxids, other_taxids):
+        """
+        Returns the lowest common ancestor of pairs of taxids, with O(log depth) vectorized jumps.
+
+        Args:
+            taxids (int or array-like): One or more taxids.
+            other_taxids (int or array-like): The taxids to pair them with.
+
+        Returns:
+            int or numpy.ndarray: The lowest common ancestors, MISSING if either taxid is unknown.
+        """
+        a, a_known, scalar = self.__index(taxids)
+        b, b_known, other_scalar = self.__index(other_taxids)
+        a, b = np.broadcast_arrays(a, b)
+        valid = a_known & b_known
+        # Lift both taxa to the same depth, then jump both up as long as their ancestors differ
+        depth = np.minimum(self.depth[a], self.depth[b])
+        a = np.where(valid, np.atleast_1d(self.ancestor_at_depth(a, depth)), 0)
+        b = np.where(valid, np.atleast_1d(self.ancestor_at_depth(b, depth)), 0)
+        jumps = self.__jump_table()
+        for k in reversed(range(len(jumps))):
+            differ = jumps[k][a] != jumps[k][b]
+            a = np.where(differ, jumps[k][a], a)
+            b = np.where(differ, jumps[k][b], b)
+        result = np.where(a == b, a, self.parent[a])
+        return self.__result(np.where(valid, result, MISSING), scalar and other_scalar)
+
+    def lineage(self, taxid):
+        """
+        Returns the taxids from the root down to a taxid.
+
+        Args:
+            taxid (int): The taxid.
+
+        Returns:
+            list[int]: The lineage, starting with the root and ending with the taxid. Empty for unknown taxids.
+        """
+        depth = self.get_depth(taxid)
+        if depth == MISSING:
+            return []
+        return self.ancestor_at_depth(np.full(depth + 1, taxid), np.arange(depth + 1)).tolist()
@@ -0,0 +1,137 @@
+"""
+Process-wide cache for the NCBI taxonomy mappings.
+
+Loading the taxonomy mappings costs seconds when they are read from JSON files, so a service that creates many
+Gff3 objects should load them once per process. A TaxonomyProvider wraps the function that loads the mappings,
+calls it on first use and hands out the same mappings to every later caller and thread. Preloading the mappings
+in a parent process before it forks worker processes lets the workers share their memory pages copy-on-write.
+
+Example usage:
+    from bkbit.data_translators.genome_annotation_translator import TAXONOMY_PROVIDER
+
+    TAXONOMY_PROVIDER.preload()  # before forking worker processes
+    taxonomy = TAXONOMY_PROVIDER.get()
+    TAXONOMY_PROVIDER.stats()  # {'hits': 1, 'misses': 1, 'load_seconds': 2.1}
+
+Classes:
+    TaxonomyProvider: A thread-safe, load-once cache for the result of a taxonomy loader function.
+"""
+
+import gc
+import os
+import threading
+import time
+import weakref
+
+_providers = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    # A lock held by another thread at fork time would never be released in the child
+    for provider in list(_providers):
+        provider._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class TaxonomyProvider:
+    """
+    A thread-safe cache for the taxonomy mappings returned by a loader function, loaded once per process.
+
+    Attributes:
+        loader (Callable[[], dict]): The function that loads the taxonomy mappings.
+
+    Methods:
+        get():
+            Returns the taxonomy mappings, loading them on first use.
+
+        preload(freeze=True):
+            Loads the taxonomy mappings up front, e.g. before forking worker processes.
+
+        clear():
+            Drops the cached mappings, so that the next call to get loads them again.
+
+        stats():
+            Returns the number of cache hits and misses of this process and the time spent loading.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.__lock = threading.Lock()
+        self.__taxonomy = None
+        self.__hits = 0
+        self.__misses = 0
+        self.__load_seconds = 0.0
+        _providers.add(self)
+
+    def get(self):
+        """
+        Returns the taxonomy mappings, loading them on first use. Concurrent first calls load them only once.
+
+        Returns:
+            dict: The taxonomy mappings returned by the loader.
+
+        Raises:
+            FileNotFoundError: If the loader cannot find the taxonomy files. Nothing is cached in that case.
+        """
+        with self.__lock:
+            if self.__taxonomy is not None:
+                self.__hits += 1
+                return self.__taxonomy
+            self.__misses += 1
+            start = time.perf_counter()
+            self.__taxonomy = self.loader()
+            self.__load_seconds += time.perf_counter() - start
+            return self.__taxonomy
+
+    def preload(self, freeze=True):
+        """
+        Loads the taxonomy mappings up front. Call it in the parent process before forking worker processes,
+        so that every worker uses the mappings of the parent instead of loading its own copy.
+
+        Args:
+            freeze (bool, optional): If True, the objects of the process are moved to the permanent generation
+                of the garbage collector (gc.freeze), so that garbage collections in the workers do not write to,
+                and thereby copy, the pages of the shared mappings. Defaults to True.
+
+        Returns:
+            dict: The taxonomy mappings returned by the loader.
+        """
+        taxonomy = self.get()
+        if freeze and hasattr(gc, "freeze"):
+            gc.collect()
+            gc.freeze()
+        return taxonomy
+
+    def clear(self):
+        """
+        Drops the cached mappings, e.g. after the taxonomy was downloaded again.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__taxonomy = None
+
+    def stats(self):
+        """
+        Returns the cache statistics of the current process. A forked process starts with fresh statistics but
+        keeps the cached mappings.
+
+        Returns:
+            dict: The number of "hits" and "misses" of get, and the "load_seconds" spent in the loader.
+        """
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "load_seconds": self.__load_seconds,
+            }
+
+    def _reset_after_fork(self):
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__load_seconds = 0.0
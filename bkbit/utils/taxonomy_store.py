@@ -0,0 +1,241 @@
+"""
+Indexed on-disk store for the NCBI taxonomy dictionaries.
+
+The taxonomy dictionaries (taxid to scientific name, taxid to common name and scientific name to taxid) have
+millions of entries, so loading them from JSON costs seconds and hundreds of megabytes per process. This module
+stores them as indexed tables of a single SQLite file instead. A TaxonomyStore opens the file read-only and
+exposes every table as a read-only mapping whose lookups are answered from the index on disk, so nothing is
+loaded up front. The store also holds the scientific names under their normalized key (see
+bkbit.utils.scientific_name_index), derived from the scientific_name_to_taxid rows while the store is built.
+
+Example usage:
+    from bkbit.utils.taxonomy_store import TaxonomyStore
+
+    store = TaxonomyStore("/path/to/taxonomy.sqlite")
+    store["taxid_to_scientific_name"]["9606"]  # 'Homo sapiens'
+    store["scientific_name_to_taxid"].get("Mus musculus")  # '10090'
+
+Classes:
+    TaxonomyTable: A read-only mapping backed by one table of a taxonomy store.
+    TaxonomyStore: A read-only SQLite taxonomy store with one connection per thread.
+
+Functions:
+    build_taxonomy_store(store_path, rows):
+        Writes dictionaries, or a stream of (table, key, value) rows, into a new taxonomy store file.
+
+Attributes:
+    TAXONOMY_TABLES (dict[str, str]): The names of the tables of a taxonomy store and how they resolve duplicate
+        keys: "IGNORE" keeps the first value of a key, "REPLACE" keeps the last one. Either way a key keeps the
+        position where it first appeared.
+    INSERT_BATCH_SIZE (int): The number of rows inserted into a table at a time while building a store.
+"""
+
+import itertools
+import os
+import sqlite3
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from bkbit.utils.scientific_name_index import MAX_CHARACTER, normalize_scientific_name
+from bkbit.utils.sqlite_connections import ThreadConnections
+
+# The first scientific/common name of a taxid wins, while a scientific name maps to the last taxid that uses it
+TAXONOMY_TABLES = {
+    "scientific_name_to_taxid": "REPLACE",
+    "taxid_to_scientific_name": "IGNORE",
+    "taxid_to_common_name": "IGNORE",
+    "normalized_name_to_taxid": "REPLACE",
+}
+INSERT_BATCH_SIZE = 10000
+
+
+def build_taxonomy_store(store_path, rows):
+    """
+    Writes taxonomy entries into a new taxonomy store file, replacing any existing file at store_path.
+
+    Rows are inserted in batches as they arrive, so a stream of rows is never held in memory as a whole. Every key
+    keeps the position of the first row that added it, so that TaxonomyTable.scan() returns the entries in the
+    order of the rows, like a dictionary filled from them. The store is written to a temporary file first and moved
+    into place once it is complete, so readers never see a partially written store.
+
+    Args:
+        store_path (str): The path of the store file.
+        rows (Iterable[tuple[str, str, str]] or dict[str, dict[str, str]]): The (table, key, value) rows of the
+            store, or a dictionary of key-value pairs by table name.
+
+    Returns:
+        None
+    """
+    if isinstance(rows, Mapping):
+        rows = (
+            (name, key, value) for name, table in rows.items() for key, value in table.items()
+        )
+    directory = os.path.dirname(os.path.abspath(store_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".sqlite", dir=directory)
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            # A 32 MB page cache keeps most B-tree pages in memory while rows arrive in unsorted key order
+            connection.execute("PRAGMA cache_size = -32768")
+            batches = {}
+            for name in TAXONOMY_TABLES:
+                # WITHOUT ROWID keeps the rows inside the primary key index, so a lookup is a single B-tree search
+                connection.execute(
+                    f"CREATE TABLE {name} (key TEXT PRIMARY KEY, value TEXT NOT NULL, seq INTEGER NOT NULL) "
+                    "WITHOUT ROWID"
+                )
+                batches[name] = []
+            sequence = itertools.count()
+
+            def flush(name):
+                # INSERT OR REPLACE would move a replaced key to the position of its last row
+                if TAXONOMY_TABLES[name] == "IGNORE":
+                    conflict = "DO NOTHING"
+                else:
+                    conflict = "DO UPDATE SET value = excluded.value"
+                connection.executemany(
+                    f"INSERT INTO {name} (key, value, seq) VALUES (?, ?, ?) ON CONFLICT (key) {conflict}",
+                    batches[name],
+                )
+                batches[name].clear()
+
+            def add(name, key, value):
+                batch = batches[name]
+                batch.append((key, value, next(sequence)))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    flush(name)
+
+            for name, key, value in rows:
+                add(name, key, value)
+                if name == "scientific_name_to_taxid":
+                    add("normalized_name_to_taxid", normalize_scientific_name(key), value)
+            for name in TAXONOMY_TABLES:
+                flush(name)
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(temp_path, store_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+class TaxonomyTable(Mapping):
+    """
+    A read-only mapping backed by one table of a taxonomy store. Every lookup queries the index of the table.
+
+    Attributes:
+        store (TaxonomyStore): The store that the table belongs to.
+        name (str): The name of the table.
+    """
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def __getitem__(self, key):
+        row = (
+            self.store.connection()
+            .execute(f"SELECT value FROM {self.name} WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    def __iter__(self):
+        for (key,) in self.store.connection().execute(f"SELECT key FROM {self.name}"):
+            yield key
+
+    def __len__(self):
+        return self.store.connection().execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def scan(self):
+        """
+        Yields all entries of the table with one scan, instead of one index lookup per key as items() does. The
+        entries come in the order their keys were first added.
+
+        Yields:
+            tuple[str, str]: The (key, value) pairs of the table.
+        """
+        for key, value in self.store.connection().execute(f"SELECT key, value FROM {self.name} ORDER BY seq"):
+            yield key, value
+
+    def range(self, prefix, limit):
+        """
+        Returns the entries whose key starts with a prefix, with a range scan of the index.
+
+        Args:
+            prefix (str): The prefix of the keys.
+            limit (int): The largest number of entries to return.
+
+        Returns:
+            list[tuple[str, str]]: Up to limit (key, value) pairs, in key order.
+        """
+        return (
+            self.store.connection()
+            .execute(
+                f"SELECT key, value FROM {self.name} WHERE key >= ? AND key < ? ORDER BY key LIMIT ?",
+                (prefix, prefix + MAX_CHARACTER, limit),
+            )
+            .fetchall()
+        )
+
+
+class TaxonomyStore:
+    """
+    A read-only SQLite taxonomy store. SQLite connections cannot be shared between threads or processes, so every
+    thread that reads from the store gets its own connection, and a forked process opens new ones. A store file that
+    lacks any of the TAXONOMY_TABLES is rejected when it is opened, so that it is rebuilt.
+
+    Attributes:
+        store_path (str): The path of the store file.
+
+    Methods:
+        connection():
+            Returns the SQLite connection of the calling thread.
+
+        close():
+            Closes the connection of the calling thread.
+    """
+
+    def __init__(self, store_path):
+        if not os.path.isfile(store_path):
+            raise FileNotFoundError(f"Taxonomy store {store_path} does not exist.")
+        self.store_path = store_path
+        self.__connections = ThreadConnections(
+            lambda: sqlite3.connect(Path(store_path).resolve().as_uri() + "?mode=ro", uri=True)
+        )
+        self.__tables = {name: TaxonomyTable(self, name) for name in TAXONOMY_TABLES}
+        rows = self.connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        missing = set(TAXONOMY_TABLES) - {name for (name,) in rows}
+        if missing:
+            raise ValueError(
+                f"Taxonomy store {store_path} lacks the tables {', '.join(sorted(missing))}. "
+                "Rebuild the taxonomy (bkbit download-ncbi-taxonomy --reload)."
+            )
+
+    def __getitem__(self, name):
+        return self.__tables[name]
+
+    def connection(self):
+        """
+        Returns the SQLite connection of the calling thread, opening it on first use and again after a fork.
+
+        Returns:
+            sqlite3.Connection: A read-only connection to the store.
+        """
+        return self.__connections.get()
+
+    def close(self):
+        """
+        Closes the connection of the calling thread, if it has one.
+
+        Returns:
+            None
+        """
+        self.__connections.close()